@@ -1,6 +1,133 @@
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ALL_VAR, PAGE_VAR, ChangeList
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, OTP
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import HttpResponseRedirect
+from django.utils.functional import cached_property
+from .models import User, OTP, RevokedToken
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def estimated_count(queryset):
+    """The PostgreSQL planner's row estimate for a queryset, or None on other databases.
+
+    An unfiltered queryset reads ``pg_class.reltuples`` (kept current by
+    autovacuum/ANALYZE); a filtered one takes the top row estimate of its plan.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # -1 (or 0 on older servers) until the table has been analyzed.
+            return row[0] if row and row[0] > 0 else None
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that reports the planner's estimate instead of running COUNT(*) on large tables.
+
+    Below ``exact_count_threshold`` estimated rows (and on databases without
+    estimates) the count is exact.
+    """
+
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is None or estimate < self.exact_count_threshold:
+            self.estimated = False
+            return super().count
+        self.estimated = True
+        return estimate
+
+
+class KeysetChangeList(ChangeList):
+    """Changelist paged by a (created_at, pk) cursor instead of OFFSET.
+
+    ``?before=<cursor>`` shows the rows just older than the cursor, so every
+    page costs the same indexed range scan however deep it is. Filters and
+    search are kept when paging. The offset parameters ``?p=`` and ``?all=``
+    have no meaning here; see offset_redirect().
+    """
+
+    cursor_param = 'before'
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = self.decode_cursor(request.GET.get(self.cursor_param))
+        super().__init__(request, *args, **kwargs)
+
+    @staticmethod
+    def encode_cursor(obj):
+        delta = obj.created_at - EPOCH
+        return f'{(delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds}-{obj.pk}'
+
+    @staticmethod
+    def decode_cursor(value):
+        try:
+            micros, pk = value.split('-')
+            return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+        except (AttributeError, ValueError, OverflowError):
+            return None
+
+    @staticmethod
+    def offset_redirect(request):
+        """A redirect dropping ?p=/?all= (e.g. from an old bookmark), or None.
+
+        Otherwise the first page would be shown as if it were page N.
+        """
+        if PAGE_VAR not in request.GET and ALL_VAR not in request.GET:
+            return None
+        query = request.GET.copy()
+        query.pop(PAGE_VAR, None)
+        query.pop(ALL_VAR, None)
+        return HttpResponseRedirect(f'{request.path}?{query.urlencode()}' if query else request.path)
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(self.cursor_param, None)
+        return params
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if exclude_parameters is None:
+            # Counted without the cursor, so every page reports the total for the filters and search.
+            self.counted_queryset = queryset
+        if self.cursor is not None:
+            created_at, pk = self.cursor
+            # (created_at, id) < cursor, written as a range on the index's leading column.
+            queryset = queryset.filter(created_at__lte=created_at).exclude(created_at=created_at, pk__gte=pk)
+        return queryset
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(request, self.counted_queryset, self.list_per_page)
+        rows = list(self.queryset[:self.list_per_page + 1])
+        self.result_list = rows[:self.list_per_page]
+        self.result_count = paginator.count
+        self.result_count_estimated = getattr(paginator, 'estimated', False)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = paginator
+        self.newest_url = self.get_query_string(remove=[self.cursor_param]) if self.cursor is not None else None
+        self.older_url = (self.get_query_string({self.cursor_param: self.encode_cursor(self.result_list[-1])})
+                          if len(rows) > self.list_per_page else None)
 
 
 @admin.register(User)
@@ -12,6 +139,46 @@ class UserAdmin(BaseUserAdmin):
 
 @admin.register(OTP)
 class OTPAdmin(admin.ModelAdmin):
+    """OTP list for a table with millions of rows.
+
+    The user column is joined in, the row count is an estimate, pages use a
+    (created_at, pk) cursor (otp_created_idx), and search is a prefix match on
+    contact (otp_contact_prefix_idx); the default ``icontains`` search would
+    scan the table. Each page costs a constant number of queries.
+    """
+
     list_display = ('contact', 'code', 'contact_type', 'user', 'is_used', 'created_at', 'expires_at')
     list_filter = ('contact_type', 'is_used')
+    list_select_related = ('user',)
+    search_fields = ('contact',)
+    search_help_text = 'Contact (email or mobile) starting with...'
+    # Keyset paging needs one fixed order; sorting other columns would also mean full scans.
+    ordering = ('-created_at', '-pk')
+    sortable_by = ()
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Facets would add a COUNT(*) per filter choice.
+    show_facets = admin.ShowFacets.NEVER
+    raw_id_fields = ('user',)
     readonly_fields = ('created_at',)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def changelist_view(self, request, extra_context=None):
+        return KeysetChangeList.offset_redirect(request) or super().changelist_view(request, extra_context)
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(contact__startswith=search_term), False
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'token_type', 'user', 'revoked_at', 'expires_at')
+    list_filter = ('token_type',)
+    list_select_related = ('user',)
+    search_fields = ('jti',)
+    raw_id_fields = ('user',)
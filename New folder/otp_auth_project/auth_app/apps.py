@@ -5,3 +5,10 @@ class AuthAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth_app'
     verbose_name = 'Authentication App'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Their connection_created receivers must be in place before the first DB connection.
+        from . import instrumentation, testing  # noqa: F401
+        from .user_cache import check_configuration
+        check_configuration()
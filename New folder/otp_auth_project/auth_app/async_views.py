@@ -0,0 +1,230 @@
+"""Native async counterparts of the API views in views.py, for ASGI deployments.
+
+They return the same payloads and status codes, but use Django's async ORM
+and the async OTP store/delivery helpers, so a request never blocks the
+event loop. DRF's APIView cannot run async handlers, so these are plain
+Django views that reuse the DRF serializers for (DB-free) field validation.
+Enabled with ASYNC_VIEWS=True; see auth_app/urls.py.
+"""
+import json
+import math
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import status
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User, OTP
+from .otp_store import get_otp_store
+from .serializers import RegistrationFieldsSerializer, LoginSerializer, VerifyOTPSerializer
+from .authentication import ProfileClaimsJWTAuthentication, CachedProfileClaimsJWTAuthentication
+from .tokens import issue_tokens
+from .throttling import OTP_THROTTLE_CLASSES
+from .instrumentation import span
+from .db_router import use_replica
+from .user_cache import alookup_user_id, user_ref
+from .revocation import ais_revoked
+from .utils import acreate_and_send_otp
+
+
+class AsyncRegistrationSerializer(RegistrationFieldsSerializer):
+    async def avalidate_unique_contact(self, data):
+        email = data.get('email')
+        mobile = data.get('mobile')
+        if email and await alookup_user_id(OTP.CONTACT_EMAIL, email) is not None:
+            return 'User with this email already exists.'
+        if mobile and await alookup_user_id(OTP.CONTACT_MOBILE, mobile) is not None:
+            return 'User with this mobile already exists.'
+        return None
+
+
+class AsyncAPIView(View):
+    """JSON in, JSON out, exempt from CSRF like DRF's APIView."""
+
+    throttle_classes = []
+    throttle_scope = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    def parse(self, request):
+        if request.content_type == 'application/json':
+            try:
+                return json.loads(request.body or b'{}')
+            except ValueError:
+                return None
+        return request.POST.dict()
+
+    def bad_request(self, errors):
+        return JsonResponse({'success': False, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    def invalid_json(self):
+        return JsonResponse({'detail': 'JSON parse error.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    async def check_throttles(self, request, data):
+        """Like APIView.check_throttles; returns a 429 response or None."""
+        # The contact throttle reads the body from request.data, as on a DRF request.
+        request.data = data
+        waits = []
+        for throttle in [throttle_class() for throttle_class in self.throttle_classes]:
+            if not await throttle.aallow_request(request, self):
+                waits.append(throttle.wait())
+        if not waits:
+            return None
+        wait = max((w for w in waits if w is not None), default=None)
+        detail = 'Request was throttled.'
+        response = JsonResponse({'detail': detail if wait is None else f'{detail} Expected available in {math.ceil(wait)} seconds.'},
+                                status=status.HTTP_429_TOO_MANY_REQUESTS)
+        if wait is not None:
+            response['Retry-After'] = str(math.ceil(wait))
+        return response
+
+
+class AsyncRegisterAPIView(AsyncAPIView):
+    async def post(self, request):
+        data = self.parse(request)
+        if data is None:
+            return self.invalid_json()
+        serializer = AsyncRegistrationSerializer(data=data)
+        if not serializer.is_valid():
+            return self.bad_request(serializer.errors)
+        error = await serializer.avalidate_unique_contact(serializer.validated_data)
+        if error:
+            return self.bad_request({'non_field_errors': [error]})
+
+        user = serializer.build_user(serializer.validated_data)
+        await user.asave()
+        return JsonResponse({'success': True, 'message': 'User registered', 'user': {'id': user.id, 'email': user.email, 'mobile': user.mobile}}, status=status.HTTP_201_CREATED)
+
+
+class AsyncLoginAPIView(AsyncAPIView):
+    throttle_classes = OTP_THROTTLE_CLASSES
+    throttle_scope = 'login'
+
+    async def post(self, request):
+        data = self.parse(request)
+        if data is None:
+            return self.invalid_json()
+        throttled = await self.check_throttles(request, data)
+        if throttled is not None:
+            return throttled
+        serializer = LoginSerializer(data=data)
+        if not serializer.is_valid():
+            return self.bad_request(serializer.errors)
+
+        email = serializer.validated_data.get('email')
+        mobile = serializer.validated_data.get('mobile')
+
+        if email:
+            user_id = await alookup_user_id(OTP.CONTACT_EMAIL, email)
+            if user_id is None:
+                return JsonResponse({'success': False, 'message': 'User with this email not found.'}, status=status.HTTP_404_NOT_FOUND)
+            contact = email
+            contact_type = OTP.CONTACT_EMAIL
+        else:
+            user_id = await alookup_user_id(OTP.CONTACT_MOBILE, mobile)
+            if user_id is None:
+                return JsonResponse({'success': False, 'message': 'User with this mobile not found.'}, status=status.HTTP_404_NOT_FOUND)
+            contact = mobile
+            contact_type = OTP.CONTACT_MOBILE
+
+        await acreate_and_send_otp(contact, contact_type, user=user_ref(user_id))
+
+        return JsonResponse({'success': True, 'message': 'OTP sent successfully.'}, status=status.HTTP_200_OK)
+
+
+class AsyncVerifyOTPAPIView(AsyncAPIView):
+    throttle_classes = OTP_THROTTLE_CLASSES
+    throttle_scope = 'verify'
+
+    async def post(self, request):
+        data = self.parse(request)
+        if data is None:
+            return self.invalid_json()
+        throttled = await self.check_throttles(request, data)
+        if throttled is not None:
+            return throttled
+        serializer = VerifyOTPSerializer(data=data)
+        if not serializer.is_valid():
+            return self.bad_request(serializer.errors)
+
+        email = serializer.validated_data.get('email')
+        mobile = serializer.validated_data.get('mobile')
+        code = serializer.validated_data.get('code')
+
+        store = get_otp_store()
+        if email:
+            otp = await store.aconsume(email, OTP.CONTACT_EMAIL, code)
+        else:
+            otp = await store.aconsume(mobile, OTP.CONTACT_MOBILE, code)
+
+        if otp is None:
+            return JsonResponse({'success': False, 'message': 'Invalid OTP.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if otp.is_expired():
+            return JsonResponse({'success': False, 'message': 'OTP has expired.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with span('jwt_mint'):
+            refresh = issue_tokens(otp.user)
+            tokens = {'access': str(refresh.access_token), 'refresh': str(refresh)}
+        return JsonResponse({'success': True, **tokens}, status=status.HTTP_200_OK)
+
+
+class AsyncProfileAPIView(AsyncAPIView):
+    authenticator = CachedProfileClaimsJWTAuthentication() if settings.JWT_VALIDATION_CACHE else ProfileClaimsJWTAuthentication()
+
+    def unauthorized(self, detail, code=None):
+        body = {'detail': detail}
+        if code:
+            body['code'] = code
+        response = JsonResponse(body, status=status.HTTP_401_UNAUTHORIZED)
+        response['WWW-Authenticate'] = self.authenticator.authenticate_header(request=None)
+        return response
+
+    async def authenticate(self, request):
+        """Async version of JWTAuthentication.authenticate; returns (user, error_response)."""
+        header = self.authenticator.get_header(request)
+        raw_token = self.authenticator.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None, self.unauthorized('Authentication credentials were not provided.')
+        try:
+            token = self.authenticator.get_validated_token(raw_token)
+        except InvalidToken as e:
+            return None, self.unauthorized(e.detail.get('detail', 'Given token not valid for any token type'), 'token_not_valid')
+        if await ais_revoked(token):
+            return None, self.unauthorized('Token has been revoked', 'token_not_valid')
+        try:
+            user_id = token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return None, self.unauthorized('Token contained no recognizable user identification', 'token_not_valid')
+        if settings.JWT_PROFILE_CLAIMS and self.authenticator.has_profile_claims(token):
+            if not await self.authenticator.ais_current(token):
+                return None, self.unauthorized('Profile changed; refresh the token', 'profile_stale')
+            return self.authenticator.claims_user(token), None
+        try:
+            with use_replica():
+                user = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            return None, self.unauthorized('User not found', 'user_not_found')
+        if not user.is_active:
+            return None, self.unauthorized('User is inactive', 'user_inactive')
+        return user, None
+
+    async def get(self, request):
+        user, error = await self.authenticate(request)
+        if error is not None:
+            return error
+        data = {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'mobile': user.mobile,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+        }
+        return JsonResponse({'success': True, 'profile': data}, status=status.HTTP_200_OK)
@@ -0,0 +1,202 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .revocation import is_revoked
+from .tokens import PROFILE_CLAIMS, PROFILE_VERSION_CLAIM, current_profile_version, acurrent_profile_version
+
+
+class ProfileTokenUser(TokenUser):
+    """A request.user built from the profile claims of an access token."""
+
+    @cached_property
+    def id(self):
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def email(self):
+        return self.token.get('email')
+
+    @cached_property
+    def mobile(self):
+        return self.token.get('mobile')
+
+    @cached_property
+    def first_name(self):
+        return self.token.get('first_name', '')
+
+    @cached_property
+    def last_name(self):
+        return self.token.get('last_name', '')
+
+
+class RevocationCheckMixin:
+    """Reject access tokens revoked through /logout/ (see auth_app/revocation.py).
+
+    The check sits in ``authenticate`` rather than ``get_validated_token`` so it
+    also applies to tokens served from the validated-token cache.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        self.check_revoked(validated_token)
+        return self.get_user(validated_token), validated_token
+
+    def check_revoked(self, validated_token):
+        if is_revoked(validated_token):
+            raise InvalidToken(_('Token has been revoked'))
+
+
+class RevocableJWTAuthentication(RevocationCheckMixin, JWTAuthentication):
+    pass
+
+
+class ProfileClaimsJWTAuthentication(RevocationCheckMixin, JWTAuthentication):
+    """JWTAuthentication that trusts the profile embedded by tokens.issue_tokens.
+
+    Instead of loading the User row, the token's profile_version claim is
+    compared with the user's current version, which is served from the cache
+    and only queried on a miss. A stale token is rejected with code
+    'profile_stale' so the client refreshes. Tokens without profile claims
+    fall back to the usual database lookup.
+    """
+
+    def has_profile_claims(self, validated_token):
+        return PROFILE_VERSION_CLAIM in validated_token and all(c in validated_token for c in PROFILE_CLAIMS)
+
+    def claims_user(self, validated_token):
+        return ProfileTokenUser(validated_token)
+
+    def is_current(self, validated_token):
+        return validated_token[PROFILE_VERSION_CLAIM] == current_profile_version(validated_token[api_settings.USER_ID_CLAIM])
+
+    async def ais_current(self, validated_token):
+        return validated_token[PROFILE_VERSION_CLAIM] == await acurrent_profile_version(validated_token[api_settings.USER_ID_CLAIM])
+
+    def get_user(self, validated_token):
+        if not self.has_profile_claims(validated_token):
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        if not self.is_current(validated_token):
+            raise AuthenticationFailed(_('Profile changed; refresh the token'), code='profile_stale')
+        return self.claims_user(validated_token)
+
+
+class ValidatedTokenCache:
+    """Thread-safe LRU of already-validated tokens, keyed by a SHA-256 digest of the raw token.
+
+    An entry is dropped once the token's ``exp`` passes, so a cached token is
+    never accepted for longer than a fresh validation would accept it, and the
+    least recently used entry is evicted beyond ``maxsize``.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token):
+        key = self.digest(raw_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, token = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return token
+
+    def put(self, raw_token, token):
+        expires_at = token.get('exp')
+        if expires_at is None:
+            return
+        key = self.digest(raw_token)
+        with self._lock:
+            self._entries[key] = (expires_at, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    """Return the process-wide ValidatedTokenCache (sized by JWT_VALIDATION_CACHE_SIZE)."""
+    global _token_cache
+    with _token_cache_lock:
+        if _token_cache is None:
+            _token_cache = ValidatedTokenCache(settings.JWT_VALIDATION_CACHE_SIZE)
+        return _token_cache
+
+
+class CachedTokenValidationMixin:
+    """Skip signature and claim checks for a raw token that already validated."""
+
+    def get_validated_token(self, raw_token):
+        cache = get_token_cache()
+        token = cache.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            cache.put(raw_token, token)
+        return token
+
+
+class CachedJWTAuthentication(CachedTokenValidationMixin, RevocableJWTAuthentication):
+    pass
+
+
+class CachedProfileClaimsJWTAuthentication(CachedTokenValidationMixin, ProfileClaimsJWTAuthentication):
+    pass
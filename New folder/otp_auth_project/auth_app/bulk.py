@@ -0,0 +1,172 @@
+"""Bulk user registration for partner onboarding (POST /register/bulk/ and `manage.py bulk_register`).
+
+Rows are validated with the registration serializer's field checks, checked
+for uniqueness with one ``__in`` query per chunk and column (plus an in-memory
+set for duplicates within the input), and inserted with ``bulk_create``.
+Results are yielded row by row so callers can stream them.
+"""
+import csv
+import json
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import User, OTP
+from .serializers import RegistrationFieldsSerializer
+from .utils import create_and_send_otps
+from .user_cache import invalidate_contacts, user_contacts
+
+FORMAT_JSONL = 'jsonl'
+FORMAT_CSV = 'csv'
+
+
+def iter_rows(lines, fmt=FORMAT_JSONL):
+    """Yield (row_number, dict or None) from text lines; None marks an unparseable row."""
+    if fmt == FORMAT_CSV:
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, {k: v for k, v in row.items() if k and v not in (None, '')}
+        return
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None
+            continue
+        yield number, row if isinstance(row, dict) else None
+
+
+def text_lines(stream, encoding='utf-8'):
+    """Decode a binary stream (e.g. a request body) line by line, without reading it all first."""
+    for line in stream:
+        yield line.decode(encoding)
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _existing(users):
+    found = {'email': set(), 'mobile': set(), 'username': set()}
+    if not users:
+        return found
+    emails = [u.email for u in users if u.email]
+    mobiles = [u.mobile for u in users if u.mobile]
+    usernames = [u.username for u in users]
+    taken = User.objects.filter(Q(email__in=emails) | Q(mobile__in=mobiles) | Q(username__in=usernames))
+    for email, mobile, username in taken.values_list('email', 'mobile', 'username'):
+        found['email'].add(email)
+        found['mobile'].add(mobile)
+        found['username'].add(username)
+    return found
+
+
+def _conflict(user, taken, seen):
+    if user.email and (user.email in taken['email'] or ('email', user.email) in seen):
+        return 'User with this email already exists.'
+    if user.mobile and (user.mobile in taken['mobile'] or ('mobile', user.mobile) in seen):
+        return 'User with this mobile already exists.'
+    if user.username in taken['username'] or ('username', user.username) in seen:
+        return 'User with this username already exists.'
+    return None
+
+
+def _insert(users):
+    """bulk_create the chunk; if a concurrent registration wins a race, fall back to row-by-row."""
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+        return {id(u): None for u in users}
+    except IntegrityError:
+        outcome = {}
+        for user in users:
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                outcome[id(user)] = None
+            except IntegrityError:
+                user.pk = None
+                outcome[id(user)] = 'User already exists.'
+        return outcome
+
+
+def _result(number, user=None, errors=None):
+    if errors is not None:
+        return {'row': number, 'success': False, 'errors': errors}
+    return {'row': number, 'success': True, 'user': {'id': user.id, 'email': user.email, 'mobile': user.mobile}}
+
+
+def bulk_register(rows, chunk_size=1000, issue_otps=False, stats=None):
+    """Register users from (row_number, data) pairs, yielding one result dict per row.
+
+    ``stats``, if given, is a dict updated in place with running totals
+    (rows, created, failed, otps_issued, seconds, rows_per_sec).
+    """
+    stats = {} if stats is None else stats
+    stats.update(rows=0, created=0, failed=0, otps_issued=0, seconds=0.0, rows_per_sec=0.0)
+    started = time.perf_counter()
+    seen = set()
+
+    for chunk in _chunks(rows, chunk_size):
+        results = {}
+        pending = []
+        for number, data in chunk:
+            if data is None:
+                results[number] = _result(number, errors={'non_field_errors': ['Row is not a JSON object.']})
+                continue
+            serializer = RegistrationFieldsSerializer(data=data)
+            if not serializer.is_valid():
+                results[number] = _result(number, errors=serializer.errors)
+                continue
+            pending.append((number, serializer.build_user(serializer.validated_data)))
+
+        taken = _existing([user for _, user in pending])
+        to_insert = []
+        for number, user in pending:
+            error = _conflict(user, taken, seen)
+            if error:
+                results[number] = _result(number, errors={'non_field_errors': [error]})
+                continue
+            seen.update({('email', user.email), ('mobile', user.mobile), ('username', user.username)} - {('email', None), ('mobile', None)})
+            to_insert.append((number, user))
+
+        created = []
+        if to_insert:
+            outcome = _insert([user for _, user in to_insert])
+            for number, user in to_insert:
+                error = outcome[id(user)]
+                if error:
+                    results[number] = _result(number, errors={'non_field_errors': [error]})
+                else:
+                    results[number] = _result(number, user=user)
+                    created.append(user)
+
+        # bulk_create sends no post_save, so clear cached "not found" lookups here.
+        invalidate_contacts([pair for user in created for pair in user_contacts(user)])
+
+        if issue_otps and created:
+            create_and_send_otps([
+                (u.email, OTP.CONTACT_EMAIL, u) if u.email else (u.mobile, OTP.CONTACT_MOBILE, u)
+                for u in created
+            ])
+            stats['otps_issued'] += len(created)
+
+        for number, _ in chunk:
+            yield results[number]
+
+        stats['rows'] += len(chunk)
+        stats['created'] += len(created)
+        stats['failed'] += len(chunk) - len(created)
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        stats['rows_per_sec'] = round(stats['rows'] / stats['seconds'], 1) if stats['seconds'] else 0.0
@@ -0,0 +1,44 @@
+"""Opt-in read-replica routing.
+
+All queries go to ``default`` unless they run inside ``use_replica()``; then
+reads go to the ``replica`` database (configured from DATABASE_REPLICA_URL).
+Only lookups that tolerate replication lag opt in: the contact -> user
+lookup (auth_app/user_cache.py, which confirms a replica miss on the
+primary) and authentication for /profile/. The OTP queries never do, since a
+code must be readable right after it was written. The flag is a context
+variable, so it carries into the async ORM's worker threads.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA = 'replica'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def use_replica():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and REPLICA in settings.DATABASES:
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data, so a replica-read user can own a new OTP.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
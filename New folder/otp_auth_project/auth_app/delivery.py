@@ -0,0 +1,205 @@
+import atexit
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryJob:
+    def __init__(self, send, args, description='', send_batch=None):
+        self.send = send
+        self.args = args
+        self.send_batch = send_batch
+        self.description = description
+        self.attempts = 0
+        self.last_error = None
+
+    def __repr__(self):
+        return f'DeliveryJob({self.description}, attempts={self.attempts})'
+
+
+class DeliveryQueue:
+    """In-process outbound queue drained by a pool of worker threads.
+
+    ``submit`` only enqueues, so the request thread never waits on SMTP or an
+    SMS gateway. A failed send is rescheduled with exponential backoff (the
+    worker is free to pick up other jobs meanwhile) and moved to the dead-letter
+    list after ``max_attempts``. Threads are started lazily on first submit, so
+    the queue is safe to create before gunicorn forks.
+
+    Jobs submitted with the same ``send_batch`` callable that are ready at the
+    same time are handed to it together (up to ``batch_size``), e.g. to push
+    several OTP emails through one SMTP session. ``send_batch`` returns one
+    entry per job, None if it was sent or the exception it failed with; only
+    the failed jobs are retried, each on its own schedule. If ``send_batch``
+    raises, the whole batch counts as unsent.
+    """
+
+    def __init__(self, workers=4, max_attempts=5, backoff=1.0, max_backoff=60.0, maxsize=10000, dead_letter_size=1000,
+                 batch_size=1):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.maxsize = maxsize
+        self.dead_letters = deque(maxlen=dead_letter_size)
+
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self._in_flight = 0
+        self._counters = {'submitted': 0, 'sent': 0, 'batches': 0, 'retried': 0, 'dead_lettered': 0, 'rejected': 0}
+
+    def submit(self, send, *args, description='', send_batch=None):
+        """Queue ``send(*args)``. Returns False (and queues nothing) when the queue is full.
+
+        ``send_batch``, if given, is called instead with a list of argument
+        tuples when several jobs sharing it can go out together, and returns
+        a list of per-job errors (None for each one that was sent).
+        """
+        job = DeliveryJob(send, args, description, send_batch)
+        with self._cond:
+            if len(self._heap) >= self.maxsize:
+                self._counters['rejected'] += 1
+                return False
+            self._ensure_started()
+            self._push(job, delay=0)
+            self._counters['submitted'] += 1
+        return True
+
+    def metrics(self):
+        with self._cond:
+            now = time.monotonic()
+            data = dict(self._counters)
+            data['queue_depth'] = len(self._heap)
+            data['waiting_retry'] = sum(1 for ready_at, _, _ in self._heap if ready_at > now)
+            data['in_flight'] = self._in_flight
+            data['workers'] = len(self._threads)
+            data['dead_letter_depth'] = len(self.dead_letters)
+        return data
+
+    def join(self, timeout=None):
+        """Wait until nothing is queued or in flight. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._heap or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout=5.0):
+        """Give queued jobs up to ``timeout`` seconds to go out, then stop the workers."""
+        self.join(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping = False
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'otp-delivery-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _push(self, job, delay):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+        self._cond.notify()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._stopping:
+                if self._heap:
+                    now = time.monotonic()
+                    delay = self._heap[0][0] - now
+                    if delay <= 0:
+                        batch = [heapq.heappop(self._heap)[2]]
+                        send_batch = batch[0].send_batch
+                        while (send_batch is not None and len(batch) < self.batch_size and self._heap
+                               and self._heap[0][0] <= now and self._heap[0][2].send_batch is send_batch):
+                            batch.append(heapq.heappop(self._heap)[2])
+                        self._in_flight += len(batch)
+                        return batch
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            for job in batch:
+                job.attempts += 1
+            try:
+                if len(batch) > 1:
+                    errors = batch[0].send_batch([job.args for job in batch])
+                else:
+                    batch[0].send(*batch[0].args)
+                    errors = [None]
+            except Exception as e:
+                errors = [e] * len(batch)
+            try:
+                sent = 0
+                for job, error in zip(batch, errors):
+                    if error is None:
+                        sent += 1
+                    else:
+                        job.last_error = error
+                        self._failed(job)
+                if sent:
+                    with self._cond:
+                        self._counters['sent'] += sent
+                        self._counters['batches'] += 1
+            finally:
+                with self._cond:
+                    self._in_flight -= len(batch)
+                    self._cond.notify_all()
+
+    def _failed(self, job):
+        with self._cond:
+            if job.attempts < self.max_attempts:
+                delay = min(self.backoff * 2 ** (job.attempts - 1), self.max_backoff)
+                logger.warning('OTP delivery %r failed (%s); retrying in %.1fs', job, job.last_error, delay)
+                self._counters['retried'] += 1
+                self._push(job, delay)
+            else:
+                logger.error('OTP delivery %r failed permanently: %s', job, job.last_error)
+                self._counters['dead_lettered'] += 1
+                self.dead_letters.append(job)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_delivery_queue():
+    """Return the process-wide delivery queue, configured from ``OTP_DELIVERY_*`` settings."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = DeliveryQueue(
+                workers=settings.OTP_DELIVERY_WORKERS,
+                max_attempts=settings.OTP_DELIVERY_MAX_ATTEMPTS,
+                backoff=settings.OTP_DELIVERY_RETRY_BACKOFF,
+                maxsize=settings.OTP_DELIVERY_QUEUE_SIZE,
+                batch_size=settings.OTP_DELIVERY_BATCH_SIZE,
+            )
+            atexit.register(_queue.stop)
+        return _queue
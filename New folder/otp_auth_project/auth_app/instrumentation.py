@@ -0,0 +1,291 @@
+"""Per-request timings, DB query counts and named spans, exported as Prometheus text.
+
+InstrumentationMiddleware opens a trace for each request. While it is open:
+
+- every SQL query is counted and timed (an execute wrapper installed on each
+  new DB connection, so the async ORM's worker threads are covered too);
+- ``with span('name'):`` (or ``@span('name')``) adds the block's time to the
+  trace under that name.
+
+When the request ends its wall time, queries and spans go into the per-process
+metrics registry served at /metrics/, and a sample of slow requests
+(INSTRUMENTATION_SLOW_REQUEST_MS) is logged to ``auth_app.slow_requests`` with
+the per-span breakdown. Spans outside a request (e.g. in the delivery worker
+threads) still feed the span histogram.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+slow_request_logger = logging.getLogger('auth_app.slow_requests')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Trace:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.spans = {}
+
+    def add_span(self, name, seconds):
+        count, total = self.spans.get(name, (0, 0.0))
+        self.spans[name] = (count + 1, total + seconds)
+
+
+_current_trace = ContextVar('current_trace', default=None)
+
+
+class span(ContextDecorator):
+    """Time a block (or, as a decorator, a sync function) under ``name``."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def _recreate_cm(self):
+        # A decorated function can run in several threads at once; give each call its own
+        # instance so their start times do not overwrite each other.
+        return type(self)(self.name)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self._started
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(self.name, elapsed)
+        registry.observe_span(self.name, elapsed)
+        return False
+
+
+def _time_query(execute, sql, params, many, context):
+    trace = _current_trace.get()
+    if trace is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        trace.db_queries += 1
+        trace.db_seconds += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def _install_query_timer(connection, **kwargs):
+    # Also feeds the X-DB-Queries header of the test hook (auth_app/testing.py).
+    if (settings.INSTRUMENTATION or settings.OTP_TEST_HOOK) and _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+@contextmanager
+def request_trace():
+    """The trace of the current request, opened here unless an outer middleware already has one."""
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+class Histogram:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(labels, le=bound)} {cumulative}'
+        yield f'{name}_bucket{_labels(labels, le="+Inf")} {self.count}'
+        yield f'{name}_sum{_labels(labels)} {self.sum:.6f}'
+        yield f'{name}_count{_labels(labels)} {self.count}'
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    body = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in items)
+    return '{' + body + '}'
+
+
+class MetricsRegistry:
+    """Per-process counters and histograms; ``render()`` gives the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.durations = {}
+            self.db_queries = {}
+            self.db_seconds = {}
+            self.spans = {}
+
+    def observe_request(self, endpoint, method, status, trace, seconds):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.durations.setdefault(endpoint, Histogram()).observe(seconds)
+            self.db_queries[endpoint] = self.db_queries.get(endpoint, 0) + trace.db_queries
+            self.db_seconds[endpoint] = self.db_seconds.get(endpoint, 0.0) + trace.db_seconds
+
+    def observe_span(self, name, seconds):
+        with self._lock:
+            self.spans.setdefault(name, Histogram()).observe(seconds)
+
+    def render(self):
+        out = []
+        with self._lock:
+            out.append('# HELP otp_http_requests_total HTTP requests by endpoint, method and status.')
+            out.append('# TYPE otp_http_requests_total counter')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                labels = (('endpoint', endpoint), ('method', method), ('status', status))
+                out.append(f'otp_http_requests_total{_labels(labels)} {count}')
+            out.append('# HELP otp_http_request_duration_seconds Wall time per request.')
+            out.append('# TYPE otp_http_request_duration_seconds histogram')
+            for endpoint, histogram in sorted(self.durations.items()):
+                out.extend(histogram.lines('otp_http_request_duration_seconds', (('endpoint', endpoint),)))
+            out.append('# HELP otp_db_queries_total SQL queries run while serving requests.')
+            out.append('# TYPE otp_db_queries_total counter')
+            for endpoint, count in sorted(self.db_queries.items()):
+                out.append(f'otp_db_queries_total{_labels((("endpoint", endpoint),))} {count}')
+            out.append('# HELP otp_db_query_seconds_total Time spent in SQL queries while serving requests.')
+            out.append('# TYPE otp_db_query_seconds_total counter')
+            for endpoint, seconds in sorted(self.db_seconds.items()):
+                out.append(f'otp_db_query_seconds_total{_labels((("endpoint", endpoint),))} {seconds:.6f}')
+            out.append('# HELP otp_span_duration_seconds Time spent in named spans (OTP issue, JWT minting, validation, ...).')
+            out.append('# TYPE otp_span_duration_seconds histogram')
+            for name, histogram in sorted(self.spans.items()):
+                out.extend(histogram.lines('otp_span_duration_seconds', (('span', name),)))
+        out.extend(_delivery_lines())
+        out.extend(_user_cache_lines())
+        out.extend(_revocation_lines())
+        return '\n'.join(out) + '\n'
+
+
+def _delivery_lines():
+    # Only report the delivery queue if this process has started one.
+    from . import delivery
+
+    if delivery._queue is None:
+        return []
+    lines = []
+    for key, value in sorted(delivery._queue.metrics().items()):
+        lines.append(f'# TYPE otp_delivery_{key} gauge')
+        lines.append(f'otp_delivery_{key} {value}')
+    return lines
+
+
+def _user_cache_lines():
+    from . import user_cache
+
+    stats = user_cache.stats()
+    lines = ['# HELP otp_user_lookup_cache_total Contact -> user lookups by outcome.',
+             '# TYPE otp_user_lookup_cache_total counter']
+    for outcome in ('hits', 'negative_hits', 'misses', 'invalidations'):
+        lines.append(f'otp_user_lookup_cache_total{_labels((("outcome", outcome),))} {stats[outcome]}')
+    return lines
+
+
+def _revocation_lines():
+    from . import revocation
+
+    if revocation._store is None:
+        return []
+    lines = ['# HELP otp_token_revocation_total Revocation store checks, Bloom filter hits, false positives, revoked tokens and reloads.',
+             '# TYPE otp_token_revocation_total counter']
+    for event, value in sorted(revocation._store.stats.items()):
+        lines.append(f'otp_token_revocation_total{_labels((("event", event),))} {value}')
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+def _endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    # The route pattern, not the raw path, keeps label cardinality bounded.
+    return match.route if match is not None else 'unmatched'
+
+
+class InstrumentationMiddleware:
+    """Records each request's wall time, DB queries and spans. Works for sync and async views."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_trace() as trace:
+            response = self.get_response(request)
+        self.finish(request, response, trace)
+        return response
+
+    async def __acall__(self, request):
+        with request_trace() as trace:
+            response = await self.get_response(request)
+        self.finish(request, response, trace)
+        return response
+
+    def finish(self, request, response, trace):
+        seconds = time.perf_counter() - trace.started
+        endpoint = _endpoint(request)
+        registry.observe_request(endpoint, request.method, response.status_code, trace, seconds)
+        if (seconds * 1000 >= settings.INSTRUMENTATION_SLOW_REQUEST_MS
+                and random.random() < settings.INSTRUMENTATION_SLOW_LOG_SAMPLE_RATE):
+            slow_request_logger.warning('slow request %s', json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'endpoint': endpoint,
+                'status': response.status_code,
+                'total_ms': round(seconds * 1000, 2),
+                'db_queries': trace.db_queries,
+                'db_ms': round(trace.db_seconds * 1000, 2),
+                'spans': {name: {'count': count, 'ms': round(total * 1000, 2)}
+                          for name, (count, total) in trace.spans.items()},
+            }))
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, answered only for INSTRUMENTATION_METRICS_ALLOWED_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.INSTRUMENTATION_METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,148 @@
+import smtplib
+import threading
+import time
+from queue import LifoQueue, Empty
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class SMTPConnectionPool:
+    """A bounded set of open, authenticated SMTP connections shared by all threads.
+
+    Connections are handed out LIFO so the busiest ones stay warm while spare
+    ones idle out on the server side. A connection that has been idle for more
+    than ``healthcheck_after`` seconds is probed with NOOP before use, and one
+    the server has dropped is reopened once mid-batch instead of failing the
+    send. Broken connections are never returned to the pool.
+    """
+
+    def __init__(self, size=4, healthcheck_after=30.0, **backend_kwargs):
+        self.size = size
+        self.healthcheck_after = healthcheck_after
+        self.backend_kwargs = backend_kwargs
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'reused': 0, 'healthchecks': 0, 'reconnects': 0, 'sent': 0}
+
+    def send_messages(self, email_messages):
+        """Send messages over one pooled connection; returns the number sent."""
+        if not email_messages:
+            return 0
+        with self._slots:
+            backend = self._checkout()
+            try:
+                sent = self._send(backend, email_messages)
+            except Exception:
+                backend.close()
+                raise
+            self._idle.put((backend, time.monotonic()))
+        self._count('sent', sent)
+        return sent
+
+    def close(self):
+        while True:
+            try:
+                backend, _ = self._idle.get_nowait()
+            except Empty:
+                return
+            backend.close()
+
+    def _checkout(self):
+        try:
+            backend, last_used = self._idle.get_nowait()
+        except Empty:
+            return self._open()
+        if time.monotonic() - last_used > self.healthcheck_after and not self._is_alive(backend):
+            backend.close()
+            self._count('reconnects')
+            return self._open()
+        self._count('reused')
+        return backend
+
+    def _open(self):
+        backend = SMTPEmailBackend(fail_silently=False, **self.backend_kwargs)
+        backend.open()
+        self._count('opened')
+        return backend
+
+    def _is_alive(self, backend):
+        self._count('healthchecks')
+        try:
+            return backend.connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _send(self, backend, email_messages):
+        # One message per call so a dropped connection only resends what is left.
+        sent = 0
+        reconnected = False
+        for message in email_messages:
+            try:
+                sent += backend.send_messages([message])
+            except smtplib.SMTPServerDisconnected:
+                if reconnected:
+                    raise
+                reconnected = True
+                backend.close()
+                backend.open()
+                self._count('reconnects')
+                sent += backend.send_messages([message])
+        return sent
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    """Return the process-wide pool built from the ``EMAIL_*`` settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SMTPConnectionPool(
+                size=settings.EMAIL_POOL_SIZE,
+                healthcheck_after=settings.EMAIL_POOL_HEALTHCHECK_AFTER,
+                host=settings.EMAIL_HOST,
+                port=settings.EMAIL_PORT,
+                username=settings.EMAIL_HOST_USER,
+                password=settings.EMAIL_HOST_PASSWORD,
+                use_tls=settings.EMAIL_USE_TLS,
+                use_ssl=getattr(settings, 'EMAIL_USE_SSL', False),
+                timeout=getattr(settings, 'EMAIL_TIMEOUT', None),
+            )
+        return _pool
+
+
+@receiver(setting_changed)
+def _reset_smtp_pool(setting, **kwargs):
+    global _pool
+    if setting.startswith('EMAIL_'):
+        with _pool_lock:
+            if _pool is not None:
+                _pool.close()
+            _pool = None
+
+
+class PooledSMTPEmailBackend(BaseEmailBackend):
+    """Email backend that sends through the shared SMTP connection pool.
+
+    Use it with EMAIL_BACKEND=auth_app.mail.PooledSMTPEmailBackend. open() and
+    close() are no-ops: connections belong to the pool, not to the backend.
+    """
+
+    def send_messages(self, email_messages):
+        try:
+            return get_smtp_pool().send_messages(email_messages)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
@@ -0,0 +1,52 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_app.bulk import bulk_register, iter_rows, FORMAT_CSV, FORMAT_JSONL
+
+
+class Command(BaseCommand):
+    help = (
+        'Register users in bulk from a JSON Lines or CSV file (columns: email, mobile, first_name, last_name). '
+        'Uniqueness is checked per chunk and users are inserted with bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin.")
+        parser.add_argument('--format', choices=[FORMAT_JSONL, FORMAT_CSV], default=None,
+                            help='Input format (default: from the file extension, else jsonl).')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Rows validated and inserted per batch.')
+        parser.add_argument('--issue-otps', action='store_true',
+                            help='Issue and deliver an OTP to every user created.')
+        parser.add_argument('--results', default=None,
+                            help='Write one JSON result per row to this file.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (FORMAT_CSV if path.endswith('.csv') else FORMAT_JSONL)
+        try:
+            source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(e)
+        results = open(options['results'], 'w', encoding='utf-8') if options['results'] else None
+
+        stats = {}
+        try:
+            for result in bulk_register(iter_rows(source, fmt), chunk_size=options['chunk_size'],
+                                        issue_otps=options['issue_otps'], stats=stats):
+                if results:
+                    results.write(json.dumps(result) + '\n')
+                elif not result['success']:
+                    self.stderr.write(f"row {result['row']}: {json.dumps(result['errors'])}")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if results:
+                results.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['created']} of {stats['rows']} users created ({stats['failed']} failed, "
+            f"{stats['otps_issued']} OTPs issued) in {stats['seconds']:.1f}s, {stats['rows_per_sec']:.0f} rows/sec"
+        ))
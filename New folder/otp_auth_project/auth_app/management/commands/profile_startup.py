@@ -0,0 +1,153 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under -X importtime: times each start-up phase up to the
+# first response, served straight through the WSGI handler (no server, no test client).
+PROBE = r'''
+import io, json, sys, time
+started = time.perf_counter()
+method, path, body = sys.argv[1], sys.argv[2], sys.argv[3].encode()
+phases = {}
+def mark(name):
+    phases[name] = round((time.perf_counter() - started) * 1000, 3)
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+mark('settings')
+django.setup(set_prefix=False)
+mark('setup')
+from django.core.handlers.wsgi import WSGIHandler
+application = WSGIHandler()
+mark('application')
+host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h not in ('*', '')), 'localhost')
+environ = {
+    'REQUEST_METHOD': method, 'PATH_INFO': path, 'SERVER_NAME': host, 'SERVER_PORT': '80',
+    'HTTP_HOST': host, 'REMOTE_ADDR': '127.0.0.1', 'SERVER_PROTOCOL': 'HTTP/1.1',
+    'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+    'wsgi.input': io.BytesIO(body), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+    'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+statuses = []
+response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b''.join(response)
+mark('first_response')
+print(json.dumps({'phases': phases, 'status': statuses[0]}))
+'''
+
+
+def parse_importtime(stderr):
+    """{module: self time in microseconds} from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        modules[parts[2].strip()] = int(parts[0])
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold start in fresh interpreters: time to settings, django.setup(), the WSGI handler and '
+        'the first response, plus per-module and per-package import time aggregated from -X importtime.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile-settings', action='append', default=None,
+                            help='Settings module to measure; repeat to compare '
+                                 '(e.g. otp_auth_project.settings and otp_auth_project.settings_api). '
+                                 'Default: the current DJANGO_SETTINGS_MODULE.')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Fresh processes per settings module; phases report the median.')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--path', default='/profile/',
+                            help='First request (the default answers 401 without touching the database).')
+        parser.add_argument('--data', default='', help='JSON body for the first request.')
+        parser.add_argument('--top', type=int, default=15, help='Packages and modules to list.')
+        parser.add_argument('--json', help='Write the full results to this file.')
+        parser.add_argument('--history', help='Append a one-line summary per settings module to this JSONL file.')
+
+    def handle(self, *args, **options):
+        modules = options['profile_settings'] or [os.environ['DJANGO_SETTINGS_MODULE']]
+        results = {module: self.profile(module, options) for module in modules}
+        for module, result in results.items():
+            self.report(module, result, options['top'])
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+        if options['history']:
+            recorded_at = datetime.now(dt_timezone.utc).isoformat(timespec='seconds')
+            with open(options['history'], 'a', encoding='utf-8') as f:
+                for module, result in results.items():
+                    f.write(json.dumps({
+                        'recorded_at': recorded_at,
+                        'settings': module,
+                        'path': options['path'],
+                        'process_ms': result['process_ms'],
+                        'phases_ms': result['phases_ms'],
+                        'import_ms': result['import_ms'],
+                        'modules_imported': result['modules_imported'],
+                    }) + '\n')
+
+    def profile(self, module, options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=module)
+        command = [sys.executable, '-X', 'importtime', '-c', PROBE, options['method'].upper(), options['path'],
+                   options['data']]
+        runs = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            proc = subprocess.run(command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+            process_ms = (time.perf_counter() - started) * 1000
+            if proc.returncode != 0:
+                raise CommandError(f'{module}: start-up probe failed:\n{proc.stderr[-2000:]}')
+            probe = json.loads(proc.stdout.strip().splitlines()[-1])
+            runs.append((process_ms, probe, parse_importtime(proc.stderr)))
+
+        phase_names = list(runs[0][1]['phases'])
+        self_us = defaultdict(list)
+        for _, _, imports in runs:
+            for name, own in imports.items():
+                self_us[name].append(own)
+        mean_self = {name: statistics.fmean(values) for name, values in self_us.items()}
+        packages = defaultdict(float)
+        for name, own in mean_self.items():
+            packages[name.split('.')[0]] += own
+        top = options['top']
+        return {
+            'status': runs[0][1]['status'],
+            'runs': len(runs),
+            'process_ms': round(statistics.median(r[0] for r in runs), 2),
+            'phases_ms': {name: round(statistics.median(r[1]['phases'][name] for r in runs), 2) for name in phase_names},
+            'import_ms': round(sum(mean_self.values()) / 1000, 2),
+            'modules_imported': len(mean_self),
+            'packages_ms': {name: round(us / 1000, 2)
+                            for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+            'modules_ms': {name: round(us / 1000, 2)
+                           for name, us in sorted(mean_self.items(), key=lambda item: -item[1])[:top]},
+        }
+
+    def report(self, module, result, top):
+        write = self.stdout.write
+        write(f'{module}  (median of {result["runs"]} runs, first response {result["status"]})')
+        write(f'  process wall time      {result["process_ms"]:9.1f} ms')
+        for name, ms in result['phases_ms'].items():
+            write(f'  {name + " at":<22} {ms:9.1f} ms')
+        write(f'  imports                {result["import_ms"]:9.1f} ms over {result["modules_imported"]} modules')
+        write(f'  top {top} packages (self time):')
+        for name, ms in result['packages_ms'].items():
+            write(f'    {name:<40} {ms:8.1f} ms')
+        write(f'  top {top} modules (self time):')
+        for name, ms in result['modules_ms'].items():
+            write(f'    {name:<40} {ms:8.1f} ms')
+        write('')
@@ -0,0 +1,95 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from auth_app.models import OTP
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete used and expired OTPs in small primary-key batches so no long lock is held. '
+        'Pass --every to keep running as a scheduled purge.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OTP_PURGE_BATCH_SIZE,
+                            help='Rows deleted per DELETE statement.')
+        parser.add_argument('--sleep', type=float, default=settings.OTP_PURGE_SLEEP_SECONDS,
+                            help='Seconds to pause between batches.')
+        parser.add_argument('--retention-minutes', type=int, default=settings.OTP_RETENTION_MINUTES,
+                            help='Keep expired (unused) OTPs for this long after expiry.')
+        parser.add_argument('--time-budget', type=float, default=None,
+                            help='Stop after this many seconds per run, finishing the current batch first.')
+        parser.add_argument('--every', type=float, default=None,
+                            help='Scheduled mode: repeat the purge every N seconds until interrupted.')
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        if options['every'] is not None:
+            # Let the current batch finish before exiting on shutdown.
+            signal.signal(signal.SIGTERM, self._request_stop)
+            signal.signal(signal.SIGINT, self._request_stop)
+
+        while not self._stopping:
+            self.purge(
+                batch_size=options['batch_size'],
+                sleep=options['sleep'],
+                retention=timedelta(minutes=options['retention_minutes']),
+                time_budget=options['time_budget'],
+            )
+            if options['every'] is None:
+                break
+            self._wait(options['every'])
+
+    def purge(self, batch_size, sleep, retention, time_budget=None):
+        started = time.monotonic()
+        deleted = 0
+        batches = 0
+        last_pk = 0
+        reason = 'done'
+
+        while True:
+            if self._stopping:
+                reason = 'interrupted'
+                break
+            if time_budget is not None and time.monotonic() - started >= time_budget:
+                reason = 'time budget reached'
+                break
+
+            pks = list(
+                OTP.objects.purgeable(retention)
+                .filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+
+            count, _ = OTP.objects.filter(pk__in=pks).delete()
+            deleted += count
+            batches += 1
+            last_pk = pks[-1]
+
+            if len(pks) < batch_size:
+                break
+            if sleep:
+                time.sleep(sleep)
+
+        elapsed = time.monotonic() - started
+        rate = deleted / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            f'Purged {deleted} OTPs in {batches} batches over {elapsed:.2f}s '
+            f'({rate:.0f} rows/sec, {reason}).'
+        )
+        return deleted
+
+    def _wait(self, seconds):
+        deadline = time.monotonic() + seconds
+        while not self._stopping and time.monotonic() < deadline:
+            time.sleep(min(1.0, deadline - time.monotonic()))
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['contact', 'contact_type', '-created_at'], name='otp_active_lookup_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0002_otp_active_lookup_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0004_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['created_at', 'id'], name='otp_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['contact'], name='otp_contact_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
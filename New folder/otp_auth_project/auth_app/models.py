@@ -1,17 +1,87 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
+from datetime import timedelta
 
 
 class User(AbstractUser):
     # Allow register with email or mobile
     mobile = models.CharField(max_length=20, blank=True, null=True, unique=True)
     email = models.EmailField(unique=True, blank=True, null=True)
+    # Bumped whenever one of PROFILE_FIELDS changes, so access tokens carrying a
+    # copy of the profile (see auth_app/tokens.py) can be recognised as stale.
+    profile_version = models.PositiveIntegerField(default=0)
+
+    PROFILE_FIELDS = ('username', 'email', 'mobile', 'first_name', 'last_name', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_profile = instance._profile_values()
+        return instance
+
+    def _profile_values(self):
+        # Read __dict__ so deferred fields are skipped rather than loaded.
+        return {f: self.__dict__[f] for f in self.PROFILE_FIELDS if f in self.__dict__}
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_profile', None)
+        if loaded is not None:
+            current = self._profile_values()
+            if any(loaded[f] != current[f] for f in loaded.keys() & current.keys()):
+                self.profile_version += 1
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'profile_version'}
+        super().save(*args, **kwargs)
+        self._loaded_profile = self._profile_values()
 
     def __str__(self):
         return self.email or self.mobile or self.username
 
 
+class OTPQuerySet(models.QuerySet):
+    def consume(self, contact, contact_type, code):
+        """Claim the newest unused OTP matching ``code`` for a contact, exactly once.
+
+        The candidate is read together with its user, then claimed with a
+        conditional ``UPDATE ... WHERE id = ... AND is_used = false``. Of several
+        concurrent verifies only the one whose UPDATE changed the row wins; no
+        lock is held between the two statements, so verifies of other codes are
+        never blocked. A loser moves on to the next matching code, if any.
+        Returns None when no code matches; an expired OTP is returned without
+        being marked used.
+        """
+        candidates = self._consume_candidates(contact, contact_type, code)
+        while True:
+            otp = candidates.first()
+            if otp is None or otp.is_expired():
+                return otp
+            if self.filter(pk=otp.pk, is_used=False).update(is_used=True):
+                otp.is_used = True
+                return otp
+
+    async def aconsume(self, contact, contact_type, code):
+        candidates = self._consume_candidates(contact, contact_type, code)
+        while True:
+            otp = await candidates.afirst()
+            if otp is None or otp.is_expired():
+                return otp
+            if await self.filter(pk=otp.pk, is_used=False).aupdate(is_used=True):
+                otp.is_used = True
+                return otp
+
+    def _consume_candidates(self, contact, contact_type, code):
+        return (
+            self.filter(contact=contact, contact_type=contact_type, code=code, is_used=False)
+            .select_related('user')
+            .order_by('-created_at')
+        )
+
+    def purgeable(self, retention=timedelta(0)):
+        """OTPs that can no longer be verified: used, or expired more than ``retention`` ago."""
+        return self.filter(models.Q(is_used=True) | models.Q(expires_at__lte=timezone.now() - retention))
+
+
 class OTP(models.Model):
     CONTACT_EMAIL = 'email'
     CONTACT_MOBILE = 'mobile'
@@ -28,12 +98,44 @@ class OTP(models.Model):
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
 
+    objects = OTPQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Verify only ever looks at unused codes, newest first.
+            models.Index(
+                fields=['contact', 'contact_type', '-created_at'],
+                condition=models.Q(is_used=False),
+                name='otp_active_lookup_idx',
+            ),
+            # Admin changelist: keyset pages by (created_at, id) and prefix search on contact.
+            models.Index(fields=['created_at', 'id'], name='otp_created_idx'),
+            models.Index(fields=['contact'], name='otp_contact_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
     def is_expired(self):
         return timezone.now() >= self.expires_at
 
     def mark_used(self):
         self.is_used = True
-        self.save()
+        self.save(update_fields=['is_used'])
 
     def __str__(self):
         return f"OTP({self.contact} - {self.code})"
+
+
+class RevokedToken(models.Model):
+    """A refresh or access token revoked before its expiry (logout, refresh rotation).
+
+    Checked through auth_app.revocation.RevocationStore; rows are useless once
+    ``expires_at`` passes and are removed by ``manage.py purge_revoked_tokens``.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    token_type = models.CharField(max_length=16)
+    user = models.ForeignKey('auth_app.User', on_delete=models.CASCADE, related_name='revoked_tokens', null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"RevokedToken({self.token_type} {self.jti})"
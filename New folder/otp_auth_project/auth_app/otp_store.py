@@ -0,0 +1,179 @@
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import User, OTP
+
+
+class OTPStore:
+    """Where an issued OTP lives between /login/ and /verify-otp/.
+
+    ``issue`` saves a new code and returns an object exposing ``code``,
+    ``expires_at``, ``user`` and ``is_expired()``. ``consume`` atomically claims
+    a matching unused code, returning None when nothing matches; an expired
+    code is returned as-is so callers can tell the two cases apart.
+
+    ``aissue``/``aconsume`` are the async counterparts used by the ASGI views;
+    ``aconsume`` returns the OTP with its user already loaded. Subclasses that
+    have no native async path inherit thread-pool wrappers.
+    """
+
+    def issue(self, contact, contact_type, code, expires_at, user=None):
+        raise NotImplementedError
+
+    def consume(self, contact, contact_type, code):
+        raise NotImplementedError
+
+    def issue_many(self, entries):
+        """Issue several OTPs; ``entries`` are (contact, contact_type, code, expires_at, user) tuples."""
+        return [self.issue(contact, contact_type, code, expires_at, user=user)
+                for contact, contact_type, code, expires_at, user in entries]
+
+    async def aissue(self, contact, contact_type, code, expires_at, user=None):
+        return await sync_to_async(self.issue)(contact, contact_type, code, expires_at, user=user)
+
+    async def aconsume(self, contact, contact_type, code):
+        return await sync_to_async(self.consume)(contact, contact_type, code)
+
+
+class DatabaseOTPStore(OTPStore):
+    """One OTP row per issued code (the original behaviour)."""
+
+    def issue(self, contact, contact_type, code, expires_at, user=None):
+        return OTP.objects.create(
+            user=user,
+            contact_type=contact_type,
+            contact=contact,
+            code=code,
+            expires_at=expires_at,
+        )
+
+    def consume(self, contact, contact_type, code):
+        return OTP.objects.consume(contact, contact_type, code)
+
+    def issue_many(self, entries):
+        return OTP.objects.bulk_create([
+            OTP(user=user, contact_type=contact_type, contact=contact, code=code, expires_at=expires_at)
+            for contact, contact_type, code, expires_at, user in entries
+        ])
+
+    async def aissue(self, contact, contact_type, code, expires_at, user=None):
+        return await OTP.objects.acreate(
+            user=user,
+            contact_type=contact_type,
+            contact=contact,
+            code=code,
+            expires_at=expires_at,
+        )
+
+    async def aconsume(self, contact, contact_type, code):
+        return await OTP.objects.aconsume(contact, contact_type, code)
+
+
+class CachedOTP:
+    def __init__(self, store, contact, contact_type, code, expires_at, user_id=None, user=None):
+        self.store = store
+        self.contact = contact
+        self.contact_type = contact_type
+        self.code = code
+        self.expires_at = expires_at
+        self.user_id = user_id
+        self._user = user
+
+    @property
+    def user(self):
+        if self._user is None and self.user_id is not None:
+            self._user = User.objects.get(pk=self.user_id)
+        return self._user
+
+    def is_expired(self):
+        return timezone.now() >= self.expires_at
+
+    def mark_used(self):
+        self.store.cache.delete(self.store.key(self.contact, self.contact_type, self.code))
+
+    def __str__(self):
+        return f"OTP({self.contact} - {self.code})"
+
+
+class CacheOTPStore(OTPStore):
+    """Keeps OTPs in a Django cache (LocMem, Redis, ...) under TTL keys.
+
+    Each code gets its own key, so several outstanding codes per contact behave
+    like the database store. Consuming relies on ``cache.delete`` reporting
+    whether the key existed: of several concurrent verifies, only one wins.
+    Keys outlive ``expires_at`` by ``OTP_CACHE_GRACE_SECONDS`` so a late verify
+    still gets "OTP has expired" rather than "Invalid OTP".
+    """
+
+    def __init__(self, alias=None, grace=None):
+        self.cache = caches[alias or settings.OTP_STORE_CACHE_ALIAS]
+        self.grace = settings.OTP_CACHE_GRACE_SECONDS if grace is None else grace
+
+    def key(self, contact, contact_type, code):
+        return f'otp:{contact_type}:{contact}:{code}'
+
+    def _entry(self, expires_at, user):
+        timeout = (expires_at - timezone.now()).total_seconds() + self.grace
+        return {'expires_at': expires_at.timestamp(), 'user_id': user.pk if user else None}, max(timeout, 1)
+
+    def _claimed(self, contact, contact_type, code, entry):
+        expires_at = datetime.fromtimestamp(entry['expires_at'], tz=dt_timezone.utc)
+        return CachedOTP(self, contact, contact_type, code, expires_at, user_id=entry['user_id'])
+
+    def issue(self, contact, contact_type, code, expires_at, user=None):
+        entry, timeout = self._entry(expires_at, user)
+        self.cache.set(self.key(contact, contact_type, code), entry, timeout=timeout)
+        return CachedOTP(self, contact, contact_type, code, expires_at, user_id=entry['user_id'], user=user)
+
+    def consume(self, contact, contact_type, code):
+        key = self.key(contact, contact_type, code)
+        entry = self.cache.get(key)
+        if entry is None or not self.cache.delete(key):
+            return None
+        return self._claimed(contact, contact_type, code, entry)
+
+    def issue_many(self, entries):
+        # set_many takes one timeout; every OTP issued together shares the longest one.
+        values, timeout, otps = {}, 1, []
+        for contact, contact_type, code, expires_at, user in entries:
+            entry, entry_timeout = self._entry(expires_at, user)
+            values[self.key(contact, contact_type, code)] = entry
+            timeout = max(timeout, entry_timeout)
+            otps.append(CachedOTP(self, contact, contact_type, code, expires_at, user_id=entry['user_id'], user=user))
+        self.cache.set_many(values, timeout=timeout)
+        return otps
+
+    async def aissue(self, contact, contact_type, code, expires_at, user=None):
+        entry, timeout = self._entry(expires_at, user)
+        await self.cache.aset(self.key(contact, contact_type, code), entry, timeout=timeout)
+        return CachedOTP(self, contact, contact_type, code, expires_at, user_id=entry['user_id'], user=user)
+
+    async def aconsume(self, contact, contact_type, code):
+        key = self.key(contact, contact_type, code)
+        entry = await self.cache.aget(key)
+        if entry is None or not await self.cache.adelete(key):
+            return None
+        otp = self._claimed(contact, contact_type, code, entry)
+        if otp.user_id is not None:
+            otp._user = await User.objects.aget(pk=otp.user_id)
+        return otp
+
+
+@lru_cache(maxsize=None)
+def get_otp_store():
+    """Return the store configured by ``settings.OTP_STORE``."""
+    return import_string(settings.OTP_STORE)()
+
+
+@receiver(setting_changed)
+def _reset_otp_store(setting, **kwargs):
+    if setting.startswith('OTP_') or setting == 'CACHES':
+        get_otp_store.cache_clear()
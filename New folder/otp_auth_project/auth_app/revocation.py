@@ -0,0 +1,193 @@
+"""Revoked-token checks that cost no query for the tokens that were never revoked.
+
+RevokedToken rows are the source of truth. Each process keeps Bloom filters
+of the revoked jtis, one per expiry window of JWT_REVOCATION_BUCKET_SECONDS:
+a check only looks at the filter for the token's own ``exp``, and a whole
+filter is dropped once its window has passed, because tokens expiring in it
+are rejected by signature validation anyway. A filter hit, real or false
+positive, is confirmed with one indexed query.
+
+Revocations made in this process take effect at once. Those made by other
+processes are picked up by an incremental reload, at most every
+JWT_REVOCATION_RELOAD_SECONDS, which reads only rows revoked since the last
+reload (with an overlap, since rows may commit out of order).
+
+Both always read the primary ('default'), even inside use_replica(): a
+lagging replica would let a token revoked a moment ago through.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+RELOAD_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationStore:
+    def __init__(self, bucket_seconds=3600, capacity=100000, error_rate=0.001, reload_interval=5.0):
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.reload_interval = reload_interval
+        self._buckets = {}
+        self._reloaded_at = None
+        self._next_reload = 0.0
+        self._lock = threading.Lock()
+        self.stats = {'checks': 0, 'filter_hits': 0, 'false_positives': 0, 'revoked': 0, 'reloads': 0}
+
+    def revoke(self, token):
+        """Record a validated token (access or refresh) as revoked until its exp."""
+        jti = token[api_settings.JTI_CLAIM]
+        try:
+            RevokedToken.objects.create(
+                jti=jti,
+                token_type=token.get(api_settings.TOKEN_TYPE_CLAIM, ''),
+                user_id=token.get(api_settings.USER_ID_CLAIM),
+                expires_at=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+            )
+        except IntegrityError:
+            pass  # already revoked
+        with self._lock:
+            self._add(jti, token['exp'])
+
+    def is_revoked(self, jti, exp):
+        if self._reload_due():
+            self.reload()
+        if not self._might_contain(jti, exp):
+            return False
+        revoked = RevokedToken.objects.using('default').filter(jti=jti).exists()
+        self._count('revoked' if revoked else 'false_positives')
+        return revoked
+
+    async def ais_revoked(self, jti, exp):
+        # Only the reload and the confirming query touch the database.
+        if not self._reload_due() and not self._might_contain(jti, exp):
+            return False
+        return await sync_to_async(self.is_revoked)(jti, exp)
+
+    def reload(self):
+        """Add rows revoked since the last reload (all live rows the first time); drop elapsed windows."""
+        with self._lock:
+            since = self._reloaded_at
+            self._next_reload = time.monotonic() + self.reload_interval
+        started = timezone.now()
+        rows = RevokedToken.objects.using('default').filter(expires_at__gt=started)
+        if since is not None:
+            rows = rows.filter(revoked_at__gte=since - RELOAD_OVERLAP)
+        with self._lock:
+            for jti, expires_at in rows.values_list('jti', 'expires_at').iterator():
+                self._add(jti, expires_at.timestamp())
+            now_index = int(time.time() // self.bucket_seconds)
+            for index in [i for i in self._buckets if i < now_index]:
+                del self._buckets[index]
+            self._reloaded_at = started
+            self.stats['reloads'] += 1
+
+    def _reload_due(self):
+        return time.monotonic() >= self._next_reload
+
+    def _might_contain(self, jti, exp):
+        bucket = self._buckets.get(int(exp // self.bucket_seconds))
+        with self._lock:
+            self.stats['checks'] += 1
+            if bucket is None or jti not in bucket:
+                return False
+            self.stats['filter_hits'] += 1
+        return True
+
+    def _add(self, jti, exp):
+        index = int(exp // self.bucket_seconds)
+        bucket = self._buckets.get(index)
+        if bucket is None or bucket.count >= bucket.capacity:
+            # A full filter's false-positive rate climbs, so rebuild it twice as large.
+            bucket = self._rebuilt(index, bucket)
+        bucket.add(jti)
+
+    def _rebuilt(self, index, old):
+        capacity = self.capacity if old is None else old.capacity * 2
+        bucket = BloomFilter(capacity, self.error_rate)
+        if old is not None:
+            start = datetime.fromtimestamp(index * self.bucket_seconds, tz=dt_timezone.utc)
+            end = start + timedelta(seconds=self.bucket_seconds)
+            for jti in RevokedToken.objects.filter(expires_at__gte=start, expires_at__lt=end).values_list('jti', flat=True):
+                bucket.add(jti)
+        self._buckets[index] = bucket
+        return bucket
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_revocation_store():
+    """Return the process-wide store, configured from the ``JWT_REVOCATION_*`` settings."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RevocationStore(
+                bucket_seconds=settings.JWT_REVOCATION_BUCKET_SECONDS,
+                capacity=settings.JWT_REVOCATION_BLOOM_CAPACITY,
+                error_rate=settings.JWT_REVOCATION_BLOOM_ERROR_RATE,
+                reload_interval=settings.JWT_REVOCATION_RELOAD_SECONDS,
+            )
+        return _store
+
+
+@receiver(setting_changed)
+def _reset_revocation_store(setting, **kwargs):
+    global _store
+    if setting.startswith('JWT_REVOCATION'):
+        with _store_lock:
+            _store = None
+
+
+def is_revoked(token):
+    """True if the validated token was revoked; always False unless JWT_REVOCATION."""
+    if not settings.JWT_REVOCATION:
+        return False
+    return get_revocation_store().is_revoked(token[api_settings.JTI_CLAIM], token['exp'])
+
+
+async def ais_revoked(token):
+    if not settings.JWT_REVOCATION:
+        return False
+    return await get_revocation_store().ais_revoked(token[api_settings.JTI_CLAIM], token['exp'])
@@ -1,9 +1,19 @@
 from rest_framework import serializers
 from .models import User, OTP
 from django.utils import timezone
+from .instrumentation import span
+from .user_cache import lookup_user_id
 
 
-class RegistrationSerializer(serializers.Serializer):
+class TracedSerializer(serializers.Serializer):
+    """Times is_valid() as the 'serializer_validation' span (auth_app/instrumentation.py)."""
+
+    def is_valid(self, *, raise_exception=False):
+        with span('serializer_validation'):
+            return super().is_valid(raise_exception=raise_exception)
+
+
+class RegistrationSerializer(TracedSerializer):
     email = serializers.EmailField(required=False, allow_null=True)
     mobile = serializers.CharField(required=False, allow_null=True)
     first_name = serializers.CharField(required=False, allow_blank=True)
@@ -14,29 +24,46 @@ class RegistrationSerializer(serializers.Serializer):
         mobile = data.get('mobile')
         if not email and not mobile:
             raise serializers.ValidationError('Provide either email or mobile for registration.')
-        if email and User.objects.filter(email=email).exists():
+        self.validate_unique_contact(data)
+        return data
+
+    def validate_unique_contact(self, data):
+        email = data.get('email')
+        mobile = data.get('mobile')
+        if email and lookup_user_id(OTP.CONTACT_EMAIL, email) is not None:
             raise serializers.ValidationError('User with this email already exists.')
-        if mobile and User.objects.filter(mobile=mobile).exists():
+        if mobile and lookup_user_id(OTP.CONTACT_MOBILE, mobile) is not None:
             raise serializers.ValidationError('User with this mobile already exists.')
-        return data
 
-    def create(self, validated_data):
+    @staticmethod
+    def build_user(validated_data):
+        """Return an unsaved User for the registration data (no usable password)."""
         email = validated_data.get('email')
         mobile = validated_data.get('mobile')
-        first_name = validated_data.get('first_name', '')
-        last_name = validated_data.get('last_name', '')
-
-        username = email or mobile
-        user = User.objects.create_user(username=username, email=email or None, password=None)
-        user.first_name = first_name
-        user.last_name = last_name
-        if mobile:
-            user.mobile = mobile
+        user = User(
+            username=User.normalize_username(email or mobile),
+            email=User.objects.normalize_email(email) if email else None,
+            mobile=mobile or None,
+            first_name=validated_data.get('first_name', ''),
+            last_name=validated_data.get('last_name', ''),
+        )
+        user.set_unusable_password()
+        return user
+
+    def create(self, validated_data):
+        user = self.build_user(validated_data)
         user.save()
         return user
 
 
-class LoginSerializer(serializers.Serializer):
+class RegistrationFieldsSerializer(RegistrationSerializer):
+    """Field-level registration checks only; the caller checks uniqueness itself (async or set-based)."""
+
+    def validate_unique_contact(self, data):
+        pass
+
+
+class LoginSerializer(TracedSerializer):
     email = serializers.EmailField(required=False)
     mobile = serializers.CharField(required=False)
 
@@ -46,7 +73,7 @@ class LoginSerializer(serializers.Serializer):
         return data
 
 
-class VerifyOTPSerializer(serializers.Serializer):
+class VerifyOTPSerializer(TracedSerializer):
     email = serializers.EmailField(required=False)
     mobile = serializers.CharField(required=False)
     code = serializers.CharField(max_length=6)
@@ -55,3 +82,7 @@ class VerifyOTPSerializer(serializers.Serializer):
         if not data.get('email') and not data.get('mobile'):
             raise serializers.ValidationError('Provide email or mobile plus code.')
         return data
+
+
+class RefreshTokenSerializer(TracedSerializer):
+    refresh = serializers.CharField()
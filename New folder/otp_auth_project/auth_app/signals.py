@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import User
+from .tokens import remember_profile_version, DELETED_VERSION
+from .user_cache import invalidate_contacts, user_contacts
+
+
+@receiver(post_save, sender=User)
+def publish_profile_version(sender, instance, **kwargs):
+    remember_profile_version(instance.pk, instance.profile_version)
+    # Runs before save() refreshes the loaded snapshot, so old contacts are included.
+    invalidate_contacts(user_contacts(instance))
+
+
+@receiver(post_delete, sender=User)
+def forget_profile_version(sender, instance, **kwargs):
+    remember_profile_version(instance.pk, DELETED_VERSION)
+    invalidate_contacts(user_contacts(instance))
@@ -0,0 +1,86 @@
+"""Hooks for load tests and end-to-end tests. Enabled only with OTP_TEST_HOOK=True.
+
+Never enable these in production: the hook hands out live OTPs to anyone who
+asks. With the hook on:
+
+- every issued OTP is also written to the default cache, and
+  GET /__test__/otp/?email=... (or ?mobile=...) returns the latest code, so a
+  test client can log in without an inbox or a sleep. Point the default cache
+  at something shared (Redis, or a FileBasedCache directory) when the server
+  runs several worker processes;
+- QueryCountMiddleware adds an ``X-DB-Queries`` header with the number of SQL
+  queries the request ran.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.views import View
+
+from .instrumentation import request_trace
+
+HOOK_TTL = 300
+
+
+def _hook_key(contact, contact_type):
+    return f'otp-test-hook:{contact_type}:{contact}'
+
+
+def record_otp(contact, contact_type, code):
+    if settings.OTP_TEST_HOOK:
+        cache.set(_hook_key(contact, contact_type), code, HOOK_TTL)
+
+
+async def arecord_otp(contact, contact_type, code):
+    if settings.OTP_TEST_HOOK:
+        await cache.aset(_hook_key(contact, contact_type), code, HOOK_TTL)
+
+
+def record_otps(entries):
+    """Bulk form of record_otp for (contact, contact_type, code) triples."""
+    if settings.OTP_TEST_HOOK:
+        cache.set_many({_hook_key(contact, contact_type): code for contact, contact_type, code in entries}, HOOK_TTL)
+
+
+class OTPTestHookView(View):
+    def get(self, request):
+        if request.GET.get('email'):
+            key = _hook_key(request.GET['email'], 'email')
+        elif request.GET.get('mobile'):
+            key = _hook_key(request.GET['mobile'], 'mobile')
+        else:
+            return JsonResponse({'detail': 'Pass email or mobile.'}, status=400)
+        code = cache.get(key)
+        if code is None:
+            return JsonResponse({'detail': 'No OTP issued.'}, status=404)
+        return JsonResponse({'code': code})
+
+
+class QueryCountMiddleware:
+    """Adds ``X-DB-Queries`` to every response. Works for sync and async views.
+
+    The count comes from the request trace of auth_app/instrumentation.py, whose query wrapper
+    is installed on every connection while the test hook is on.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_trace() as trace:
+            response = self.get_response(request)
+        response['X-DB-Queries'] = str(trace.db_queries)
+        return response
+
+    async def __acall__(self, request):
+        with request_trace() as trace:
+            response = await self.get_response(request)
+        response['X-DB-Queries'] = str(trace.db_queries)
+        return response
@@ -0,0 +1,60 @@
+import re
+from datetime import timedelta
+from html import unescape
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import OTP, User
+
+CHANGELIST = '/admin/auth_app/otp/'
+OLDER_LINK = re.compile(r'<a href="([^"]+)" class="end">Older</a>')
+
+
+class OTPAdminChangelistQueriesTests(TestCase):
+    """Every OTP changelist page costs the same number of queries, however deep or filtered."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+        users = User.objects.bulk_create([User(username=f'otp{i}', email=f'otp{i}@example.com') for i in range(20)])
+        now = timezone.now()
+        OTP.objects.bulk_create([
+            OTP(user=users[i % len(users)], contact_type=OTP.CONTACT_EMAIL if i % 4 else OTP.CONTACT_MOBILE,
+                contact=users[i % len(users)].email, code=f'{i:06d}', created_at=now - timedelta(seconds=i),
+                expires_at=now, is_used=i % 3 == 0)
+            for i in range(450)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_same_query_count_on_every_page(self):
+        with CaptureQueriesContext(connection) as first_page:
+            html = self.get(CHANGELIST)
+        expected = len(first_page.captured_queries)
+
+        # Follow the "Older" cursor links down to the last page.
+        pages = 0
+        while match := OLDER_LINK.search(html):
+            with self.assertNumQueries(expected):
+                html = self.get(CHANGELIST + unescape(match.group(1)))
+            pages += 1
+        self.assertGreaterEqual(pages, 3)
+
+        with self.assertNumQueries(expected):
+            self.get(CHANGELIST + '?is_used__exact=0&contact_type__exact=email')
+        with self.assertNumQueries(expected):
+            self.get(CHANGELIST + '?q=otp17')
+
+    def test_offset_parameters_redirect_to_first_page(self):
+        self.assertRedirects(self.client.get(CHANGELIST + '?p=3'), CHANGELIST, fetch_redirect_response=False)
+        self.assertRedirects(self.client.get(CHANGELIST + '?all=&is_used__exact=0'),
+                             CHANGELIST + '?is_used__exact=0', fetch_redirect_response=False)
@@ -0,0 +1,223 @@
+"""Sliding-window rate limits for /login/ and /verify-otp/.
+
+Each limit keeps two fixed-window counters (current and previous) per key and
+estimates the count over the last window as
+``previous * (1 - elapsed_fraction) + current``. A check is O(1) in time and
+memory, unlike a log of timestamps. Counters live in process memory
+(``OTP_THROTTLE_BACKEND=memory``) or in the Django cache (``cache``), which
+every worker shares.
+
+The limits are DRF throttle classes, checked in APIView.initial() before the
+handler runs, so a rejected request never touches the database or the mailer.
+Rates come from ``OTP_THROTTLE_RATES``, keyed ``<view scope>_<kind>``.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])')
+
+
+def parse_rate(rate):
+    """'5/m' -> (5, 60); '5/10m' -> (5, 600). None disables the limit."""
+    if rate is None:
+        return None
+    match = RATE_RE.match(rate)
+    if match is None:
+        raise ValueError(f'Invalid throttle rate {rate!r}; expected e.g. "5/m" or "5/10m".')
+    limit, multiplier, unit = match.groups()
+    return int(limit), int(multiplier or 1) * PERIODS[unit]
+
+
+def _estimate(previous, current, elapsed, window):
+    return previous * (1 - elapsed / window) + current
+
+
+def _wait(previous, current, elapsed, window, limit):
+    """Seconds until one more hit would fit under ``limit``."""
+    if current >= limit:
+        # Not before this window ends; the weighted count keeps falling after that.
+        return window - elapsed
+    if previous:
+        # previous * (1 - t / window) + current <= limit - 1
+        needed = window * (1 - (limit - 1 - current) / previous)
+        return max(needed - elapsed, 0.0)
+    return 0.0
+
+
+class MemoryRateLimiter:
+    """Per-process sliding-window counters; least recently used keys are evicted beyond ``maxsize``."""
+
+    blocking = False
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window, now=None):
+        """Count a hit if it fits; returns (allowed, wait_seconds)."""
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, window)
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None:
+                entry = self._counters[key] = [index, 0, 0]
+            elif entry[0] != index:
+                # Roll over: the old current window becomes previous, or is dropped if stale.
+                entry[2] = entry[1] if entry[0] == index - 1 else 0
+                entry[1] = 0
+                entry[0] = index
+            self._counters.move_to_end(key)
+            _, current, previous = entry
+            if _estimate(previous, current, elapsed, window) + 1 > limit:
+                return False, _wait(previous, current, elapsed, window, limit)
+            entry[1] += 1
+            while len(self._counters) > self.maxsize:
+                self._counters.popitem(last=False)
+        return True, 0.0
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class CacheRateLimiter:
+    """Sliding-window counters in a Django cache, shared by all workers.
+
+    Two round trips per check (get_many, then incr). Concurrent hits can each
+    see the same count and overshoot the limit by the number of racers, which
+    is acceptable for abuse throttling.
+    """
+
+    blocking = True
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def hit(self, key, limit, window, now=None):
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, window)
+        current_key = f'throttle:{key}:{int(index)}'
+        previous_key = f'throttle:{key}:{int(index) - 1}'
+        cache = caches[self.alias]
+        counts = cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+        if _estimate(previous, current, elapsed, window) + 1 > limit:
+            return False, _wait(previous, current, elapsed, window, limit)
+        # The key must outlive the next window, where it is read as "previous".
+        if not cache.add(current_key, 1, timeout=int(2 * window) + 1):
+            try:
+                cache.incr(current_key)
+            except ValueError:
+                cache.set(current_key, 1, timeout=int(2 * window) + 1)
+        return True, 0.0
+
+    def clear(self):
+        caches[self.alias].clear()
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter():
+    """Return the limiter selected by ``settings.OTP_THROTTLE_BACKEND``."""
+    if settings.OTP_THROTTLE_BACKEND == 'cache':
+        return CacheRateLimiter(settings.OTP_THROTTLE_CACHE_ALIAS)
+    return MemoryRateLimiter()
+
+
+@receiver(setting_changed)
+def _reset_rate_limiter(setting, **kwargs):
+    if setting.startswith('OTP_THROTTLE') or setting == 'CACHES':
+        get_rate_limiter.cache_clear()
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Base class: limits hits per ``get_ident_key`` for the view's ``throttle_scope``.
+
+    The rate is ``OTP_THROTTLE_RATES['<scope>_<kind>']``; a missing rate, or
+    ``OTP_THROTTLE=False``, disables the throttle.
+    """
+
+    kind = None
+
+    def __init__(self):
+        self._wait = None
+
+    def get_rate(self, view):
+        if not settings.OTP_THROTTLE:
+            return None
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return None
+        return parse_rate(settings.OTP_THROTTLE_RATES.get(f'{scope}_{self.kind}'))
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = self.get_rate(view)
+        if rate is None:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+        limit, window = rate
+        allowed, self._wait = get_rate_limiter().hit(f'{view.throttle_scope}:{self.kind}:{ident}', limit, window)
+        return allowed
+
+    async def aallow_request(self, request, view):
+        if get_rate_limiter().blocking:
+            return await sync_to_async(self.allow_request)(request, view)
+        return self.allow_request(request, view)
+
+    def wait(self):
+        return self._wait
+
+
+class ContactRateThrottle(SlidingWindowThrottle):
+    """Per email/mobile in the request body, so one inbox or phone can't be flooded or brute-forced."""
+
+    kind = 'contact'
+
+    def get_ident_key(self, request, view):
+        data = getattr(request, 'data', None)
+        if not isinstance(data, Mapping):
+            return None  # e.g. a JSON list: left for the serializer to reject
+        if data.get('email'):
+            return f"email:{str(data['email']).strip().lower()}"
+        if data.get('mobile'):
+            return f"mobile:{str(data['mobile']).strip()}"
+        return None
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """Per client address (honours NUM_PROXIES like DRF's own throttles)."""
+
+    kind = 'ip'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class GlobalRateThrottle(SlidingWindowThrottle):
+    """One counter for the whole endpoint: a ceiling on OTP rows and emails/SMS per window."""
+
+    kind = 'global'
+
+    def get_ident_key(self, request, view):
+        return 'all'
+
+
+OTP_THROTTLE_CLASSES = [ContactRateThrottle, IPRateThrottle, GlobalRateThrottle]
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+
+PROFILE_CLAIMS = ('username', 'email', 'mobile', 'first_name', 'last_name')
+PROFILE_VERSION_CLAIM = 'pv'
+
+# Cached profile_version for a user id; DELETED_VERSION marks a removed user.
+DELETED_VERSION = -1
+
+
+def profile_version_key(user_id):
+    return f'profile_version:{user_id}'
+
+
+def issue_tokens(user):
+    """Mint the refresh/access pair returned by /verify-otp/.
+
+    With JWT_PROFILE_CLAIMS the profile fields and the user's profile_version
+    are embedded, so ProfileClaimsJWTAuthentication can serve /profile/ from the
+    token alone.
+    """
+    refresh = RefreshToken.for_user(user)
+    if settings.JWT_PROFILE_CLAIMS:
+        stamp_profile(refresh, user)
+    return refresh
+
+
+def stamp_profile(refresh, user):
+    for claim in PROFILE_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    refresh[PROFILE_VERSION_CLAIM] = user.profile_version
+    remember_profile_version(user.pk, user.profile_version)
+
+
+def refresh_access_token(refresh):
+    """A new access token for a validated refresh token, or None if the user may no longer log in.
+
+    With JWT_PROFILE_CLAIMS and an unchanged profile_version no query is run;
+    otherwise the user is loaded, checked, and (with profile claims) the
+    refresh token is re-stamped so the new access token is not born stale.
+    """
+    user_id = refresh[api_settings.USER_ID_CLAIM]
+    if settings.JWT_PROFILE_CLAIMS and refresh.get(PROFILE_VERSION_CLAIM) == current_profile_version(user_id):
+        return refresh.access_token
+    user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+    if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+        return None
+    if settings.JWT_PROFILE_CLAIMS:
+        stamp_profile(refresh, user)
+    return refresh.access_token
+
+
+def remember_profile_version(user_id, version):
+    cache.set(profile_version_key(user_id), version, settings.PROFILE_VERSION_CACHE_TTL)
+
+
+def current_profile_version(user_id):
+    """The user's profile_version, from cache or (on a miss) a single-column query."""
+    version = cache.get(profile_version_key(user_id))
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list('profile_version', flat=True).first()
+        version = DELETED_VERSION if version is None else version
+        remember_profile_version(user_id, version)
+    return version
+
+
+async def acurrent_profile_version(user_id):
+    version = await cache.aget(profile_version_key(user_id))
+    if version is None:
+        version = await User.objects.filter(pk=user_id).values_list('profile_version', flat=True).afirst()
+        version = DELETED_VERSION if version is None else version
+        await cache.aset(profile_version_key(user_id), version, settings.PROFILE_VERSION_CACHE_TTL)
+    return version
@@ -1,9 +1,35 @@
+from django.conf import settings
 from django.urls import path
-from .views import RegisterAPIView, LoginAPIView, VerifyOTPAPIView, ProfileAPIView
+
+if settings.ASYNC_VIEWS:
+    # Native async views for ASGI servers (uvicorn); same endpoints and payloads.
+    from .async_views import (
+        AsyncRegisterAPIView as RegisterAPIView,
+        AsyncLoginAPIView as LoginAPIView,
+        AsyncVerifyOTPAPIView as VerifyOTPAPIView,
+        AsyncProfileAPIView as ProfileAPIView,
+    )
+else:
+    from .views import RegisterAPIView, LoginAPIView, VerifyOTPAPIView, ProfileAPIView
+# Bulk onboarding is an admin batch job and refresh/logout are rare; the DRF views serve both modes.
+from .views import BulkRegisterAPIView, TokenRefreshAPIView, LogoutAPIView
 
 urlpatterns = [
     path('register/', RegisterAPIView.as_view(), name='register'),
+    path('register/bulk/', BulkRegisterAPIView.as_view(), name='register-bulk'),
     path('login/', LoginAPIView.as_view(), name='login'),
     path('verify-otp/', VerifyOTPAPIView.as_view(), name='verify-otp'),
     path('profile/', ProfileAPIView.as_view(), name='profile'),
+    path('token/refresh/', TokenRefreshAPIView.as_view(), name='token-refresh'),
+    path('logout/', LogoutAPIView.as_view(), name='logout'),
 ]
+
+if settings.INSTRUMENTATION:
+    from .instrumentation import metrics_view
+
+    urlpatterns.append(path('metrics/', metrics_view, name='metrics'))
+
+if settings.OTP_TEST_HOOK:
+    from .testing import OTPTestHookView
+
+    urlpatterns.append(path('__test__/otp/', OTPTestHookView.as_view(), name='otp-test-hook'))
@@ -0,0 +1,172 @@
+"""Read-through cache of contact (email/mobile) -> user id, with negative entries.
+
+/login/ and the registration uniqueness checks look users up by contact on
+every request. The answer is cached for USER_LOOKUP_CACHE_TTL seconds, and a
+"no such user" answer for USER_LOOKUP_NEGATIVE_TTL seconds, so repeated
+logins and unknown-contact probes skip the database.
+
+Entries are versioned per contact: each entry records the contact's version
+at the time it was read, and invalidation bumps the version instead of
+deleting the entry. A lookup that raced with an invalidation therefore writes
+an entry that is already stale and is never served. User post_save and
+post_delete signals invalidate both the old and the new email/mobile; code
+that bypasses signals (bulk_create, queryset.update) must call
+``invalidate_contacts`` itself.
+
+An invalidation only reaches the processes that share the cache, and a stale
+entry could send a changed or removed contact's OTP to the wrong user, so the
+cache must be shared (Redis, ...): check_configuration() refuses a per-process
+LocMem cache at startup.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from .db_router import REPLICA, use_replica
+from .models import User, OTP
+
+NOT_FOUND = 0
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+CONTACT_FIELDS = {OTP.CONTACT_EMAIL: 'email', OTP.CONTACT_MOBILE: 'mobile'}
+
+_counters = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'invalidations': 0}
+_counters_lock = threading.Lock()
+
+
+def _count(key, n=1):
+    with _counters_lock:
+        _counters[key] += n
+
+
+def stats():
+    with _counters_lock:
+        data = dict(_counters)
+    lookups = data['hits'] + data['negative_hits'] + data['misses']
+    data['hit_rate'] = (data['hits'] + data['negative_hits']) / lookups if lookups else 0.0
+    return data
+
+
+def check_configuration():
+    """Raise ImproperlyConfigured if USER_LOOKUP_CACHE is on with a per-process cache backend."""
+    if not settings.USER_LOOKUP_CACHE:
+        return
+    backend = settings.CACHES.get(settings.USER_LOOKUP_CACHE_ALIAS, {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_BACKENDS:
+        raise ImproperlyConfigured(
+            f'USER_LOOKUP_CACHE needs a cache shared by all workers, but the '
+            f'{settings.USER_LOOKUP_CACHE_ALIAS!r} cache is {backend}; other processes would keep '
+            f'stale contact -> user entries. Configure a shared cache (e.g. Redis) or set USER_LOOKUP_CACHE=False.')
+
+
+def _cache():
+    return caches[settings.USER_LOOKUP_CACHE_ALIAS]
+
+
+def _keys(contact_type, contact):
+    return f'user_contact:{contact_type}:{contact}', f'user_contact_version:{contact_type}:{contact}'
+
+
+def _cached(values, entry_key, version_key):
+    """Return the cached user id (NOT_FOUND for a negative entry), or None if absent or stale."""
+    entry = values.get(entry_key)
+    if entry is None:
+        return None
+    version, user_id = entry
+    if version != values.get(version_key, 0):
+        return None
+    return user_id
+
+
+def _query(field, contact):
+    # The replica may lag behind a registration, so a miss there is confirmed on the primary
+    # before it is cached as "not found".
+    with use_replica():
+        user_id = User.objects.filter(**{field: contact}).values_list('pk', flat=True).first()
+    if user_id is None and REPLICA in settings.DATABASES:
+        user_id = User.objects.filter(**{field: contact}).values_list('pk', flat=True).first()
+    return user_id
+
+
+async def _aquery(field, contact):
+    with use_replica():
+        user_id = await User.objects.filter(**{field: contact}).values_list('pk', flat=True).afirst()
+    if user_id is None and REPLICA in settings.DATABASES:
+        user_id = await User.objects.filter(**{field: contact}).values_list('pk', flat=True).afirst()
+    return user_id
+
+
+def _timeout(user_id):
+    return settings.USER_LOOKUP_NEGATIVE_TTL if user_id == NOT_FOUND else settings.USER_LOOKUP_CACHE_TTL
+
+
+def lookup_user_id(contact_type, contact):
+    """The id of the user with this email/mobile, or None."""
+    field = CONTACT_FIELDS[contact_type]
+    if not settings.USER_LOOKUP_CACHE:
+        return _query(field, contact)
+    cache = _cache()
+    entry_key, version_key = _keys(contact_type, contact)
+    values = cache.get_many([entry_key, version_key])
+    user_id = _cached(values, entry_key, version_key)
+    if user_id is not None:
+        _count('hits' if user_id != NOT_FOUND else 'negative_hits')
+        return user_id or None
+    _count('misses')
+    user_id = _query(field, contact) or NOT_FOUND
+    cache.set(entry_key, (values.get(version_key, 0), user_id), _timeout(user_id))
+    return user_id or None
+
+
+async def alookup_user_id(contact_type, contact):
+    field = CONTACT_FIELDS[contact_type]
+    if not settings.USER_LOOKUP_CACHE:
+        return await _aquery(field, contact)
+    cache = _cache()
+    entry_key, version_key = _keys(contact_type, contact)
+    values = await cache.aget_many([entry_key, version_key])
+    user_id = _cached(values, entry_key, version_key)
+    if user_id is not None:
+        _count('hits' if user_id != NOT_FOUND else 'negative_hits')
+        return user_id or None
+    _count('misses')
+    user_id = await _aquery(field, contact) or NOT_FOUND
+    await cache.aset(entry_key, (values.get(version_key, 0), user_id), _timeout(user_id))
+    return user_id or None
+
+
+def invalidate_contacts(pairs):
+    """Invalidate cached lookups for (contact_type, contact) pairs; empty contacts are skipped."""
+    if not settings.USER_LOOKUP_CACHE:
+        return
+    cache = _cache()
+    for contact_type, contact in pairs:
+        if not contact:
+            continue
+        _, version_key = _keys(contact_type, contact)
+        # A version only has to outlive the entries written before it was bumped; once it
+        # expires (back to 0) every such entry has expired too.
+        timeout = max(settings.USER_LOOKUP_CACHE_TTL, settings.USER_LOOKUP_NEGATIVE_TTL) + 60
+        if not cache.add(version_key, 1, timeout=timeout):
+            try:
+                cache.incr(version_key)
+            except ValueError:
+                cache.set(version_key, 1, timeout=timeout)
+        _count('invalidations')
+
+
+def user_contacts(user):
+    """The (contact_type, contact) pairs a user can be looked up by, before and after unsaved changes."""
+    pairs = {(OTP.CONTACT_EMAIL, user.email), (OTP.CONTACT_MOBILE, user.mobile)}
+    loaded = getattr(user, '_loaded_profile', None) or {}
+    pairs.add((OTP.CONTACT_EMAIL, loaded.get('email')))
+    pairs.add((OTP.CONTACT_MOBILE, loaded.get('mobile')))
+    return [(contact_type, contact) for contact_type, contact in pairs if contact]
+
+
+def user_ref(user_id):
+    """An unloaded User standing in for a known id, enough to set a foreign key (e.g. OTP.user)."""
+    user = User(pk=user_id)
+    user._state.adding = False
+    return user
@@ -1,50 +1,152 @@
 import random
+from asgiref.sync import sync_to_async
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import send_mail, get_connection, EmailMessage
 
 from .models import OTP
+from .otp_store import get_otp_store
+from .delivery import get_delivery_queue
+from .testing import record_otp, record_otps, arecord_otp
+from .instrumentation import span
 
 
 def generate_otp_code(length=6):
     return ''.join(random.choices('0123456789', k=length))
 
 
+OTP_EMAIL_SUBJECT = 'Your OTP Code'
+
+
+def otp_email_body(code):
+    return f'Your one-time password (OTP) is: {code}. It will expire in 2 minutes.'
+
+
 def send_otp_email(email, code):
-    subject = 'Your OTP Code'
-    message = f'Your one-time password (OTP) is: {code}. It will expire in 2 minutes.'
+    subject = OTP_EMAIL_SUBJECT
+    message = otp_email_body(code)
     from_email = settings.DEFAULT_FROM_EMAIL
     recipient_list = [email]
     send_mail(subject, message, from_email, recipient_list)
 
 
+def send_otp_emails(pairs):
+    """Send several (email, code) OTPs over a single mail connection.
+
+    Returns one entry per pair: None if that email went out, else the exception
+    it failed with, so a caller can retry only the unsent ones. Raises if the
+    connection cannot be opened (nothing was sent).
+    """
+    errors = []
+    with get_connection() as connection:
+        for email, code in pairs:
+            message = EmailMessage(OTP_EMAIL_SUBJECT, otp_email_body(code), settings.DEFAULT_FROM_EMAIL, [email],
+                                   connection=connection)
+            try:
+                message.send()
+            except Exception as e:
+                errors.append(e)
+            else:
+                errors.append(None)
+    return errors
+
+
 def send_otp_sms(mobile, code):
     # Placeholder for SMS sending. For now, we just log to console.
     # In production integrate with Twilio or other SMS provider.
     print(f"Sending SMS to {mobile}: Your OTP is {code}")
 
 
+@span('deliver_otp')
+def deliver_otp(contact, contact_type, code):
+    # Send via appropriate channel
+    if contact_type == OTP.CONTACT_EMAIL:
+        send_otp_email(contact, code)
+    else:
+        send_otp_sms(contact, code)
+
+
+@span('deliver_otps')
+def deliver_otps(batch):
+    """Batch form of deliver_otp for the delivery queue: a list of (email, contact_type, code).
+
+    Only emails are queued with it (SMS jobs go out one by one). Returns the
+    per-message errors from send_otp_emails.
+    """
+    return send_otp_emails([(contact, code) for contact, contact_type, code in batch])
+
+
+def queue_otp_delivery(contact, contact_type, code):
+    """Hand delivery to the background workers. Returns False if it must be sent inline."""
+    if settings.OTP_DELIVERY != 'async':
+        return False
+    # Only emails share a connection worth batching; an SMS is always its own job.
+    send_batch = deliver_otps if contact_type == OTP.CONTACT_EMAIL else None
+    return get_delivery_queue().submit(
+        deliver_otp, contact, contact_type, code,
+        description=f'{contact_type}:{contact}', send_batch=send_batch,
+    )
+
+
+@span('create_and_send_otp')
 def create_and_send_otp(contact, contact_type='email', user=None):
     code = generate_otp_code(6)
     expires_at = timezone.now() + timedelta(minutes=2)
 
-    otp = OTP.objects.create(
-        user=user,
-        contact_type=contact_type,
-        contact=contact,
-        code=code,
-        expires_at=expires_at,
-    )
+    otp = get_otp_store().issue(contact, contact_type, code, expires_at, user=user)
+    record_otp(contact, contact_type, code)
 
-    # Send via appropriate channel
-    if contact_type == OTP.CONTACT_EMAIL:
+    if queue_otp_delivery(contact, contact_type, code):
+        return otp
+
+    try:
+        deliver_otp(contact, contact_type, code)
+    except Exception as e:
+        # For local dev, you might use console email backend; bubble up otherwise
+        print('Failed to send email:', e)
+
+    return otp
+
+
+@span('create_and_send_otps')
+def create_and_send_otps(targets):
+    """Bulk form of create_and_send_otp for (contact, contact_type, user) triples.
+
+    All OTPs are stored in one go (a single bulk INSERT with the database store);
+    delivery then goes through the queue, which batches emails.
+    """
+    expires_at = timezone.now() + timedelta(minutes=2)
+    entries = [(contact, contact_type, generate_otp_code(6), expires_at, user) for contact, contact_type, user in targets]
+    otps = get_otp_store().issue_many(entries)
+    record_otps([entry[:3] for entry in entries])
+
+    for contact, contact_type, code, _, _ in entries:
+        if queue_otp_delivery(contact, contact_type, code):
+            continue
         try:
-            send_otp_email(contact, code)
+            deliver_otp(contact, contact_type, code)
         except Exception as e:
-            # For local dev, you might use console email backend; bubble up otherwise
             print('Failed to send email:', e)
-    else:
-        send_otp_sms(contact, code)
 
-    return otp
+    return otps
+
+
+async def acreate_and_send_otp(contact, contact_type='email', user=None):
+    with span('create_and_send_otp'):
+        code = generate_otp_code(6)
+        expires_at = timezone.now() + timedelta(minutes=2)
+
+        otp = await get_otp_store().aissue(contact, contact_type, code, expires_at, user=user)
+        await arecord_otp(contact, contact_type, code)
+
+        if queue_otp_delivery(contact, contact_type, code):
+            return otp
+
+        try:
+            # Blocking mail I/O must not run on the event loop.
+            await sync_to_async(deliver_otp, thread_sensitive=False)(contact, contact_type, code)
+        except Exception as e:
+            print('Failed to send email:', e)
+
+        return otp
@@ -1,12 +1,26 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from rest_framework.negotiation import DefaultContentNegotiation
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from .serializers import RegistrationSerializer, LoginSerializer, VerifyOTPSerializer
+from django.http import StreamingHttpResponse
+from .serializers import RegistrationSerializer, LoginSerializer, VerifyOTPSerializer, RefreshTokenSerializer
 from .models import User, OTP
 from .utils import create_and_send_otp
-from rest_framework.permissions import IsAuthenticated
+from .otp_store import get_otp_store
+from .tokens import issue_tokens, refresh_access_token
+from .revocation import get_revocation_store, is_revoked
+from .throttling import OTP_THROTTLE_CLASSES
+from .instrumentation import span
+from .db_router import use_replica
+from .user_cache import lookup_user_id, user_ref
+from .bulk import bulk_register, iter_rows, text_lines, FORMAT_CSV, FORMAT_JSONL
+import json
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
@@ -19,7 +33,48 @@ class RegisterAPIView(APIView):
         return Response({'success': False, 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class UploadFormatNegotiation(DefaultContentNegotiation):
+    """Content negotiation that leaves ?format= alone (DRF would read it as a renderer and 404)."""
+    class settings:
+        URL_FORMAT_OVERRIDE = None
+
+
+class BulkRegisterAPIView(APIView):
+    """Register many users from a JSON Lines or CSV body; streams one JSON result per row.
+
+    The format comes from ?format=csv|jsonl or the Content-Type (text/csv);
+    ?issue_otps=1 also issues and delivers an OTP to each new user. The last
+    line is a summary with rows/sec.
+    """
+    permission_classes = [IsAdminUser]
+    # ?format= names the upload format here.
+    content_negotiation_class = UploadFormatNegotiation
+
+    def post(self, request):
+        fmt = request.query_params.get('format')
+        if fmt is None:
+            fmt = FORMAT_CSV if request.content_type.startswith('text/csv') else FORMAT_JSONL
+        if fmt not in (FORMAT_CSV, FORMAT_JSONL):
+            return Response({'success': False, 'message': 'format must be csv or jsonl.'}, status=status.HTTP_400_BAD_REQUEST)
+        issue_otps = request.query_params.get('issue_otps') in ('1', 'true', 'True')
+        # DRF leaves request.stream as None for an empty body; reject it before streaming a 200.
+        if request.stream is None:
+            return Response({'success': False, 'message': 'Request body is empty.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def stream():
+            stats = {}
+            rows = iter_rows(text_lines(request.stream), fmt)
+            for result in bulk_register(rows, issue_otps=issue_otps, stats=stats):
+                yield json.dumps(result) + '\n'
+            yield json.dumps({'summary': stats}) + '\n'
+
+        return StreamingHttpResponse(stream(), content_type='application/x-ndjson', status=status.HTTP_200_OK)
+
+
 class LoginAPIView(APIView):
+    throttle_classes = OTP_THROTTLE_CLASSES
+    throttle_scope = 'login'
+
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if not serializer.is_valid():
@@ -28,31 +83,32 @@ class LoginAPIView(APIView):
         email = serializer.validated_data.get('email')
         mobile = serializer.validated_data.get('mobile')
 
-        user = None
+        user_id = None
         contact = None
         contact_type = None
 
         if email:
-            try:
-                user = User.objects.get(email=email)
-            except User.DoesNotExist:
+            user_id = lookup_user_id(OTP.CONTACT_EMAIL, email)
+            if user_id is None:
                 return Response({'success': False, 'message': 'User with this email not found.'}, status=status.HTTP_404_NOT_FOUND)
             contact = email
             contact_type = OTP.CONTACT_EMAIL
         else:
-            try:
-                user = User.objects.get(mobile=mobile)
-            except User.DoesNotExist:
+            user_id = lookup_user_id(OTP.CONTACT_MOBILE, mobile)
+            if user_id is None:
                 return Response({'success': False, 'message': 'User with this mobile not found.'}, status=status.HTTP_404_NOT_FOUND)
             contact = mobile
             contact_type = OTP.CONTACT_MOBILE
 
-        otp = create_and_send_otp(contact, contact_type, user=user)
+        otp = create_and_send_otp(contact, contact_type, user=user_ref(user_id))
 
         return Response({'success': True, 'message': 'OTP sent successfully.'}, status=status.HTTP_200_OK)
 
 
 class VerifyOTPAPIView(APIView):
+    throttle_classes = OTP_THROTTLE_CLASSES
+    throttle_scope = 'verify'
+
     def post(self, request):
         serializer = VerifyOTPSerializer(data=request.data)
         if not serializer.is_valid():
@@ -62,30 +118,99 @@ class VerifyOTPAPIView(APIView):
         mobile = serializer.validated_data.get('mobile')
         code = serializer.validated_data.get('code')
 
+        store = get_otp_store()
         if email:
-            otps = OTP.objects.filter(contact=email, contact_type=OTP.CONTACT_EMAIL, code=code, is_used=False)
+            otp = store.consume(email, OTP.CONTACT_EMAIL, code)
         else:
-            otps = OTP.objects.filter(contact=mobile, contact_type=OTP.CONTACT_MOBILE, code=code, is_used=False)
+            otp = store.consume(mobile, OTP.CONTACT_MOBILE, code)
 
-        if not otps.exists():
+        if otp is None:
             return Response({'success': False, 'message': 'Invalid OTP.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        otp = otps.order_by('-created_at').first()
         if otp.is_expired():
             return Response({'success': False, 'message': 'OTP has expired.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # mark used
-        otp.mark_used()
-
         # generate JWT
         user = otp.user
-        refresh = RefreshToken.for_user(user)
-        return Response({'success': True, 'access': str(refresh.access_token), 'refresh': str(refresh)}, status=status.HTTP_200_OK)
+        with span('jwt_mint'):
+            refresh = issue_tokens(user)
+            tokens = {'access': str(refresh.access_token), 'refresh': str(refresh)}
+        return Response({'success': True, **tokens}, status=status.HTTP_200_OK)
+
+
+class TokenRefreshAPIView(APIView):
+    # Only the refresh token in the body counts; an expired bearer token must not block a refresh.
+    authentication_classes = []
+
+    def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'success': False, 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            refresh = RefreshToken(serializer.validated_data['refresh'])
+        except TokenError as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        if is_revoked(refresh):
+            return Response({'success': False, 'message': 'Token has been revoked.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        with span('jwt_mint'):
+            access = refresh_access_token(refresh)
+            if access is None:
+                return Response({'success': False, 'message': 'No active account found for the given token.'},
+                                status=status.HTTP_401_UNAUTHORIZED)
+            tokens = {'access': str(access)}
+            if api_settings.ROTATE_REFRESH_TOKENS:
+                if api_settings.BLACKLIST_AFTER_ROTATION:
+                    get_revocation_store().revoke(refresh)
+                refresh.set_jti()
+                refresh.set_exp()
+                refresh.set_iat()
+                tokens['refresh'] = str(refresh)
+        return Response({'success': True, **tokens}, status=status.HTTP_200_OK)
+
+
+class LogoutAPIView(APIView):
+    """Revoke the refresh token in the body and, if one is sent and still valid, the bearer access token."""
+
+    authentication_classes = []
+
+    def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'success': False, 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            refresh = RefreshToken(serializer.validated_data['refresh'])
+        except TokenError as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        store = get_revocation_store()
+        store.revoke(refresh)
+        access = self.bearer_token(request)
+        if access is not None and access.get(api_settings.USER_ID_CLAIM) == refresh.get(api_settings.USER_ID_CLAIM):
+            store.revoke(access)
+        return Response({'success': True, 'message': 'Logged out.'}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def bearer_token(request):
+        authenticator = JWTAuthentication()
+        header = authenticator.get_header(request)
+        raw_token = authenticator.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        try:
+            return authenticator.get_validated_token(raw_token)
+        except InvalidToken:
+            return None
 
 
 class ProfileAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def perform_authentication(self, request):
+        # The user row (when the token has no profile claims) may come from the read replica.
+        with use_replica():
+            super().perform_authentication(request)
+
     def get(self, request):
         user = request.user
         data = {
@@ -1,12 +1,14 @@
 import os
 from pathlib import Path
 from datetime import timedelta
-from dotenv import load_dotenv
 import dj_database_url
+import django
 
-# Load .env from project root
+# Load .env from project root (only imported when there is one; containers pass env vars directly)
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / '.env')
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
 
 # SECURITY
 SECRET_KEY = os.getenv('SECRET_KEY', 'change-me-in-production')
@@ -38,6 +40,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'otp_auth_project.urls'
+# True in otp_auth_project/settings_api.py: no admin, sessions, messages, static files or home page
+API_ONLY = False
 
 TEMPLATES = [
     {
@@ -56,11 +60,55 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'otp_auth_project.wsgi.application'
+ASGI_APPLICATION = 'otp_auth_project.asgi.application'
+# Serve the API with the native async views in auth_app/async_views.py (use under uvicorn)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
 
 # Database
 # Use DATABASE_URL (Postgres on Render) if provided, otherwise fallback to local sqlite
+# Connections: keep each one open for DB_CONN_MAX_AGE seconds (0 closes it after every
+# request) and check it is still alive before reuse. DB_POOL=True uses Django's psycopg 3
+# connection pool instead (PostgreSQL, Django 5.1+, `pip install "psycopg[binary,pool]"`).
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 60))
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+# Optional read replica for lag-tolerant reads (auth_app/db_router.py)
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL', '')
+
 DATABASES = {
-    'default': dj_database_url.parse(os.getenv('DATABASE_URL', f"sqlite:///{BASE_DIR / 'db.sqlite3'}"))
+    'default': dj_database_url.parse(os.getenv('DATABASE_URL', f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+                                     conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=DB_CONN_HEALTH_CHECKS),
+}
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=DB_CONN_MAX_AGE,
+                                                 conn_health_checks=DB_CONN_HEALTH_CHECKS)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['auth_app.db_router.ReplicaRouter']
+
+for _db in DATABASES.values():
+    if DB_POOL and _db['ENGINE'] == 'django.db.backends.postgresql':
+        # The pool owns connection lifetime; Django refuses persistent connections on top of it.
+        _db['CONN_MAX_AGE'] = 0
+        _db.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+    # SQLite: take the write lock when a transaction starts and wait up to 20s for it, so
+    # concurrent writers queue up instead of failing with "database is locked".
+    if _db['ENGINE'] == 'django.db.backends.sqlite3' and django.VERSION >= (5, 1):
+        _db.setdefault('OPTIONS', {}).update({'transaction_mode': 'IMMEDIATE', 'timeout': 20})
+
+# Cache (LocMem by default; e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/0, which needs the `redis` package)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
 }
 
 # Password validation
@@ -105,16 +153,108 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@example.com')
+# Used by EMAIL_BACKEND=auth_app.mail.PooledSMTPEmailBackend (persistent SMTP connections)
+EMAIL_POOL_SIZE = int(os.getenv('EMAIL_POOL_SIZE', 4))
+EMAIL_POOL_HEALTHCHECK_AFTER = float(os.getenv('EMAIL_POOL_HEALTHCHECK_AFTER', 30))
+
+# Where issued OTPs are kept: auth_app.otp_store.DatabaseOTPStore (OTP rows) or
+# auth_app.otp_store.CacheOTPStore (TTL keys in the OTP_STORE_CACHE_ALIAS cache)
+OTP_STORE = os.getenv('OTP_STORE', 'auth_app.otp_store.DatabaseOTPStore')
+OTP_STORE_CACHE_ALIAS = os.getenv('OTP_STORE_CACHE_ALIAS', 'default')
+OTP_CACHE_GRACE_SECONDS = int(os.getenv('OTP_CACHE_GRACE_SECONDS', 60))
+
+# OTP delivery: 'async' hands email/SMS sending to a pool of background threads
+# (auth_app.delivery) so /login/ returns once the OTP is stored; 'sync' sends inline.
+OTP_DELIVERY = os.getenv('OTP_DELIVERY', 'async')
+OTP_DELIVERY_WORKERS = int(os.getenv('OTP_DELIVERY_WORKERS', 4))
+OTP_DELIVERY_MAX_ATTEMPTS = int(os.getenv('OTP_DELIVERY_MAX_ATTEMPTS', 5))
+OTP_DELIVERY_RETRY_BACKOFF = float(os.getenv('OTP_DELIVERY_RETRY_BACKOFF', 1.0))
+OTP_DELIVERY_QUEUE_SIZE = int(os.getenv('OTP_DELIVERY_QUEUE_SIZE', 10000))
+OTP_DELIVERY_BATCH_SIZE = int(os.getenv('OTP_DELIVERY_BATCH_SIZE', 20))
+
+# Sliding-window limits on /login/ and /verify-otp/ (auth_app/throttling.py), per contact,
+# per client IP and per endpoint. 'memory' counts per process; 'cache' shares counts via CACHES.
+OTP_THROTTLE = os.getenv('OTP_THROTTLE', 'True') == 'True'
+OTP_THROTTLE_BACKEND = os.getenv('OTP_THROTTLE_BACKEND', 'memory')
+OTP_THROTTLE_CACHE_ALIAS = os.getenv('OTP_THROTTLE_CACHE_ALIAS', 'default')
+OTP_THROTTLE_RATES = {
+    'login_contact': os.getenv('OTP_THROTTLE_LOGIN_CONTACT', '3/10m'),
+    'login_ip': os.getenv('OTP_THROTTLE_LOGIN_IP', '30/m'),
+    'login_global': os.getenv('OTP_THROTTLE_LOGIN_GLOBAL', '1000/m'),
+    'verify_contact': os.getenv('OTP_THROTTLE_VERIFY_CONTACT', '5/10m'),
+    'verify_ip': os.getenv('OTP_THROTTLE_VERIFY_IP', '60/m'),
+    'verify_global': os.getenv('OTP_THROTTLE_VERIFY_GLOBAL', '3000/m'),
+}
+
+# Request instrumentation (auth_app/instrumentation.py): per-endpoint timings, DB queries and
+# spans at /metrics/ (Prometheus text, per process), plus a sampled slow-request log.
+INSTRUMENTATION = os.getenv('INSTRUMENTATION', 'True') == 'True'
+INSTRUMENTATION_SLOW_REQUEST_MS = float(os.getenv('INSTRUMENTATION_SLOW_REQUEST_MS', 500))
+INSTRUMENTATION_SLOW_LOG_SAMPLE_RATE = float(os.getenv('INSTRUMENTATION_SLOW_LOG_SAMPLE_RATE', 0.1))
+INSTRUMENTATION_METRICS_ALLOWED_IPS = os.getenv('INSTRUMENTATION_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+if INSTRUMENTATION:
+    MIDDLEWARE.insert(0, 'auth_app.instrumentation.InstrumentationMiddleware')
+
+# Test hook for load/e2e tests (auth_app/testing.py): exposes issued OTPs at /__test__/otp/
+# and adds an X-DB-Queries header. Never enable in production.
+OTP_TEST_HOOK = os.getenv('OTP_TEST_HOOK', 'False') == 'True'
+if OTP_TEST_HOOK:
+    MIDDLEWARE.insert(0, 'auth_app.testing.QueryCountMiddleware')
+
+# OTP retention, used by `manage.py purge_otps`
+OTP_RETENTION_MINUTES = int(os.getenv('OTP_RETENTION_MINUTES', 60))
+OTP_PURGE_BATCH_SIZE = int(os.getenv('OTP_PURGE_BATCH_SIZE', 1000))
+OTP_PURGE_SLEEP_SECONDS = float(os.getenv('OTP_PURGE_SLEEP_SECONDS', 0.1))
+
+# Cache contact -> user id lookups for /login/ and registration checks (auth_app/user_cache.py),
+# including "not found" answers. Invalidations must reach every worker, so this is off unless the
+# cache is shared (e.g. Redis); enabling it on a per-process LocMem cache fails at startup.
+USER_LOOKUP_CACHE_ALIAS = os.getenv('USER_LOOKUP_CACHE_ALIAS', 'default')
+_user_lookup_backend = CACHES.get(USER_LOOKUP_CACHE_ALIAS, {}).get('BACKEND')
+USER_LOOKUP_CACHE = os.getenv(
+    'USER_LOOKUP_CACHE', str(_user_lookup_backend != 'django.core.cache.backends.locmem.LocMemCache')) == 'True'
+USER_LOOKUP_CACHE_TTL = int(os.getenv('USER_LOOKUP_CACHE_TTL', 300))
+USER_LOOKUP_NEGATIVE_TTL = int(os.getenv('USER_LOOKUP_NEGATIVE_TTL', 30))
+
+# Embed the profile in access tokens so /profile/ needs no user query (auth_app/tokens.py).
+# Uses the default cache to track profile versions; share it (e.g. Redis) across workers.
+JWT_PROFILE_CLAIMS = os.getenv('JWT_PROFILE_CLAIMS', 'False') == 'True'
+PROFILE_VERSION_CACHE_TTL = int(os.getenv('PROFILE_VERSION_CACHE_TTL', 300))
+# Keep already-validated access tokens in an in-process LRU (until their exp) to skip re-verification
+JWT_VALIDATION_CACHE = os.getenv('JWT_VALIDATION_CACHE', 'False') == 'True'
+JWT_VALIDATION_CACHE_SIZE = int(os.getenv('JWT_VALIDATION_CACHE_SIZE', 10000))
+
+# Reject tokens revoked by /logout/ (or refresh rotation) via per-process Bloom filters over the
+# RevokedToken table (auth_app/revocation.py); only a filter hit costs a query. Other workers'
+# revocations are picked up within JWT_REVOCATION_RELOAD_SECONDS.
+JWT_REVOCATION = os.getenv('JWT_REVOCATION', 'True') == 'True'
+JWT_REVOCATION_RELOAD_SECONDS = float(os.getenv('JWT_REVOCATION_RELOAD_SECONDS', 5))
+JWT_REVOCATION_BUCKET_SECONDS = int(os.getenv('JWT_REVOCATION_BUCKET_SECONDS', 3600))
+JWT_REVOCATION_BLOOM_CAPACITY = int(os.getenv('JWT_REVOCATION_BLOOM_CAPACITY', 100000))
+JWT_REVOCATION_BLOOM_ERROR_RATE = float(os.getenv('JWT_REVOCATION_BLOOM_ERROR_RATE', 0.001))
+JWT_REVOCATION_PURGE_BATCH_SIZE = int(os.getenv('JWT_REVOCATION_PURGE_BATCH_SIZE', 1000))
+
+JWT_AUTHENTICATION_CLASS = {
+    (False, False): 'auth_app.authentication.RevocableJWTAuthentication',
+    (False, True): 'auth_app.authentication.CachedJWTAuthentication',
+    (True, False): 'auth_app.authentication.ProfileClaimsJWTAuthentication',
+    (True, True): 'auth_app.authentication.CachedProfileClaimsJWTAuthentication',
+}[(JWT_PROFILE_CLAIMS, JWT_VALIDATION_CACHE)]
 
 # Django REST Framework + SimpleJWT
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        JWT_AUTHENTICATION_CLASS,
     ),
 }
 
+# /token/refresh/ hands out a new refresh token and revokes the old one
+JWT_ROTATE_REFRESH_TOKENS = os.getenv('JWT_ROTATE_REFRESH_TOKENS', 'True') == 'True'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'ROTATE_REFRESH_TOKENS': JWT_ROTATE_REFRESH_TOKENS,
+    'BLACKLIST_AFTER_ROTATION': JWT_ROTATE_REFRESH_TOKENS,
 }
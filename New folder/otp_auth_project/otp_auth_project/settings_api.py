@@ -0,0 +1,35 @@
+"""API-only settings for cold-start sensitive deployments (autoscaled containers, serverless).
+
+DJANGO_SETTINGS_MODULE=otp_auth_project.settings_api serves the same API
+endpoints with a smaller app registry: no admin, sessions, messages or static
+files, no CSRF or session-based auth middleware (the API authenticates with
+JWTs), no template engines and JSON-only DRF rendering, so none of that is
+imported at start-up. /admin/ and /home/ are not routed; run the admin from a
+deployment using the full settings.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+API_ONLY = True
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in (
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+)]
+
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+)]
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ('rest_framework.renderers.JSONRenderer',),
+}
@@ -0,0 +1,90 @@
+"""Latency per OTP admin changelist page as the table grows.
+
+Seeds the OTP table in steps (--sizes) and, at each size, times the first
+changelist page, --pages further pages through the "Older" cursor links, a
+filtered page and a contact search. The constant query count per page is
+checked by auth_app.tests (python manage.py test auth_app).
+
+Usage: python tools/bench_admin_otp.py [--sizes 1000,10000,50000] [--pages 20] [--json out.json]
+"""
+import argparse
+import re
+import time
+from datetime import timedelta
+from html import unescape
+
+from bench_utils import setup_django, emit
+
+setup_django()
+
+from django.conf import settings
+from django.test import Client
+from django.utils import timezone
+
+from auth_app.models import OTP, User
+
+OLDER_LINK = re.compile(r'<a href="([^"]+)" class="end">Older</a>')
+
+
+def seed(total, users):
+    existing = OTP.objects.count()
+    now = timezone.now()
+    OTP.objects.bulk_create([
+        OTP(user=users[i % len(users)], contact_type=OTP.CONTACT_EMAIL, contact=users[i % len(users)].email,
+            code=f'{i % 1000000:06d}', created_at=now - timedelta(seconds=i), expires_at=now, is_used=i % 3 == 0)
+        for i in range(existing, total)
+    ], batch_size=2000)
+
+
+def load(client, url):
+    start = time.perf_counter()
+    response = client.get(url)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, (url, response.status_code)
+    return response.content.decode(), elapsed * 1000
+
+
+def walk(client, pages):
+    url = '/admin/auth_app/otp/'
+    timings = []
+    for _ in range(pages + 1):
+        html, ms = load(client, url)
+        timings.append(ms)
+        match = OLDER_LINK.search(html)
+        if match is None:
+            break
+        url = '/admin/auth_app/otp/' + unescape(match.group(1))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,10000,50000', help='OTP table sizes to measure at')
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    settings.ALLOWED_HOSTS = ['testserver']
+    admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+    users = User.objects.bulk_create([User(username=f'otp{i}', email=f'otp{i}@example.com') for i in range(200)])
+    client = Client()
+    client.force_login(admin)
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(',')):
+        seed(size, users)
+        timings = walk(client, args.pages)
+        _, filtered_ms = load(client, '/admin/auth_app/otp/?is_used__exact=0&contact_type__exact=email')
+        _, search_ms = load(client, '/admin/auth_app/otp/?q=otp17')
+        results[f'otps_{size}'] = {
+            'pages_walked': len(timings),
+            'first_page_ms': round(timings[0], 2),
+            'deepest_page_ms': round(timings[-1], 2),
+            'filtered_ms': round(filtered_ms, 2),
+            'search_ms': round(search_ms, 2),
+        }
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Concurrent /login/ throughput: gunicorn (WSGI, sync views) vs. uvicorn (ASGI, async views).
+
+Migrates a scratch database, creates --users users, then starts each server in
+turn and fires --requests /login/ calls with --concurrency of them in flight.
+OTP emails go to a local aiosmtpd server that takes --smtp-delay seconds per
+message, so the mail provider's latency is part of the picture; use
+--delivery async to queue them instead. SQLite serialises writers across
+processes, so pass --database-url for a Postgres run.
+
+Usage: python tools/bench_asgi.py [--concurrency 200] [--requests 2000] [--workers 4] [--json out.json]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+
+from bench_utils import (BASE_DIR, setup_django, start_fake_smtp, summarize, emit, free_port, http_request,
+                         server_command, wait_for_port)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn --threads per worker')
+    parser.add_argument('--delivery', choices=['sync', 'async'], default='sync')
+    parser.add_argument('--smtp-delay', type=float, default=0.05)
+    parser.add_argument('--database-url')
+    parser.add_argument('--servers', default='wsgi,asgi')
+    parser.add_argument('--json', help='write results to this file')
+    return parser.parse_args()
+
+
+async def blast(port, emails, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples, statuses = [], {}
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status, _ = await http_request('127.0.0.1', port, 'POST', '/login/', {'email': emails[i % len(emails)]})
+            except (OSError, asyncio.TimeoutError):
+                status = 'error'
+            samples.append((time.perf_counter() - start) * 1000.0)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    result = summarize(samples)
+    result['requests_per_sec'] = round(total / elapsed, 1)
+    result['statuses'] = {str(k): v for k, v in statuses.items()}
+    return result
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{tempfile.mkstemp(suffix='.sqlite3')[1]}"
+    os.environ['DATABASE_URL'] = database_url
+    setup_django(test_db=False)
+
+    from django.core.management import call_command
+    from auth_app.models import User
+
+    call_command('migrate', verbosity=0)
+    emails = [f'load{i}@example.com' for i in range(args.users)]
+    User.objects.filter(email__in=emails).delete()
+    User.objects.bulk_create([User(username=e, email=e) for e in emails])
+
+    controller, handler = start_fake_smtp(delay=args.smtp_delay)
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        DEBUG='False',
+        EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+        EMAIL_HOST='127.0.0.1',
+        EMAIL_PORT=str(controller.port),
+        EMAIL_USE_TLS='False',
+        OTP_DELIVERY=args.delivery,
+    )
+
+    results = {}
+    try:
+        for kind in args.servers.split(','):
+            port = free_port()
+            server_env = dict(env, ASYNC_VIEWS='True' if kind == 'asgi' else 'False')
+            proc = subprocess.Popen(server_command(kind, port, args.workers, args.threads), cwd=BASE_DIR, env=server_env)
+            try:
+                if not wait_for_port('127.0.0.1', port):
+                    raise SystemExit(f'{kind} server did not start')
+                asyncio.run(blast(port, emails, min(50, args.requests), 10))  # warm-up
+                results[kind] = asyncio.run(blast(port, emails, args.requests, args.concurrency))
+            finally:
+                proc.terminate()
+                proc.wait(10)
+    finally:
+        controller.stop()
+    results['config'] = {k: v for k, v in vars(args).items() if k != 'json'}
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Users registered per second, one at a time vs. the bulk registration path.
+
+The one-at-a-time path is what /register/ does per request
+(RegistrationSerializer: two exists() queries, then an INSERT). The bulk path
+is auth_app.bulk.bulk_register, as used by /register/bulk/ and
+`manage.py bulk_register`, with and without bulk OTP issuance. Every run
+includes a share of duplicate rows so the uniqueness checks do real work.
+
+Usage: python tools/bench_bulk_register.py [--rows 5000] [--chunk-size 1000] [--json out.json]
+"""
+import argparse
+import time
+
+from bench_utils import setup_django, emit
+
+setup_django()
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from auth_app.bulk import bulk_register
+from auth_app.models import User, OTP
+from auth_app.serializers import RegistrationSerializer
+
+
+def make_rows(prefix, count):
+    rows = []
+    for i in range(count):
+        if i % 2:
+            rows.append({'mobile': f'+1{prefix}{i:08d}', 'first_name': 'Bulk'})
+        else:
+            rows.append({'email': f'{prefix}-{i}@example.com', 'first_name': 'Bulk'})
+    # Every 20th row repeats an earlier one.
+    return rows + rows[::20]
+
+
+def one_at_a_time(rows):
+    created = 0
+    for data in rows:
+        serializer = RegistrationSerializer(data=data)
+        if serializer.is_valid():
+            serializer.save()
+            created += 1
+    return created
+
+
+def bulk(rows, chunk_size, issue_otps=False):
+    stats = {}
+    for _ in bulk_register(enumerate(rows, start=1), chunk_size=chunk_size, issue_otps=issue_otps, stats=stats):
+        pass
+    return stats['created']
+
+
+def run(fn, rows, *args):
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        created = fn(rows, *args)
+        elapsed = time.perf_counter() - start
+    return {
+        'rows': len(rows),
+        'created': created,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(len(rows) / elapsed, 1),
+        'queries': len(ctx.captured_queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    results['one-at-a-time'] = run(one_at_a_time, make_rows('1', args.rows))
+    results['bulk'] = run(bulk, make_rows('2', args.rows), args.chunk_size)
+    # Sync delivery to the locmem outbox, so the OTP cost is counted in full.
+    with override_settings(OTP_DELIVERY='sync', EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+        results['bulk+otps'] = run(bulk, make_rows('3', args.rows), args.chunk_size, True)
+    results['bulk+otps']['otps'] = OTP.objects.count()
+    results['users_total'] = User.objects.count()
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
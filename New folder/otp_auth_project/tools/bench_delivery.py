@@ -0,0 +1,75 @@
+"""/login/ latency with inline vs queued OTP delivery against a slow fake SMTP server.
+
+Starts an aiosmtpd server that takes --smtp-delay seconds per message and
+rejects the first --fail-first messages with a temporary error, then times
+/login/ with OTP_DELIVERY=sync and OTP_DELIVERY=async. For the async run it
+waits for the queue to drain and checks every OTP email arrived, reporting
+the delivery queue metrics (depth, retries, dead letters).
+
+Usage: python tools/bench_delivery.py [--logins 50] [--smtp-delay 0.2] [--fail-first 3] [--json out.json]
+"""
+import argparse
+
+from bench_utils import setup_django, start_fake_smtp, smtp_settings, summarize, timed, emit
+
+setup_django()
+
+from django.test import Client, override_settings
+
+from auth_app.delivery import get_delivery_queue
+from auth_app.models import User
+
+
+def run(logins, emails):
+    client = Client()
+    samples = []
+    for i in range(logins):
+        email = emails[i % len(emails)]
+        resp, elapsed = timed(client.post, '/login/', {'email': email}, content_type='application/json')
+        assert resp.status_code == 200, resp.content
+        samples.append(elapsed)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--smtp-delay', type=float, default=0.2)
+    parser.add_argument('--fail-first', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    emails = [f'user{i}@example.com' for i in range(args.users)]
+    for email in emails:
+        User.objects.create_user(username=email, email=email, password=None)
+
+    controller, handler = start_fake_smtp(delay=args.smtp_delay)
+    results = {}
+    try:
+        with override_settings(OTP_DELIVERY='sync', **smtp_settings(controller)):
+            results['sync'] = run(args.logins, emails)
+        results['sync']['delivered'] = len(handler.messages)
+
+        handler.messages.clear()
+        handler.fail_first = args.fail_first
+        queue = get_delivery_queue()
+        queue.workers = args.workers
+        queue.backoff = 0.1
+        with override_settings(OTP_DELIVERY='async', **smtp_settings(controller)):
+            results['async'] = run(args.logins, emails)
+            results['async']['queue_after_requests'] = queue.metrics()
+            drained, drain_ms = timed(queue.join, 60)
+        results['async']['drained'] = drained
+        results['async']['drain_ms'] = round(drain_ms, 1)
+        results['async']['delivered'] = len(handler.messages)
+        results['async']['queue_after_drain'] = queue.metrics()
+        queue.stop()
+    finally:
+        controller.stop()
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Latency of /login/ and /verify-otp/ with each OTP store backend.
+
+Runs the login -> verify pair through the Django test client for the database
+store, the cache store on LocMem, and the cache store on Redis. Without
+--redis-url a local Redis-compatible stand-in (fakeredis' TCP server) is
+started; pass --skip-redis if neither is available.
+
+Usage: python tools/bench_otp_store.py [--iterations 500] [--redis-url redis://127.0.0.1:6379/0] [--json out.json]
+"""
+import argparse
+import re
+import threading
+
+from bench_utils import setup_django, summarize, timed, emit, free_port
+
+setup_django()
+
+from django.core import mail
+from django.test import Client, override_settings
+
+from auth_app.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'otp-bench'}}
+
+
+def redis_caches(url):
+    return {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': url}}
+
+
+def start_fake_redis():
+    from fakeredis import TcpFakeServer
+
+    port = free_port()
+    server = TcpFakeServer(('127.0.0.1', port), server_type='redis')
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'redis://127.0.0.1:{port}/0'
+
+
+def run(iterations, email):
+    client = Client()
+    login_ms, verify_ms = [], []
+    for _ in range(iterations):
+        mail.outbox.clear()
+        resp, elapsed = timed(client.post, '/login/', {'email': email}, content_type='application/json')
+        assert resp.status_code == 200, resp.content
+        login_ms.append(elapsed)
+
+        code = re.search(r'\d{6}', mail.outbox[-1].body).group()
+        resp, elapsed = timed(client.post, '/verify-otp/', {'email': email, 'code': code}, content_type='application/json')
+        assert resp.status_code == 200, resp.content
+        verify_ms.append(elapsed)
+    return {'login': summarize(login_ms), 'verify-otp': summarize(verify_ms)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--redis-url', help='use this Redis instead of the in-process stand-in')
+    parser.add_argument('--skip-redis', action='store_true')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    email = 'bench@example.com'
+    User.objects.create_user(username=email, email=email, password=None)
+
+    backends = [
+        ('database', {'OTP_STORE': 'auth_app.otp_store.DatabaseOTPStore'}),
+        ('cache-locmem', {'OTP_STORE': 'auth_app.otp_store.CacheOTPStore', 'CACHES': LOCMEM_CACHES}),
+    ]
+    server = None
+    if not args.skip_redis:
+        url = args.redis_url
+        if url is None:
+            server, url = start_fake_redis()
+        backends.append(('cache-redis', {'OTP_STORE': 'auth_app.otp_store.CacheOTPStore', 'CACHES': redis_caches(url)}))
+
+    results = {}
+    for name, overrides in backends:
+        with override_settings(**overrides):
+            run(min(20, args.iterations), email)  # warm-up
+            results[name] = run(args.iterations, email)
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
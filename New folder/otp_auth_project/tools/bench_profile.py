@@ -0,0 +1,67 @@
+"""/profile/ requests/sec and queries with database-backed vs. token-claims authentication.
+
+Mints one token with profile claims (JWT_PROFILE_CLAIMS) and calls
+ProfileAPIView with SimpleJWT's JWTAuthentication (loads the User row) and
+with ProfileClaimsJWTAuthentication (profile from the token, version from the
+cache). Also checks that a profile change makes the old token stale.
+
+Usage: python tools/bench_profile.py [--requests 5000] [--json out.json]
+"""
+import argparse
+import time
+
+from bench_utils import setup_django, emit
+
+setup_django()
+
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from auth_app.authentication import ProfileClaimsJWTAuthentication
+from auth_app.models import User
+from auth_app.tokens import issue_tokens
+from auth_app.views import ProfileAPIView
+
+
+def run(view, request_factory, token, total):
+    request = request_factory.get('/profile/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    with CaptureQueriesContext(connection) as ctx:
+        assert view(request).status_code == 200
+    start = time.perf_counter()
+    for _ in range(total):
+        view(request)
+    elapsed = time.perf_counter() - start
+    return {
+        'requests_per_sec': round(total / elapsed, 1),
+        'mean_ms': round(elapsed / total * 1000, 4),
+        'queries_per_request': len(ctx.captured_queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    factory = RequestFactory()
+    user = User.objects.create_user(username='bench@example.com', email='bench@example.com', first_name='Bench')
+    with override_settings(JWT_PROFILE_CLAIMS=True):
+        token = str(issue_tokens(user).access_token)
+        results = {
+            'database': run(ProfileAPIView.as_view(authentication_classes=[JWTAuthentication]), factory, token, args.requests),
+            'token_claims': run(ProfileAPIView.as_view(authentication_classes=[ProfileClaimsJWTAuthentication]), factory, token, args.requests),
+        }
+
+        user.first_name = 'Renamed'
+        user.save()
+        claims_view = ProfileAPIView.as_view(authentication_classes=[ProfileClaimsJWTAuthentication])
+        stale = claims_view(factory.get('/profile/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+        results['after_profile_change'] = {'status': stale.status_code, 'code': stale.data.get('code')}
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
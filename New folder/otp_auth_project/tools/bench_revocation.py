@@ -0,0 +1,112 @@
+"""Cost of revoked-token checks: Bloom-filter store vs. one denylist query per check.
+
+Fills the RevokedToken table with --revoked rows, then checks --checks jtis
+(mostly never revoked, as in real traffic) with the RevocationStore and with
+a plain ``RevokedToken.objects.filter(jti=...).exists()``. Reports checks/sec,
+queries per check, the observed false-positive rate, full and incremental
+reload times, and /profile/ requests/sec with and without the check.
+
+Usage: python tools/bench_revocation.py [--revoked 50000] [--checks 20000] [--requests 5000] [--json out.json]
+"""
+import argparse
+import time
+import uuid
+from datetime import timedelta
+
+from bench_utils import setup_django, emit
+
+setup_django()
+
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from auth_app.authentication import RevocableJWTAuthentication
+from auth_app.models import RevokedToken, User
+from auth_app.revocation import RevocationStore
+from auth_app.tokens import issue_tokens
+from auth_app.views import ProfileAPIView
+
+
+def run_checks(check, tokens):
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        revoked = sum(1 for jti, exp in tokens if check(jti, exp))
+        elapsed = time.perf_counter() - start
+    return {
+        'checks_per_sec': round(len(tokens) / elapsed, 1),
+        'mean_us': round(elapsed / len(tokens) * 1e6, 2),
+        'queries_per_check': round(len(ctx.captured_queries) / len(tokens), 4),
+        'revoked': revoked,
+    }
+
+
+def run_profile(view, request_factory, token, total):
+    request = request_factory.get('/profile/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    assert view(request).status_code == 200
+    start = time.perf_counter()
+    for _ in range(total):
+        view(request)
+    elapsed = time.perf_counter() - start
+    return {'requests_per_sec': round(total / elapsed, 1), 'mean_ms': round(elapsed / total * 1000, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--revoked', type=int, default=50000)
+    parser.add_argument('--checks', type=int, default=20000)
+    parser.add_argument('--revoked-share', type=float, default=0.01,
+                        help='Fraction of checked tokens that are revoked.')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    now = timezone.now()
+    rows = [RevokedToken(jti=uuid.uuid4().hex, token_type='access', expires_at=now + timedelta(minutes=1 + i % 1440))
+            for i in range(args.revoked)]
+    RevokedToken.objects.bulk_create(rows, batch_size=1000)
+    # Pretend the table was filled an hour ago, so the second reload below is a true incremental one.
+    RevokedToken.objects.update(revoked_at=now - timedelta(hours=1))
+    revoked = [(row.jti, row.expires_at.timestamp()) for row in rows]
+
+    every = max(1, round(1 / args.revoked_share)) if args.revoked_share > 0 else 0
+    exp = (now + timedelta(minutes=30)).timestamp()
+    tokens = [revoked[i % len(revoked)] if every and i % every == 0 else (uuid.uuid4().hex, exp)
+              for i in range(args.checks)]
+
+    store = RevocationStore(reload_interval=3600)
+    start = time.perf_counter()
+    store.reload()
+    full_reload = time.perf_counter() - start
+    RevokedToken.objects.create(jti=uuid.uuid4().hex, token_type='refresh', expires_at=now + timedelta(days=1))
+    start = time.perf_counter()
+    store.reload()
+    incremental_reload = time.perf_counter() - start
+
+    results = {
+        'bloom_store': run_checks(store.is_revoked, tokens),
+        'db_per_check': run_checks(lambda jti, exp: RevokedToken.objects.filter(jti=jti).exists(), tokens),
+        'full_reload_ms': round(full_reload * 1000, 2),
+        'incremental_reload_ms': round(incremental_reload * 1000, 2),
+    }
+    checked_clean = args.checks - results['bloom_store']['revoked']
+    results['false_positive_rate'] = round(store.stats['false_positives'] / checked_clean, 5) if checked_clean else 0.0
+    results['store_stats'] = dict(store.stats)
+
+    factory = RequestFactory()
+    user = User.objects.create_user(username='bench@example.com', email='bench@example.com')
+    token = str(issue_tokens(user).access_token)
+    with override_settings(JWT_REVOCATION=True, JWT_REVOCATION_RELOAD_SECONDS=3600):
+        results['profile'] = {
+            'revocation_check': run_profile(ProfileAPIView.as_view(authentication_classes=[RevocableJWTAuthentication]),
+                                            factory, token, args.requests),
+            'no_check': run_profile(ProfileAPIView.as_view(authentication_classes=[JWTAuthentication]),
+                                    factory, token, args.requests),
+        }
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""OTP email throughput: a new SMTP connection per message vs. the connection pool.
+
+Starts an aiosmtpd server that charges --handshake seconds per connection
+(standing in for STARTTLS + AUTH) and sends --messages OTP emails three ways:
+stock send_mail (one connection each), PooledSMTPEmailBackend one message per
+call from --threads threads, and the pool with --batch-size messages per
+send_messages call. Finally the server is restarted to check that pooled
+connections it dropped are detected and reopened.
+
+Usage: python tools/bench_smtp_pool.py [--messages 200] [--handshake 0.05] [--json out.json]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import setup_django, start_fake_smtp, smtp_settings, emit
+
+setup_django()
+
+from aiosmtpd.controller import Controller
+from django.test import override_settings
+
+from auth_app.mail import get_smtp_pool
+from auth_app.utils import send_otp_email, send_otp_emails
+
+
+def measure(handler, fn, jobs, threads):
+    handler.messages.clear()
+    connections_before = handler.connections
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(fn, jobs))
+    elapsed = time.perf_counter() - start
+    return {
+        'messages': len(handler.messages),
+        'seconds': round(elapsed, 3),
+        'messages_per_sec': round(len(handler.messages) / elapsed, 1),
+        'connections_opened': handler.connections - connections_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--handshake', type=float, default=0.05)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    controller, handler = start_fake_smtp(connect_delay=args.handshake)
+    pairs = [(f'user{i}@example.com', f'{i:06d}') for i in range(args.messages)]
+    batches = [pairs[i:i + args.batch_size] for i in range(0, len(pairs), args.batch_size)]
+    results = {}
+    try:
+        with override_settings(**smtp_settings(controller)):
+            results['connection_per_message'] = measure(handler, lambda p: send_otp_email(*p), pairs, args.threads)
+
+        pooled = dict(smtp_settings(controller), EMAIL_BACKEND='auth_app.mail.PooledSMTPEmailBackend',
+                      EMAIL_POOL_SIZE=args.threads)
+        with override_settings(**pooled):
+            results['pooled'] = measure(handler, lambda p: send_otp_email(*p), pairs, args.threads)
+            results['pooled_batched'] = measure(handler, send_otp_emails, batches, args.threads)
+            results['pool_stats'] = dict(get_smtp_pool().stats)
+
+            # Drop every pooled connection server-side, then send again.
+            port = controller.port
+            controller.stop()
+            controller = Controller(handler, hostname='127.0.0.1', port=port)
+            controller.start()
+            handler.messages.clear()
+            send_otp_email('after-restart@example.com', '123456')
+            stats = get_smtp_pool().stats
+            results['after_server_restart'] = {
+                'delivered': len(handler.messages),
+                'reconnects': stats['reconnects'] - results['pool_stats']['reconnects'],
+            }
+    finally:
+        controller.stop()
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
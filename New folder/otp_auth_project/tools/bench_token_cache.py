@@ -0,0 +1,51 @@
+"""Cost of JWT validation per request with and without the validated-token cache.
+
+Authenticates --requests requests spread over --tokens distinct access tokens
+with SimpleJWT's JWTAuthentication and with CachedJWTAuthentication, timing
+only token validation (no user lookup), and reports the cache's hit rate.
+
+Usage: python tools/bench_token_cache.py [--requests 20000] [--tokens 100] [--json out.json]
+"""
+import argparse
+import time
+
+from bench_utils import setup_django, emit
+
+setup_django()
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from auth_app.authentication import CachedJWTAuthentication, get_token_cache
+from auth_app.models import User
+from auth_app.tokens import issue_tokens
+
+
+def run(authenticator, raw_tokens, total):
+    start = time.perf_counter()
+    for i in range(total):
+        authenticator.get_validated_token(raw_tokens[i % len(raw_tokens)])
+    elapsed = time.perf_counter() - start
+    return {'validations_per_sec': round(total / elapsed, 1), 'mean_us': round(elapsed / total * 1e6, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--tokens', type=int, default=100)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    user = User.objects.create_user(username='bench@example.com', email='bench@example.com')
+    raw_tokens = [str(issue_tokens(user).access_token).encode() for _ in range(args.tokens)]
+
+    get_token_cache().clear()
+    results = {
+        'uncached': run(JWTAuthentication(), raw_tokens, args.requests),
+        'cached': run(CachedJWTAuthentication(), raw_tokens, args.requests),
+    }
+    results['cache_stats'] = get_token_cache().stats()
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
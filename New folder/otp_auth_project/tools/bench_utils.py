@@ -0,0 +1,204 @@
+"""Shared helpers for the benchmark scripts in tools/.
+
+Benchmarks run against a throwaway test database (the same one `manage.py test`
+would create) so they never touch db.sqlite3 or a real DATABASE_URL.
+"""
+import json
+import os
+import socket
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+
+def setup_django(test_db=True, settings_module='otp_auth_project.settings'):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    # Benchmarks hammer one contact from one address; bench_throttle.py enables it explicitly.
+    os.environ.setdefault('OTP_THROTTLE', 'False')
+    import django
+    django.setup()
+    if test_db:
+        from django.db import connection
+        from django.test.utils import setup_test_environment
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples_ms):
+    """Return count/mean/p50/p95/p99 (milliseconds) for a list of samples."""
+    count = len(samples_ms)
+    return {
+        'count': count,
+        'mean_ms': round(sum(samples_ms) / count, 3) if count else 0.0,
+        'p50_ms': round(percentile(samples_ms, 50), 3),
+        'p95_ms': round(percentile(samples_ms, 95), 3),
+        'p99_ms': round(percentile(samples_ms, 99), 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    """Call fn and return (result, elapsed milliseconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class FakeSMTPHandler:
+    """aiosmtpd handler that records messages and can mimic a slow or flaky provider.
+
+    ``connect_delay`` is paid once per connection (at EHLO, standing in for the
+    TLS/auth handshake), ``delay`` once per message, and the first
+    ``fail_first`` messages are answered with a temporary 451 error.
+    """
+
+    def __init__(self, delay=0.0, connect_delay=0.0, fail_first=0):
+        self.delay = delay
+        self.connect_delay = connect_delay
+        self.fail_first = fail_first
+        self.messages = []
+        self.connections = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        import asyncio
+        self.connections += 1
+        if self.connect_delay:
+            await asyncio.sleep(self.connect_delay)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        import asyncio
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            return '451 Temporary failure, try again'
+        self.messages.append(envelope)
+        return '250 Message accepted'
+
+
+def start_fake_smtp(**handler_options):
+    """Start an aiosmtpd server on a free local port; returns (controller, handler).
+
+    Call ``controller.stop()`` when done. Requires ``pip install aiosmtpd``.
+    """
+    from aiosmtpd.controller import Controller
+
+    handler = FakeSMTPHandler(**handler_options)
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    return controller, handler
+
+
+def smtp_settings(controller):
+    """Settings overrides pointing Django's SMTP backend at a fake server."""
+    return {
+        'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+        'EMAIL_HOST': controller.hostname,
+        'EMAIL_PORT': controller.port,
+        'EMAIL_HOST_USER': '',
+        'EMAIL_HOST_PASSWORD': '',
+        'EMAIL_USE_TLS': False,
+    }
+
+
+async def http_request(host, port, method, path, body=None, headers=None, timeout=30.0, with_headers=False):
+    """Minimal asyncio HTTP/1.1 client (one connection per request); returns (status, body).
+
+    Enough to hold hundreds of requests in flight without extra dependencies.
+    With ``with_headers`` it returns (status, body, headers) with lower-cased header names.
+    """
+    import asyncio
+
+    payload = json.dumps(body).encode() if body is not None else b''
+    lines = [f'{method} {path} HTTP/1.1', f'Host: {host}:{port}', 'Connection: close',
+             f'Content-Length: {len(payload)}']
+    if body is not None:
+        lines.append('Content-Type: application/json')
+    for name, value in (headers or {}).items():
+        lines.append(f'{name}: {value}')
+    request = ('\r\n'.join(lines) + '\r\n\r\n').encode() + payload
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(request)
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+
+    raw = await asyncio.wait_for(exchange(), timeout)
+    head, _, content = raw.partition(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1]) if head else 0
+    if b'transfer-encoding: chunked' in head.lower():
+        content = _dechunk(content)
+    if with_headers:
+        response_headers = {}
+        for line in head.decode('latin-1').split('\r\n')[1:]:
+            name, _, value = line.partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        return status, content, response_headers
+    return status, content
+
+
+def _dechunk(data):
+    out = b''
+    while data:
+        size_line, _, data = data.partition(b'\r\n')
+        size = int(size_line.split(b';')[0] or b'0', 16)
+        if size == 0:
+            break
+        out += data[:size]
+        data = data[size + 2:]
+    return out
+
+
+def server_command(kind, port, workers=1, threads=1):
+    """Command line for a local server: 'runserver', 'wsgi' (gunicorn) or 'asgi' (uvicorn; set ASYNC_VIEWS=True)."""
+    if kind == 'runserver':
+        return [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload']
+    if kind == 'wsgi':
+        return [sys.executable, '-m', 'gunicorn', 'otp_auth_project.wsgi:application',
+                '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--threads', str(threads),
+                '--log-level', 'warning']
+    return [sys.executable, '-m', 'uvicorn', 'otp_auth_project.asgi:application',
+            '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--log-level', 'warning']
+
+
+def wait_for_port(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def emit(results, path=None):
+    """Print results as JSON and optionally write them to path."""
+    text = json.dumps(results, indent=2, sort_keys=True, default=str)
+    print(text)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
@@ -0,0 +1,75 @@
+"""Queries per /verify-otp/ before and after the single-lookup consume path.
+
+Usage: python tools/bench_verify_queries.py [--iterations 200] [--json out.json]
+"""
+import argparse
+
+from bench_utils import setup_django, summarize, timed, emit
+
+setup_django()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from auth_app.models import User, OTP
+from auth_app.utils import create_and_send_otp
+
+
+def legacy_verify(contact, contact_type, code):
+    # The verify path as it was: exists(), first(), full save(), lazy user load.
+    otps = OTP.objects.filter(contact=contact, contact_type=contact_type, code=code, is_used=False)
+    if not otps.exists():
+        return None
+    otp = otps.order_by('-created_at').first()
+    if otp.is_expired():
+        return None
+    otp.is_used = True
+    otp.save()
+    return RefreshToken.for_user(otp.user)
+
+
+def current_verify(contact, contact_type, code):
+    otp = OTP.objects.consume(contact, contact_type, code)
+    if otp is None or otp.is_expired():
+        return None
+    return RefreshToken.for_user(otp.user)
+
+
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+
+def run(label, verify, user, iterations):
+    queries = []
+    statements = []
+    timings = []
+    for _ in range(iterations):
+        otp = create_and_send_otp(user.email, OTP.CONTACT_EMAIL, user=user)
+        with CaptureQueriesContext(connection) as ctx:
+            token, elapsed = timed(verify, user.email, OTP.CONTACT_EMAIL, otp.code)
+        assert token is not None, f'{label}: verify failed'
+        queries.append(len(ctx.captured_queries))
+        statements.append(sum(1 for q in ctx.captured_queries if not q['sql'].startswith(TRANSACTION_CONTROL)))
+        timings.append(elapsed)
+    result = summarize(timings)
+    result['queries_per_request'] = sum(queries) / len(queries)
+    # Same count without BEGIN/COMMIT, i.e. actual reads and writes.
+    result['data_statements_per_request'] = sum(statements) / len(statements)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    user = User.objects.create_user(username='bench@example.com', email='bench@example.com', password=None)
+    emit({
+        'before': run('before', legacy_verify, user, args.iterations),
+        'after': run('after', current_verify, user, args.iterations),
+    }, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Concurrent load test of the full OTP flow: register -> login -> verify-otp -> profile.
+
+Each virtual user runs the flow in a loop with a fresh email until --duration
+is up; users start evenly over --ramp-up seconds. OTPs are read from the
+server's test hook (OTP_TEST_HOOK=True, see auth_app/testing.py) rather than
+an inbox, and the hook's X-DB-Queries header gives the queries per request.
+
+By default a local server is started on a scratch SQLite database with the
+locmem email backend and a FileBasedCache shared by its workers. SQLite
+serialises writers, so use --database-url for Postgres when running several
+workers. Pass --target host:port to test a server you started yourself (it
+must run with OTP_TEST_HOOK=True).
+
+Usage: python tools/loadtest.py [--users 50] [--ramp-up 5] [--duration 30] [--server runserver|wsgi|asgi]
+                                [--workers 2] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+import time
+import uuid
+from urllib.parse import quote
+
+from bench_utils import BASE_DIR, setup_django, summarize, emit, free_port, http_request, server_command, wait_for_port
+
+ENDPOINTS = ('register', 'login', 'verify-otp', 'profile')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50, help='concurrent virtual users')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='seconds over which users start')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to run after the first user starts')
+    parser.add_argument('--think-time', type=float, default=0.0, help='pause between steps of a flow')
+    parser.add_argument('--target', help='host:port of a running server instead of starting one')
+    parser.add_argument('--server', choices=['runserver', 'wsgi', 'asgi'], default='runserver')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn --threads per worker')
+    parser.add_argument('--delivery', choices=['sync', 'async'], default='async')
+    parser.add_argument('--database-url')
+    parser.add_argument('--json', help='write results to this file')
+    return parser.parse_args()
+
+
+class Recorder:
+    def __init__(self):
+        self.latency = {name: [] for name in ENDPOINTS + ('otp-hook',)}
+        self.queries = {name: [] for name in ENDPOINTS}
+        self.statuses = {name: {} for name in ENDPOINTS + ('otp-hook',)}
+        self.flows_completed = 0
+        self.flows_failed = 0
+        self.errors = {}
+
+    def report(self, elapsed):
+        endpoints = {}
+        requests = 0
+        for name in ENDPOINTS + ('otp-hook',):
+            summary = summarize(self.latency[name])
+            summary['statuses'] = self.statuses[name]
+            queries = self.queries.get(name)
+            if queries:
+                summary['queries_mean'] = round(sum(queries) / len(queries), 2)
+                summary['queries_max'] = max(queries)
+            endpoints[name] = summary
+            if name != 'otp-hook':
+                requests += summary['count']
+        return {
+            'endpoints': endpoints,
+            'flows_completed': self.flows_completed,
+            'flows_failed': self.flows_failed,
+            'errors': self.errors,
+            'elapsed_s': round(elapsed, 2),
+            'requests_per_sec': round(requests / elapsed, 1) if elapsed else 0.0,
+            'flows_per_sec': round(self.flows_completed / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+class FlowError(Exception):
+    pass
+
+
+async def call(recorder, host, port, name, method, path, body=None, headers=None, expect=200):
+    start = time.perf_counter()
+    try:
+        status, content, response_headers = await http_request(host, port, method, path, body, headers, with_headers=True)
+    except (OSError, asyncio.TimeoutError) as e:
+        status, content, response_headers = 'error', b'', {}
+        error = e
+    else:
+        error = None
+    recorder.latency[name].append((time.perf_counter() - start) * 1000.0)
+    recorder.statuses[name][str(status)] = recorder.statuses[name].get(str(status), 0) + 1
+    if 'x-db-queries' in response_headers and name in recorder.queries:
+        recorder.queries[name].append(int(response_headers['x-db-queries']))
+    if status != expect:
+        raise FlowError(f'{name}: {status} {error or content[:200]!r}')
+    return json.loads(content) if content else {}
+
+
+async def virtual_user(number, recorder, host, port, start_at, deadline, think_time, run_id):
+    await asyncio.sleep(max(start_at - time.monotonic(), 0))
+    iteration = 0
+    while time.monotonic() < deadline:
+        email = f'vu{number}-{iteration}-{run_id}@example.com'
+        iteration += 1
+        try:
+            await call(recorder, host, port, 'register', 'POST', '/register/', {'email': email}, expect=201)
+            await asyncio.sleep(think_time)
+            await call(recorder, host, port, 'login', 'POST', '/login/', {'email': email})
+            hook = await call(recorder, host, port, 'otp-hook', 'GET', f'/__test__/otp/?email={quote(email)}')
+            await asyncio.sleep(think_time)
+            tokens = await call(recorder, host, port, 'verify-otp', 'POST', '/verify-otp/', {'email': email, 'code': hook['code']})
+            await asyncio.sleep(think_time)
+            await call(recorder, host, port, 'profile', 'GET', '/profile/',
+                       headers={'Authorization': f"Bearer {tokens['access']}"})
+        except FlowError as e:
+            recorder.flows_failed += 1
+            if len(recorder.errors) < 10 or str(e) in recorder.errors:
+                recorder.errors[str(e)] = recorder.errors.get(str(e), 0) + 1
+        else:
+            recorder.flows_completed += 1
+
+
+async def run(host, port, args):
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    start = time.monotonic()
+    deadline = start + args.duration
+    step = args.ramp_up / args.users if args.users else 0
+    await asyncio.gather(*(
+        virtual_user(n, recorder, host, port, start + n * step, deadline, args.think_time, run_id)
+        for n in range(args.users)
+    ))
+    return recorder.report(time.monotonic() - start)
+
+
+def start_server(args):
+    database_url = args.database_url or f"sqlite:///{tempfile.mkstemp(suffix='.sqlite3')[1]}"
+    os.environ['DATABASE_URL'] = database_url
+    setup_django(test_db=False)
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        DEBUG='False',
+        OTP_TEST_HOOK='True',
+        OTP_DELIVERY=args.delivery,
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        CACHE_BACKEND='django.core.cache.backends.filebased.FileBasedCache',
+        CACHE_LOCATION=tempfile.mkdtemp(prefix='otp-loadtest-cache-'),
+        ASYNC_VIEWS='True' if args.server == 'asgi' else 'False',
+    )
+    port = free_port()
+    proc = subprocess.Popen(server_command(args.server, port, args.workers, args.threads), cwd=BASE_DIR, env=env)
+    if not wait_for_port('127.0.0.1', port):
+        proc.terminate()
+        raise SystemExit(f'{args.server} server did not start')
+    return proc, port
+
+
+def main():
+    args = parse_args()
+    proc = None
+    if args.target:
+        host, _, port = args.target.rpartition(':')
+        port = int(port)
+    else:
+        proc, port = start_server(args)
+        host = '127.0.0.1'
+    try:
+        results = asyncio.run(run(host, port, args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+    results['config'] = {k: v for k, v in vars(args).items() if k != 'json'}
+    emit(results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,8 @@ import io
 import cv2
 import numpy as np
 
-from sign_recognition import detect_sign_from_frame
+from sign_recognition import SignRecognizer, shared_recognizer
+from live_pipeline import LivePipeline, camera_frames
 from chatbot import EmpathyChatbot
 from utils import speak_text, transcribe_audio_file, ensure_bytes_to_streamlit_audio
 
@@ -93,16 +94,20 @@ def main():
                     if not cap.isOpened():
                         st.error("Unable to access camera via OpenCV. Try using the snapshot camera below.")
                     else:
-                        while st.session_state[run_key]:
-                            ret, frame = cap.read()
-                            if not ret:
-                                break
-                            label, ann = detect_sign_from_frame(frame)
-                            ann_rgb = cv2.cvtColor(ann, cv2.COLOR_BGR2RGB)
+                        # Capture and inference run on their own threads; this loop only renders the
+                        # newest result, so a slow frame is skipped instead of delaying the next ones.
+                        label_box = st.empty()
+
+                        def render(result):
+                            ann_rgb = cv2.cvtColor(result.annotated, cv2.COLOR_BGR2RGB)
                             placeholder.image(ann_rgb, use_column_width=True)
-                            st.write(f"Detected: **{label}**")
-                            time.sleep(0.05)
-                        cap.release()
+                            label_box.write(f"Detected: **{result.label}**")
+
+                        try:
+                            with LivePipeline(camera_frames(cap)) as pipeline:
+                                pipeline.run_renderer(render, keep_running=lambda: st.session_state[run_key])
+                        finally:
+                            cap.release()
 
             else:
                 uploaded = st.camera_input("Use your browser camera (snapshot) or upload an image")
@@ -110,7 +115,8 @@ def main():
                     # Read image bytes into OpenCV format
                     file_bytes = np.asarray(bytearray(uploaded.read()), dtype=np.uint8)
                     img = cv2.imdecode(file_bytes, 1)
-                    label, ann = detect_sign_from_frame(img)
+                    # Snapshots are unrelated images: full detection, on a graph shared across reruns.
+                    label, ann = shared_recognizer(SignRecognizer.DETECTION).recognize(img)
                     ann_rgb = cv2.cvtColor(ann, cv2.COLOR_BGR2RGB)
                     st.image(ann_rgb, use_column_width=True)
                     st.success(f"Detected: {label}")
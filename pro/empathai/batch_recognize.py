@@ -0,0 +1,370 @@
+"""
+batch_recognize.py
+
+Offline sign recognition over recorded sessions: video files and/or directories of images.
+
+Each input is split into segments of consecutive frames. A process pool works through the segments;
+every worker decodes its own segments (streaming, one frame at a time) and holds its own Hands
+graph, so throughput scales with the number of cores. Per-frame labels and landmarks are written
+in input order to CSV, JSONL or Parquet.
+
+Runs are resumable: completed segments are recorded in ``<output>.progress``, and running the
+same command again skips them (use --restart to start over).
+
+    python batch_recognize.py sessions/*.mp4 frames_dir/ -o labels.csv --stride 2 --workers 8
+
+Library use:
+
+    from batch_recognize import recognize_batch, recognize_source
+    summary = recognize_batch(["session1.mp4"], "labels.jsonl")
+    for row in recognize_source("session1.mp4", stride=5):
+        ...
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from sign_recognition import SignRecognizer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None
+    pq = None
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+FORMATS = ("csv", "jsonl", "parquet")
+NUM_LANDMARKS = 21
+LANDMARK_COLUMNS = [f"{axis}{i}" for i in range(NUM_LANDMARKS) for axis in "xyz"]
+
+
+@dataclass
+class Segment:
+    """Frames [start, stop) of one input; ``files`` holds the image paths for a directory input."""
+    ordinal: int
+    source: str
+    start: int
+    stop: Optional[int]
+    files: Optional[List[str]] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.source}:{self.start}"
+
+    @property
+    def is_video(self) -> bool:
+        return self.files is None
+
+
+def image_files(directory: str) -> List[str]:
+    """Image files directly inside ``directory``, in name order."""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def plan_segments(inputs: Iterable[str], segment_frames: int = 300) -> List[Segment]:
+    """Split every input into segments of ``segment_frames`` consecutive frames."""
+    segments = []
+    for source in inputs:
+        if os.path.isdir(source):
+            files = image_files(source)
+            for start in range(0, len(files), segment_frames):
+                chunk = files[start:start + segment_frames]
+                segments.append(Segment(len(segments), source, start, start + len(chunk), chunk))
+            continue
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise OSError(f"Cannot open video source {source!r}")
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total <= 0:
+            # Unknown length (some streams/containers): one segment to the end.
+            segments.append(Segment(len(segments), source, 0, None))
+            continue
+        for start in range(0, total, segment_frames):
+            segments.append(Segment(len(segments), source, start, min(start + segment_frames, total)))
+    return segments
+
+
+def segment_frames(segment: Segment, stride: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (frame_index, frame) for the frames of a segment whose index is a multiple of ``stride``."""
+    if not segment.is_video:
+        for index, path in enumerate(segment.files, start=segment.start):
+            if index % stride == 0:
+                frame = cv2.imread(path)
+                if frame is not None:
+                    yield index, frame
+        return
+
+    cap = cv2.VideoCapture(segment.source)
+    if not cap.isOpened():
+        raise OSError(f"Cannot open video source {segment.source!r}")
+    try:
+        if segment.start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, segment.start)
+        index = segment.start
+        while segment.stop is None or index < segment.stop:
+            if index % stride:
+                # grab() advances without decoding the skipped frame.
+                if not cap.grab():
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield index, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+class SegmentWorker:
+    """Runs segments with one recognizer per mode, kept for the life of the worker process.
+
+    Tracking state carries over when a segment continues the previous one (same source, starts
+    where the last stopped); otherwise the recognizer is reset so tracking does not leak across
+    unrelated frames.
+    """
+
+    def __init__(self, mode: Optional[str] = None, stride: int = 1):
+        self.mode = mode
+        self.stride = stride
+        self._recognizers = {}
+        self._last = None
+
+    def recognizer(self, segment: Segment) -> SignRecognizer:
+        # Frames of a video are a stream; images in a directory may be unrelated.
+        mode = self.mode or (SignRecognizer.TRACKING if segment.is_video else SignRecognizer.DETECTION)
+        if mode not in self._recognizers:
+            self._recognizers[mode] = SignRecognizer(mode=mode)
+        recognizer = self._recognizers[mode]
+        if mode == SignRecognizer.TRACKING and self._last != (segment.source, segment.start):
+            recognizer.reset()
+        return recognizer
+
+    def run(self, segment: Segment) -> Tuple[Segment, list]:
+        recognizer = self.recognizer(segment)
+        rows = []
+        index = segment.start
+        for index, frame in segment_frames(segment, self.stride):
+            label, landmarks = recognizer.analyze(frame)
+            rows.append((segment.source, index, label, landmarks))
+        self._last = (segment.source, segment.stop if segment.stop is not None else index + 1)
+        return segment, rows
+
+    def close(self):
+        for recognizer in self._recognizers.values():
+            recognizer.close()
+
+
+_worker = None
+
+
+def _init_worker(mode, stride):
+    global _worker
+    cv2.setNumThreads(1)  # one process per core already; avoid oversubscribing OpenCV's pool
+    _worker = SegmentWorker(mode, stride)
+
+
+def _run_segment(segment):
+    return _worker.run(segment)
+
+
+class RowWriter:
+    """Appends rows to a CSV/JSONL file, or one Parquet part file per segment in a directory."""
+
+    def __init__(self, path: str, fmt: str, offset: int = 0):
+        self.path = path
+        self.fmt = fmt
+        self._file = None
+        if fmt == "parquet":
+            if pa is None:
+                raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+            os.makedirs(path, exist_ok=True)
+            return
+        self._file = open(path, "a+", newline="", encoding="utf-8")
+        if self._file.seek(0, os.SEEK_END) < offset:
+            self._file.close()
+            raise ValueError(f"{path} is shorter than its recorded progress; use --restart to start over")
+        # Anything past the last recorded offset belongs to a segment that did not finish.
+        self._file.truncate(offset)
+        self._file.seek(offset)
+        if fmt == "csv":
+            self._csv = csv.writer(self._file)
+            if offset == 0:
+                self._csv.writerow(["source", "frame", "label"] + LANDMARK_COLUMNS)
+
+    def write(self, segment: Segment, rows: list) -> Optional[int]:
+        """Write one segment's rows; returns the file offset after them (None for Parquet)."""
+        if self.fmt == "parquet":
+            self._write_parquet(segment, rows)
+            return None
+        for source, frame, label, landmarks in rows:
+            if self.fmt == "csv":
+                values = [] if landmarks is None else [f"{v:.5f}" for v in landmarks.ravel()]
+                self._csv.writerow([source, frame, label] + values)
+            else:
+                self._file.write(json.dumps({
+                    "source": source,
+                    "frame": frame,
+                    "label": label,
+                    "landmarks": None if landmarks is None else np.round(landmarks, 5).tolist(),
+                }) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def _write_parquet(self, segment, rows):
+        columns = {"source": [r[0] for r in rows], "frame": [r[1] for r in rows], "label": [r[2] for r in rows]}
+        columns["landmarks"] = pa.array(
+            [None if r[3] is None else r[3].ravel().tolist() for r in rows],
+            type=pa.list_(pa.float32(), NUM_LANDMARKS * 3))
+        part = os.path.join(self.path, f"part-{segment.ordinal:06d}.parquet")
+        tmp = part + ".tmp"
+        pq.write_table(pa.table(columns), tmp)
+        os.replace(tmp, part)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _output_format(output: str, fmt: Optional[str]) -> str:
+    fmt = fmt or os.path.splitext(output.rstrip("/\\"))[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format {fmt!r}; use one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def _load_progress(path: str, config: dict) -> Tuple[set, int]:
+    """Keys of completed segments and the output offset after the last one."""
+    done, offset = set(), 0
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("config") != config:
+        raise ValueError(f"{path} was written by a run with different inputs or options; "
+                         "use --restart (resume=False) to start over")
+    for entry in lines[1:]:
+        done.add(entry["segment"])
+        offset = entry.get("offset") or 0
+    return done, offset
+
+
+def recognize_batch(inputs: Iterable[str], output: str, fmt: Optional[str] = None, stride: int = 1,
+                    workers: Optional[int] = None, segment_frames: int = 300, mode: Optional[str] = None,
+                    resume: bool = True, progress=None) -> dict:
+    """Recognize signs in every frame of ``inputs`` and write them to ``output``. Returns a summary.
+
+    fmt is "csv", "jsonl" or "parquet" (default: from the output suffix; Parquet output is a
+    directory of part files). mode forces "tracking" or "detection" for all inputs; by default
+    videos use tracking and image directories detection. ``progress(done, total)`` is called after
+    each segment.
+    """
+    inputs = list(inputs)
+    fmt = _output_format(output, fmt)
+    workers = workers or os.cpu_count() or 1
+    segments = plan_segments(inputs, segment_frames)
+    progress_path = output.rstrip("/\\") + ".progress"
+    config = {"inputs": [os.path.abspath(i) for i in inputs], "stride": stride,
+              "segment_frames": segment_frames, "mode": mode, "format": fmt}
+
+    done, offset = set(), 0
+    if resume and os.path.exists(progress_path):
+        done, offset = _load_progress(progress_path, config)
+    else:
+        with open(progress_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"config": config}) + "\n")
+    todo = [s for s in segments if s.key not in done]
+
+    started = time.perf_counter()
+    frames = 0
+    writer = RowWriter(output, fmt, offset)
+    try:
+        with open(progress_path, "a", encoding="utf-8") as log:
+            def record(segment, rows):
+                end = writer.write(segment, rows)
+                log.write(json.dumps({"segment": segment.key, "offset": end}) + "\n")
+                log.flush()
+                if progress is not None:
+                    progress(len(done) + 1, len(segments))
+                done.add(segment.key)
+                return len(rows)
+
+            if workers == 1:
+                worker = SegmentWorker(mode, stride)
+                try:
+                    for segment in todo:
+                        frames += record(*worker.run(segment))
+                finally:
+                    worker.close()
+            else:
+                # spawn: MediaPipe graphs are not fork-safe, and it is the only method on Windows.
+                context = multiprocessing.get_context("spawn")
+                with context.Pool(workers, initializer=_init_worker, initargs=(mode, stride)) as pool:
+                    # imap keeps input order while the pool works ahead on later segments.
+                    for segment, rows in pool.imap(_run_segment, todo):
+                        frames += record(segment, rows)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - started
+    return {
+        "segments": len(segments),
+        "segments_skipped": len(segments) - len(todo),
+        "frames": frames,
+        "seconds": round(elapsed, 2),
+        "fps": round(frames / elapsed, 1) if elapsed else 0.0,
+        "workers": workers,
+        "output": output,
+    }
+
+
+def recognize_source(source: str, stride: int = 1, mode: Optional[str] = None) -> Iterator[tuple]:
+    """Yield (source, frame_index, label, landmarks) for one video or image directory, in-process."""
+    worker = SegmentWorker(mode, stride)
+    try:
+        for segment in plan_segments([source], segment_frames=1 << 30):
+            recognizer = worker.recognizer(segment)
+            for index, frame in segment_frames(segment, stride):
+                label, landmarks = recognizer.analyze(frame)
+                yield source, index, label, landmarks
+    finally:
+        worker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="video files and/or directories of images")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output file (.csv, .jsonl) or Parquet directory (.parquet)")
+    parser.add_argument("--format", choices=FORMATS, help="output format (default: from the output suffix)")
+    parser.add_argument("--stride", type=int, default=1, help="recognize every Nth frame")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--segment-frames", type=int, default=300,
+                        help="frames per unit of work (and per resume checkpoint)")
+    parser.add_argument("--mode", choices=(SignRecognizer.TRACKING, SignRecognizer.DETECTION),
+                        help="force a recognizer mode (default: tracking for videos, detection for images)")
+    parser.add_argument("--restart", action="store_true", help="ignore earlier progress and start over")
+    args = parser.parse_args()
+
+    def show(done, total):
+        print(f"\r{done}/{total} segments", end="", flush=True)
+
+    summary = recognize_batch(args.inputs, args.output, fmt=args.format, stride=args.stride,
+                              workers=args.workers, segment_frames=args.segment_frames, mode=args.mode,
+                              resume=not args.restart, progress=show)
+    print()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+bench_fps.py
+
+Frames per second of sign recognition over a recorded clip:
+
+- per-frame graph: the old detect_sign_from_frame, which built a new Hands graph for every frame
+- tracking: one SignRecognizer in tracking mode (static_image_mode=False) for the whole clip
+- detection: one SignRecognizer in detection mode (static_image_mode=True)
+
+Frames are decoded up front so only recognition is timed. Without --clip, synthetic frames are
+used; they contain no hand, so they measure palm-detection cost only (tracking never kicks in).
+
+Usage: python bench_fps.py [--clip signing.mp4] [--frames 300] [--legacy-frames 30]
+"""
+import argparse
+import json
+import time
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from frames import read_frames, synthetic_frames
+from sign_recognition import SignRecognizer, classify_hand, mp_hands
+
+
+def legacy_recognize(frame):
+    """The pre-SignRecognizer code path: a fresh Hands graph per call."""
+    with mp_hands.Hands(static_image_mode=False, max_num_hands=1,
+                        min_detection_confidence=0.5, min_tracking_confidence=0.5) as hands:
+        results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if not results.multi_hand_landmarks:
+            return "no-hand"
+        return classify_hand(results.multi_hand_landmarks[0])
+
+
+def run(recognize, frames):
+    samples, labels = [], Counter()
+    start = time.perf_counter()
+    for frame in frames:
+        t0 = time.perf_counter()
+        labels[recognize(frame)] += 1
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": len(frames),
+        "fps": round(len(frames) / elapsed, 1),
+        "mean_ms": round(float(np.mean(samples)), 2),
+        "p50_ms": round(float(np.percentile(samples, 50)), 2),
+        "p95_ms": round(float(np.percentile(samples, 95)), 2),
+        "hand_rate": round(1 - labels["no-hand"] / len(frames), 3),
+        "labels": dict(labels),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clip", help="video file to replay (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=300, help="frames to use from the clip")
+    parser.add_argument("--legacy-frames", type=int, default=30,
+                        help="frames for the slow per-frame-graph baseline (0 to skip)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    source = read_frames(args.clip, args.frames) if args.clip else synthetic_frames(args.frames)
+    frames = list(source)
+    if not frames:
+        raise SystemExit("no frames decoded")
+
+    results = {"source": args.clip or "synthetic", "resolution": f"{frames[0].shape[1]}x{frames[0].shape[0]}"}
+    if args.legacy_frames:
+        results["per_frame_graph"] = run(legacy_recognize, frames[:args.legacy_frames])
+    for mode in (SignRecognizer.TRACKING, SignRecognizer.DETECTION):
+        with SignRecognizer(mode=mode) as recognizer:
+            recognizer.recognize(frames[0])  # load the graph outside the timed loop
+            recognizer.reset()
+            results[mode] = run(lambda frame: recognizer.recognize(frame)[0], frames)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+bench_roi.py
+
+Cost and accuracy of hand-ROI cropping and downscaling (preprocess.FramePreprocessor) against
+full-frame recognition, over a recorded clip:
+
+- full: every frame at full resolution (the reference)
+- roi: crop to the previous hand, full frame only until a hand is found or when it is lost
+  (MediaPipe in detection mode, as SignRecognizer runs it with a cropping preprocessor)
+- roi+small: as roi, with the full-frame fallback also scaled down to --full-side pixels
+
+For each mode it reports ms/frame and, against the full mode, how often the label and hand
+presence agree and the mean landmark error (in frame widths/heights) on frames where both found a
+hand. Use a clip with hands in it: synthetic frames (the default) contain none, so they only
+measure the cost of the full-frame path.
+
+Usage: python bench_roi.py [--clip signing.mp4] [--frames 300] [--roi-side 256] [--full-side 320]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from frames import read_frames, synthetic_frames
+from preprocess import FramePreprocessor
+from sign_recognition import SignRecognizer
+
+
+def run(preprocessor, frames):
+    labels, points, samples = [], [], []
+    # temporal=False: compare the per-frame labels, not the smoothed ones.
+    with SignRecognizer(mode=SignRecognizer.TRACKING, temporal=False, preprocessor=preprocessor) as recognizer:
+        recognizer.analyze(frames[0])  # load the graph outside the timed loop
+        recognizer.reset()
+        preprocessor.stats = dict.fromkeys(preprocessor.stats, 0)
+        for frame in frames:
+            t0 = time.perf_counter()
+            label, landmarks = recognizer.analyze(frame)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+            labels.append(label)
+            points.append(landmarks)
+    return labels, points, samples, dict(preprocessor.stats)
+
+
+def compare(reference, labels, points):
+    ref_labels, ref_points = reference
+    both = [(a, b) for a, b in zip(ref_points, points) if a is not None and b is not None]
+    hand_agree = np.mean([(a is None) == (b is None) for a, b in zip(ref_points, points)])
+    return {
+        "label_agreement": round(float(np.mean([a == b for a, b in zip(ref_labels, labels)])), 3),
+        "hand_agreement": round(float(hand_agree), 3),
+        "landmark_error": round(float(np.mean([np.abs(a[:, :2] - b[:, :2]).mean() for a, b in both])), 4)
+        if both else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clip", help="video file to replay (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=300, help="frames to use from the clip")
+    parser.add_argument("--roi-side", type=int, default=256, help="longest side of the hand crop")
+    parser.add_argument("--full-side", type=int, default=320, help="longest side of the full frame in roi+small")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    source = read_frames(args.clip, args.frames) if args.clip else synthetic_frames(args.frames)
+    frames = list(source)
+    if not frames:
+        raise SystemExit("no frames decoded")
+
+    modes = {
+        "full": FramePreprocessor(roi=False),
+        "roi": FramePreprocessor(roi=True, roi_side=args.roi_side),
+        "roi+small": FramePreprocessor(roi=True, roi_side=args.roi_side, full_side=args.full_side),
+    }
+    results = {"source": args.clip or "synthetic", "resolution": f"{frames[0].shape[1]}x{frames[0].shape[0]}"}
+    reference = None
+    for name, preprocessor in modes.items():
+        labels, points, samples, stats = run(preprocessor, frames)
+        result = {
+            "mean_ms": round(float(np.mean(samples)), 2),
+            "p50_ms": round(float(np.percentile(samples, 50)), 2),
+            "p95_ms": round(float(np.percentile(samples, 95)), 2),
+            "hand_rate": round(float(np.mean([p is not None for p in points])), 3),
+            "roi_rate": round(stats["roi_frames"] / len(frames), 3),
+            "fallbacks": stats["fallbacks"],
+        }
+        if reference is None:
+            reference = (labels, points)
+        else:
+            result.update(compare(reference, labels, points))
+        results[name] = result
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
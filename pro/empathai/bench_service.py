@@ -0,0 +1,126 @@
+"""
+bench_service.py
+
+Synthetic load for sign_service.py: replays a clip as N parallel camera streams over WebSockets and
+reports throughput, end-to-end latency (frame sent -> label received) and dropped frames.
+
+    python sign_service.py --workers 4 &
+    python bench_service.py --clip signing.mp4 --streams 16 --fps 15 --seconds 20
+
+Frames are JPEG-encoded once up front. Each stream sends at --fps whether or not replies have come
+back, like a real camera, so an overloaded server shows up as dropped frames rather than a
+slower client. Without --clip, synthetic frames (no hands) are used.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import cv2
+import numpy as np
+
+from frames import read_frames, synthetic_frames
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+
+async def run_stream(session, url, jpegs, fps, seconds, stream_id):
+    sent_at = {}
+    latencies = []
+    replies = 0
+    dropped = 0
+    async with session.ws_connect(url) as ws:
+        async def receive():
+            nonlocal replies, dropped
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                reply = json.loads(msg.data)
+                latencies.append((time.perf_counter() - sent_at.pop(reply["frame"])) * 1000.0)
+                replies += 1
+                dropped = reply["dropped"]
+
+        receiver = asyncio.create_task(receive())
+        interval = 1.0 / fps
+        # Stagger the streams so they do not all send on the same tick.
+        next_at = time.perf_counter() + interval * (stream_id % 10) / 10
+        deadline = time.perf_counter() + seconds
+        index = 0
+        while time.perf_counter() < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_at += interval
+            sent_at[index] = time.perf_counter()
+            await ws.send_bytes(jpegs[index % len(jpegs)])
+            index += 1
+        await asyncio.sleep(1.0)  # let the last replies arrive
+        await ws.close()
+        await asyncio.gather(receiver, return_exceptions=True)
+    return {"sent": index, "replies": replies, "dropped": dropped, "latencies": latencies}
+
+
+async def run_load(url, jpegs, streams, fps, seconds):
+    async with aiohttp.ClientSession() as session:
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(run_stream(session, url, jpegs, fps, seconds, i) for i in range(streams)),
+            return_exceptions=True)
+        elapsed = time.perf_counter() - started
+        stats_url = url.replace("ws://", "http://").replace("wss://", "https://").rsplit("/", 1)[0] + "/stats"
+        async with session.get(stats_url) as response:
+            server = await response.json()
+    errors = [repr(r) for r in results if isinstance(r, BaseException)]
+    ok = [r for r in results if not isinstance(r, BaseException)]
+    latencies = [ms for r in ok for ms in r["latencies"]]
+    sent = sum(r["sent"] for r in ok)
+    replies = sum(r["replies"] for r in ok)
+    return {
+        "streams": streams,
+        "fps_per_stream": fps,
+        "seconds": round(elapsed, 1),
+        "sent": sent,
+        "replies": replies,
+        "dropped": sum(r["dropped"] for r in ok),
+        "reply_rate": round(replies / sent, 3) if sent else 0.0,
+        "throughput_fps": round(replies / elapsed, 1),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 1) if latencies else None,
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 1) if latencies else None,
+        "errors": errors,
+        "server": server,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8765/ws")
+    parser.add_argument("--clip", help="video file to replay (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=150, help="frames to load from the clip (looped)")
+    parser.add_argument("--streams", type=int, default=4, help="parallel camera streams")
+    parser.add_argument("--fps", type=float, default=15.0, help="frames per second per stream")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    if aiohttp is None:
+        raise SystemExit("bench_service.py needs aiohttp (pip install aiohttp)")
+
+    source = read_frames(args.clip, args.frames) if args.clip else synthetic_frames(args.frames)
+    jpegs = [cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, args.quality])[1].tobytes()
+             for frame in source]
+    if not jpegs:
+        raise SystemExit("no frames decoded")
+
+    results = asyncio.run(run_load(args.url, jpegs, args.streams, args.fps, args.seconds))
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
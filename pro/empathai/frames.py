@@ -0,0 +1,41 @@
+"""
+frames.py
+
+Frame sources for the benchmarks and offline tools: decode a recorded clip (or a webcam index)
+with OpenCV, or generate synthetic frames on a headless box without any footage.
+"""
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+
+
+def read_frames(source, max_frames: Optional[int] = None) -> Iterator[np.ndarray]:
+    """Yield BGR frames from a video file path or camera index, one at a time."""
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise OSError(f"Cannot open video source {source!r}")
+    try:
+        count = 0
+        while max_frames is None or count < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+            count += 1
+    finally:
+        cap.release()
+
+
+def synthetic_frames(count: int, width: int = 640, height: int = 480) -> Iterator[np.ndarray]:
+    """Yield ``count`` BGR frames with a moving skin-toned blob over a gradient background.
+
+    They contain no real hand, so MediaPipe reports "no-hand"; use them to measure cost, not accuracy.
+    """
+    background = np.zeros((height, width, 3), np.uint8)
+    background[:] = np.linspace(40, 200, width, dtype=np.uint8)[None, :, None]
+    for i in range(count):
+        frame = background.copy()
+        x = int(width * (0.3 + 0.4 * ((i % 60) / 60)))
+        cv2.ellipse(frame, (x, height // 2), (60, 90), 0, 0, 360, (140, 170, 220), -1)
+        yield frame
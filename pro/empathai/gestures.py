@@ -0,0 +1,284 @@
+"""
+gestures.py
+
+Landmark features and a trainable nearest-neighbour gesture classifier.
+
+normalize_landmarks turns a hand's (21, 3) landmarks into a wrist-relative, scale-invariant
+array, so the same hand shape matches whether it is near or far from the camera. A
+GestureClassifier stores normalized examples (recorded from clips or image folders) and labels a
+new hand by its nearest examples; adding a sign means recording samples, not editing code.
+Distances to the whole bank are one matrix-vector product, which stays well under a millisecond
+for tens of thousands of examples; with scipy installed a cKDTree index is available too.
+
+Build a bank from labeled recordings and check its speed:
+
+    python gestures.py add --bank gesture_bank.npz --label hello hello_clip.mp4 hello_photos/
+    python gestures.py info --bank gesture_bank.npz
+    python gestures.py bench --examples 20000
+
+A hand farther than ``max_distance`` from every example is left to the finger heuristics. add and
+info print a suggested threshold measured on the recorded examples; pass it as --max-distance.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except Exception:
+    cKDTree = None
+
+
+NUM_LANDMARKS = 21
+FEATURE_SIZE = NUM_LANDMARKS * 3
+WRIST = 0
+MIDDLE_MCP = 9
+DEFAULT_BANK = os.environ.get(
+    "EMPATHAI_GESTURE_BANK", os.path.join(os.path.dirname(os.path.abspath(__file__)), "gesture_bank.npz"))
+# In palm lengths over all 63 coordinates. Distinct hand shapes (open palm, fist, thumb up) are
+# 1.2-3 apart, and landmark jitter of about 0.5% of the image moves one hand by about 1; prefer
+# GestureClassifier.suggested_max_distance() once a bank has recordings of each sign.
+DEFAULT_MAX_DISTANCE = 1.5
+
+
+def normalize_landmarks(points: np.ndarray) -> np.ndarray:
+    """Wrist-relative landmarks scaled by palm length (wrist to middle-finger knuckle).
+
+    Accepts one hand (21, 3) or a batch (N, 21, 3) and returns float32 of the same shape.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    centered = points - points[..., WRIST:WRIST + 1, :]
+    scale = np.linalg.norm(centered[..., MIDDLE_MCP, :], axis=-1)[..., None, None]
+    return centered / np.maximum(scale, 1e-6)
+
+
+def landmark_features(points: np.ndarray) -> np.ndarray:
+    """Flattened normalized landmarks: (63,) for one hand, (N, 63) for a batch."""
+    normalized = normalize_landmarks(points)
+    return normalized.reshape(normalized.shape[:-2] + (FEATURE_SIZE,))
+
+
+class GestureClassifier:
+    """k-nearest-neighbour classifier over a bank of normalized landmark examples.
+
+    predict() returns None when the bank is empty or the nearest example is farther than
+    ``max_distance`` (in palm lengths, over all 63 coordinates), so callers can fall back to the
+    heuristics; max_distance=None disables the cutoff. index="brute" computes all distances with one matrix product; index="kdtree" uses
+    scipy's cKDTree, which only pays off for very large banks.
+    """
+
+    def __init__(self, k: int = 1, max_distance: Optional[float] = DEFAULT_MAX_DISTANCE, index: str = "brute"):
+        if index not in ("brute", "kdtree"):
+            raise ValueError(f"index must be 'brute' or 'kdtree', not {index!r}")
+        if index == "kdtree" and cKDTree is None:
+            raise RuntimeError("index='kdtree' needs scipy (pip install scipy)")
+        self.k = k
+        self.max_distance = max_distance
+        self.index = index
+        self.features = np.empty((0, FEATURE_SIZE), dtype=np.float32)
+        self.labels = np.empty(0, dtype=object)
+        self._pending = []
+        self._tree = None
+        self._sq_norms = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.labels) + sum(len(labels) for _, labels in self._pending)
+
+    @property
+    def classes(self) -> list:
+        self._build()
+        return sorted(set(self.labels.tolist()))
+
+    def add(self, label: str, landmarks: np.ndarray):
+        """Add examples of ``label``: one (21, 3) hand or a batch (N, 21, 3) of raw landmarks."""
+        features = landmark_features(landmarks).reshape(-1, FEATURE_SIZE)
+        with self._lock:
+            self._pending.append((features, np.full(len(features), label, dtype=object)))
+
+    def _build(self):
+        # Examples are batched until the next query so adding many samples stays linear.
+        with self._lock:
+            if self._pending:
+                self.features = np.concatenate([self.features] + [f for f, _ in self._pending])
+                self.labels = np.concatenate([self.labels] + [l for _, l in self._pending])
+                self._pending = []
+                self._tree = None
+                self._sq_norms = None
+            if self._sq_norms is None:
+                self._sq_norms = np.einsum("ij,ij->i", self.features, self.features)
+                if self.index == "kdtree" and len(self.labels):
+                    self._tree = cKDTree(self.features)
+
+    def neighbours(self, landmarks: np.ndarray, k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(distances, labels) of the k nearest examples to one hand, nearest first."""
+        self._build()
+        k = min(k or self.k, len(self.labels))
+        if k == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=object)
+        query = landmark_features(landmarks)
+        if self._tree is not None:
+            distances, idx = self._tree.query(query, k=k)
+            return np.atleast_1d(distances), self.labels[np.atleast_1d(idx)]
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, one BLAS call over the whole bank.
+        sq = self._sq_norms - 2.0 * (self.features @ query) + query @ query
+        idx = np.argpartition(sq, k - 1)[:k] if k < len(sq) else np.arange(len(sq))
+        idx = idx[np.argsort(sq[idx])]
+        return np.sqrt(np.maximum(sq[idx], 0.0)), self.labels[idx]
+
+    def predict(self, landmarks: np.ndarray) -> Optional[str]:
+        """The majority label among the k nearest examples, or None if there is no close match."""
+        distances, labels = self.neighbours(landmarks)
+        if not len(labels):
+            return None
+        if self.max_distance is not None:
+            labels = labels[distances <= self.max_distance]
+            if not len(labels):
+                return None
+        if len(labels) == 1:
+            return labels[0]
+        # Ties go to the label of the nearer example (Counter keeps first-seen order).
+        return Counter(labels.tolist()).most_common(1)[0][0]
+
+    def suggested_max_distance(self, percentile: float = 95.0, margin: float = 1.5,
+                               per_sign: int = 200) -> Optional[float]:
+        """A max_distance measured on this bank, or None if no sign has two examples.
+
+        For up to ``per_sign`` examples of each sign, the distance to the nearest other example of
+        the same sign; returns ``margin`` times its ``percentile``. A new hand of a recorded sign is
+        then about as close as the recordings are to each other, and other hands fall through.
+        """
+        self._build()
+        rng = np.random.default_rng(0)
+        nearest = []
+        for label in set(self.labels.tolist()):
+            group = self.features[self.labels == label]
+            if len(group) < 2:
+                continue
+            rows = rng.choice(len(group), min(per_sign, len(group)), replace=False)
+            norms = np.einsum("ij,ij->i", group, group)
+            sq = norms[rows, None] + norms[None, :] - 2.0 * (group[rows] @ group.T)
+            sq[np.arange(len(rows)), rows] = np.inf  # not the example itself
+            nearest.append(np.sqrt(np.maximum(sq.min(axis=1), 0.0)))
+        if not nearest:
+            return None
+        return round(float(np.percentile(np.concatenate(nearest), percentile)) * margin, 3)
+
+    def save(self, path: str):
+        self._build()
+        np.savez_compressed(path, features=self.features, labels=self.labels.astype(str),
+                            config=json.dumps({"k": self.k, "max_distance": self.max_distance}))
+
+    @classmethod
+    def load(cls, path: str, index: str = "brute") -> "GestureClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data["config"]))
+            # Banks saved without a cutoff would never fall back to the heuristics.
+            classifier = cls(k=config["k"], max_distance=config["max_distance"] or DEFAULT_MAX_DISTANCE,
+                             index=index)
+            classifier.features = data["features"].astype(np.float32)
+            classifier.labels = data["labels"].astype(object)
+        return classifier
+
+
+_default_classifier = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def default_classifier() -> Optional[GestureClassifier]:
+    """The bank at EMPATHAI_GESTURE_BANK (default: gesture_bank.npz next to this file), or None."""
+    global _default_classifier, _default_loaded
+    with _default_lock:
+        if not _default_loaded:
+            _default_loaded = True
+            if os.path.exists(DEFAULT_BANK):
+                _default_classifier = GestureClassifier.load(DEFAULT_BANK)
+        return _default_classifier
+
+
+def _load_or_new(path: str, k: int) -> GestureClassifier:
+    if os.path.exists(path):
+        return GestureClassifier.load(path)
+    return GestureClassifier(k=k)
+
+
+def record_examples(classifier: GestureClassifier, label: str, sources: Iterable[str], stride: int = 1) -> int:
+    """Add the hand landmarks found in each video/image folder as examples of ``label``."""
+    from batch_recognize import recognize_source
+
+    added = 0
+    for source in sources:
+        hands = [landmarks for _, _, _, landmarks in recognize_source(source, stride=stride)
+                 if landmarks is not None]
+        if hands:
+            classifier.add(label, np.stack(hands))
+            added += len(hands)
+    return added
+
+
+def bench(examples: int, classes: int, frames: int, index: str) -> dict:
+    """Per-frame predict() time over a random bank (cost only; the labels are meaningless)."""
+    rng = np.random.default_rng(0)
+    classifier = GestureClassifier(k=3, max_distance=None, index=index)
+    bank = rng.random((examples, NUM_LANDMARKS, 3), dtype=np.float32)
+    for i, chunk in enumerate(np.array_split(bank, classes)):
+        classifier.add(f"sign-{i}", chunk)
+    queries = rng.random((frames, NUM_LANDMARKS, 3), dtype=np.float32)
+    classifier.predict(queries[0])  # builds the bank/index
+    started = time.perf_counter()
+    for query in queries:
+        classifier.predict(query)
+    elapsed = time.perf_counter() - started
+    return {"examples": examples, "classes": classes, "index": index, "frames": frames,
+            "ms_per_frame": round(elapsed / frames * 1000, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="record examples of one sign from videos/image folders")
+    add.add_argument("sources", nargs="+")
+    add.add_argument("--label", required=True)
+    add.add_argument("--bank", default=DEFAULT_BANK)
+    add.add_argument("--stride", type=int, default=1, help="use every Nth frame")
+    add.add_argument("--k", type=int, default=3, help="neighbours to vote (new banks only)")
+    add.add_argument("--max-distance", type=float, default=None,
+                     help="reject matches farther than this (palm lengths) and fall back to the heuristics "
+                          f"(default: keep the bank's; {DEFAULT_MAX_DISTANCE} for new banks)")
+    info = commands.add_parser("info", help="show the examples per sign in a bank")
+    info.add_argument("--bank", default=DEFAULT_BANK)
+    timing = commands.add_parser("bench", help="time predict() on a random bank")
+    timing.add_argument("--examples", type=int, default=20000)
+    timing.add_argument("--classes", type=int, default=500)
+    timing.add_argument("--frames", type=int, default=2000)
+    timing.add_argument("--index", choices=("brute", "kdtree"), default="brute")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        classifier = _load_or_new(args.bank, args.k)
+        if args.max_distance is not None:
+            classifier.max_distance = args.max_distance
+        added = record_examples(classifier, args.label, args.sources, args.stride)
+        classifier.save(args.bank)
+        print(f"Added {added} examples of {args.label!r}; {args.bank} now holds {len(classifier)} examples")
+        print(f"max_distance {classifier.max_distance}, suggested {classifier.suggested_max_distance()}")
+    elif args.command == "info":
+        classifier = GestureClassifier.load(args.bank)
+        counts = Counter(classifier.labels.tolist())
+        print(json.dumps({"examples": len(classifier), "k": classifier.k,
+                          "max_distance": classifier.max_distance,
+                          "suggested_max_distance": classifier.suggested_max_distance(),
+                          "signs": dict(sorted(counts.items()))}, indent=2))
+    else:
+        print(json.dumps(bench(args.examples, args.classes, args.frames, args.index), indent=2))
+
+
+if __name__ == "__main__":
+    main()
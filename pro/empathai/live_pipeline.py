@@ -0,0 +1,288 @@
+"""
+live_pipeline.py
+
+Pipelined live sign detection: capture -> inference -> render on separate threads.
+
+The capture thread reads frames as fast as the source delivers them into a one-frame "latest"
+slot; the inference worker always takes the newest frame, so a slow model skips frames instead
+of building up latency; the renderer (the caller's thread, e.g. the Streamlit script) shows only
+the newest result. Per-stage latency and dropped-frame counts are kept for stats().
+
+Runs headless: feed it a video file or synthetic frames instead of a camera.
+
+    python live_pipeline.py --clip signing.mp4          # replayed at the clip's frame rate
+    python live_pipeline.py --synthetic --fps 30 --seconds 10
+"""
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+import cv2
+import numpy as np
+
+from frames import read_frames, synthetic_frames
+from sign_recognition import SignRecognizer
+
+
+@dataclass
+class CapturedFrame:
+    index: int
+    frame: np.ndarray
+    captured_at: float
+    capture_ms: float
+
+
+@dataclass
+class Result:
+    index: int
+    label: str
+    annotated: np.ndarray
+    captured_at: float
+    inference_started_at: float
+    inferred_at: float
+
+
+class LatestSlot:
+    """A one-item buffer that keeps only the newest item; overwriting an unread item counts as a drop."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """The newest item, or None on timeout or once closed and empty."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed and self._item is None
+
+
+class StageTimer:
+    """Recent latency samples (ms) for one pipeline stage."""
+
+    def __init__(self, maxlen: int = 1000):
+        self.samples = deque(maxlen=maxlen)
+        self.count = 0
+
+    def add(self, ms: float):
+        self.samples.append(ms)
+        self.count += 1
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"count": self.count}
+        values = np.fromiter(self.samples, dtype=float)
+        return {
+            "count": self.count,
+            "mean_ms": round(float(values.mean()), 2),
+            "p50_ms": round(float(np.percentile(values, 50)), 2),
+            "p95_ms": round(float(np.percentile(values, 95)), 2),
+        }
+
+
+def camera_frames(cap) -> Iterator[np.ndarray]:
+    """Frames from an opened cv2.VideoCapture until it stops delivering."""
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            return
+        yield frame
+
+
+def paced(frames: Iterable[np.ndarray], fps: float) -> Iterator[np.ndarray]:
+    """Release frames at ``fps`` like a live camera would (for replaying files or synthetic frames)."""
+    interval = 1.0 / fps
+    next_at = time.perf_counter()
+    for frame in frames:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        next_at += interval
+        yield frame
+
+
+class LivePipeline:
+    """Capture and inference threads around one SignRecognizer, feeding a renderer on the caller's thread.
+
+    ``frames`` is any iterator of BGR frames (camera_frames(cap), paced(read_frames(path), fps), ...).
+    Use as a context manager or call start()/stop().
+    """
+
+    def __init__(self, frames: Iterable[np.ndarray], recognizer: Optional[SignRecognizer] = None,
+                 annotate: bool = True):
+        self.frames = iter(frames)
+        # Full frames: pass a recognizer with FramePreprocessor(roi=True) to crop to the hand once
+        # bench_roi.py agrees with full-frame recognition on your footage.
+        self.recognizer = recognizer or SignRecognizer(mode=SignRecognizer.TRACKING)
+        self._owns_recognizer = recognizer is None
+        self.annotate = annotate
+        self._frame_slot = LatestSlot()
+        self._result_slot = LatestSlot()
+        self._stop = threading.Event()
+        self._threads = []
+        self.timers = {name: StageTimer() for name in ("capture", "queue", "inference", "render", "end_to_end")}
+        self.captured = 0
+        self.rendered = 0
+        self.error = None
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="sign-capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="sign-inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._frame_slot.close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._result_slot.close()
+        if self._owns_recognizer:
+            self.recognizer.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _capture_loop(self):
+        try:
+            index = 0
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                frame = next(self.frames, None)
+                if frame is None:
+                    break
+                now = time.perf_counter()
+                self.timers["capture"].add((now - started) * 1000.0)
+                self._frame_slot.put(CapturedFrame(index, frame, now, (now - started) * 1000.0))
+                self.captured += 1
+                index += 1
+        except Exception as e:  # surface camera/decoder errors to the renderer instead of dying silently
+            self.error = e
+        finally:
+            self._frame_slot.close()
+
+    def _inference_loop(self):
+        try:
+            while not self._frame_slot.closed:
+                captured = self._frame_slot.get(timeout=0.1)
+                if captured is None:
+                    continue
+                started = time.perf_counter()
+                label, annotated = self.recognizer.recognize(captured.frame, annotate=self.annotate)
+                done = time.perf_counter()
+                self.timers["queue"].add((started - captured.captured_at) * 1000.0)
+                self.timers["inference"].add((done - started) * 1000.0)
+                self._result_slot.put(Result(captured.index, label, annotated, captured.captured_at, started, done))
+        except Exception as e:
+            self.error = e
+        finally:
+            self._result_slot.close()
+
+    def results(self, timeout: float = 0.1) -> Iterator[Result]:
+        """Yield the newest result each time one is ready, until the source ends or stop() is called.
+
+        Results that arrive while the consumer is still busy are skipped (counted in stats()).
+        Time spent by the consumer between yields is recorded as the render stage.
+        """
+        while not self._result_slot.closed:
+            result = self._result_slot.get(timeout=timeout)
+            if result is None:
+                continue
+            started = time.perf_counter()
+            yield result
+            done = time.perf_counter()
+            self.timers["render"].add((done - started) * 1000.0)
+            self.timers["end_to_end"].add((done - result.captured_at) * 1000.0)
+            self.rendered += 1
+        if self.error is not None:
+            raise self.error
+
+    def run_renderer(self, render: Callable[[Result], None], keep_running: Callable[[], bool] = lambda: True):
+        """Call ``render(result)`` for the newest results on this thread while keep_running() is true."""
+        for result in self.results():
+            render(result)
+            if not keep_running():
+                break
+
+    def stats(self) -> dict:
+        stats = {name: timer.summary() for name, timer in self.timers.items()}
+        stats.update({
+            "captured": self.captured,
+            "inferred": self.timers["inference"].count,
+            "rendered": self.rendered,
+            "dropped_before_inference": self._frame_slot.dropped,
+            "dropped_before_render": self._result_slot.dropped,
+        })
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--clip", help="video file to replay as a live source")
+    source.add_argument("--camera", type=int, help="camera index")
+    source.add_argument("--synthetic", action="store_true", help="synthetic frames (default)")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="source frame rate (default: the clip's own rate, or 30)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long to run")
+    parser.add_argument("--render-ms", type=float, default=0.0, help="simulated render cost per frame")
+    parser.add_argument("--no-annotate", action="store_true", help="skip drawing landmarks")
+    args = parser.parse_args()
+
+    if args.camera is not None:
+        cap = cv2.VideoCapture(args.camera)
+        frames = camera_frames(cap)
+    elif args.clip:
+        cap = cv2.VideoCapture(args.clip)
+        fps = args.fps or cap.get(cv2.CAP_PROP_FPS) or 30.0
+        cap.release()
+        frames = paced(read_frames(args.clip), fps)
+    else:
+        fps = args.fps or 30.0
+        frames = paced(synthetic_frames(int(args.seconds * fps) + 1), fps)
+
+    deadline = time.perf_counter() + args.seconds
+    labels = {}
+
+    def render(result):
+        labels[result.label] = labels.get(result.label, 0) + 1
+        if args.render_ms:
+            time.sleep(args.render_ms / 1000.0)
+
+    with LivePipeline(frames, annotate=not args.no_annotate) as pipeline:
+        pipeline.run_renderer(render, keep_running=lambda: time.perf_counter() < deadline)
+    stats = pipeline.stats()
+    stats["labels"] = labels
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
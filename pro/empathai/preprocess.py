@@ -0,0 +1,122 @@
+"""
+preprocess.py
+
+Adaptive frame preprocessing for SignRecognizer: hand-ROI cropping, downscaling and reused buffers.
+
+Once a hand has been found, the next frame is cropped to a square region around the previous hand
+(a view into the frame, no copy) and scaled down to at most ``roi_side`` pixels, so MediaPipe and
+the color conversion only see a small image. The crop is kept while the hand stays inside its inner
+part, and re-centered when the hand moves towards an edge. When the hand is lost in the crop, the
+same frame is retried on the full frame (optionally scaled down to ``full_side``). Resizing and
+BGR->RGB conversion write into buffers that are reused from frame to frame.
+
+Landmarks found in a crop are mapped back to full-frame coordinates, so callers never see the crop.
+With roi=True, SignRecognizer runs MediaPipe in detection mode, since its tracking state would not
+survive the crop moving; the crop takes over following the hand.
+"""
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class Crop:
+    """Where the image given to MediaPipe came from: pixels [x0, x0 + width) x [y0, y0 + height)."""
+
+    __slots__ = ("x0", "y0", "width", "height", "frame_width", "frame_height", "is_roi")
+
+    def __init__(self, x0, y0, width, height, frame_width, frame_height, is_roi):
+        self.x0, self.y0, self.width, self.height = x0, y0, width, height
+        self.frame_width, self.frame_height = frame_width, frame_height
+        self.is_roi = is_roi
+
+    def to_frame(self, hand_landmarks):
+        """Rewrite one hand's normalized landmarks (in place) from crop to full-frame coordinates."""
+        if not self.is_roi:
+            return
+        sx, sy = self.width / self.frame_width, self.height / self.frame_height
+        ox, oy = self.x0 / self.frame_width, self.y0 / self.frame_height
+        for lm in hand_landmarks.landmark:
+            lm.x = lm.x * sx + ox
+            lm.y = lm.y * sy + oy
+            lm.z = lm.z * sx  # z uses roughly the same scale as x
+
+
+class FramePreprocessor:
+    """Per-stream preprocessing state; see the module docstring.
+
+    roi=False only downscales to ``full_side`` (if given) and reuses buffers, which gives the same
+    landmarks as converting the full frame directly. ``margin`` is the padding around the hand box,
+    as a fraction of its longer side, on each side.
+    """
+
+    def __init__(self, roi: bool = True, roi_side: int = 256, full_side: Optional[int] = None,
+                 margin: float = 0.6, min_side: int = 96):
+        self.roi = roi
+        self.roi_side = roi_side
+        self.full_side = full_side
+        self.margin = margin
+        self.min_side = min_side
+        self.box = None  # (x0, y0, x1, y1) of the current crop, in frame pixels
+        self._buffers = {}
+        self.stats = {"frames": 0, "roi_frames": 0, "fallbacks": 0}
+
+    def _buffer(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._buffers[name] = np.empty(shape, dtype=np.uint8)
+        return buffer
+
+    def prepare(self, frame: np.ndarray) -> Tuple[np.ndarray, Crop]:
+        """The RGB image to give MediaPipe (a reused buffer) and where it came from."""
+        height, width = frame.shape[:2]
+        if self.roi and self.box is not None:
+            x0, y0, x1, y1 = self.box
+            src, limit, is_roi = frame[y0:y1, x0:x1], self.roi_side, True
+        else:
+            x0, y0, src, limit, is_roi = 0, 0, frame, self.full_side, False
+        src_height, src_width = src.shape[:2]
+        scale = min(1.0, limit / max(src_height, src_width)) if limit else 1.0
+        if scale < 1.0:
+            size = (max(1, round(src_width * scale)), max(1, round(src_height * scale)))
+            src = cv2.resize(src, size, dst=self._buffer("small", (size[1], size[0], 3)),
+                             interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=self._buffer("rgb", src.shape))
+        self.stats["frames"] += 1
+        self.stats["roi_frames"] += is_roi
+        return rgb, Crop(x0, y0, src_width, src_height, width, height, is_roi)
+
+    def update(self, hand_landmarks, frame_shape):
+        """Move the crop to follow a hand found in this frame (full-frame landmarks), or drop it."""
+        if not self.roi:
+            return
+        if hand_landmarks is None:
+            self.box = None
+            return
+        height, width = frame_shape[:2]
+        xs = [lm.x for lm in hand_landmarks.landmark]
+        ys = [lm.y for lm in hand_landmarks.landmark]
+        hx0, hx1 = min(xs) * width, max(xs) * width
+        hy0, hy1 = min(ys) * height, max(ys) * height
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            inner = (x1 - x0) * self.margin / (1 + 2 * self.margin) / 2
+            hand_side = max(hx1 - hx0, hy1 - hy0)
+            # Keep the crop while the hand is well inside and has not shrunk to a small part of it.
+            if (hx0 >= x0 + inner and hx1 <= x1 - inner and hy0 >= y0 + inner and hy1 <= y1 - inner
+                    and hand_side * (1 + 2 * self.margin) >= (x1 - x0) * 0.6):
+                return
+        side = max(hx1 - hx0, hy1 - hy0) * (1 + 2 * self.margin)
+        side = int(min(max(side, self.min_side), width, height))
+        cx, cy = (hx0 + hx1) / 2, (hy0 + hy1) / 2
+        x0 = int(min(max(cx - side / 2, 0), width - side))
+        y0 = int(min(max(cy - side / 2, 0), height - side))
+        self.box = (x0, y0, x0 + side, y0 + side)
+
+    def fallback(self):
+        """The hand was lost in the crop: the next image is the full frame."""
+        self.box = None
+        self.stats["fallbacks"] += 1
+
+    def reset(self):
+        self.box = None
@@ -5,10 +5,21 @@ Uses Mediapipe and OpenCV to detect simple hand gestures and map them to a small
 Supported sample gestures: 'hello' (open hand), 'yes' (thumbs up), 'no' (fist), 'thank you' (hand to chin - approximate).
 
 The detection is heuristic-based for demo purposes.
+
+SignRecognizer keeps one MediaPipe Hands graph alive for a video stream, so the model is loaded
+once and, in tracking mode, landmarks are tracked from frame to frame instead of re-detecting the
+hand every time. detect_sign_from_frame remains as a thin wrapper over a shared recognizer.
 """
+import atexit
+import threading
+
 import cv2
 import numpy as np
 
+from gestures import default_classifier
+from preprocess import FramePreprocessor
+from temporal import StreamTracker
+
 try:
     import mediapipe as mp
 except Exception:
@@ -27,6 +38,23 @@ def _draw_landmarks(image, hand_landmarks, handedness=None):
     return image
 
 
+TIP_IDS = np.array([4, 8, 12, 16, 20])
+
+
+def landmark_array(hand_landmarks) -> np.ndarray:
+    """The 21 landmarks of one hand as a (21, 3) float32 array of normalized x, y, z."""
+    return np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float32)
+
+
+def fingers_up_points(points: np.ndarray) -> np.ndarray:
+    """5 booleans (thumb->pinky) from a (21, 3) landmark array; see fingers_up."""
+    # Thumb: compare x of tip and ip (depends on hand orientation)
+    thumb_is_open = points[TIP_IDS[0], 0] < points[TIP_IDS[0] - 1, 0]
+    # Other fingers: tip y < pip y => finger up (in mediapipe coords top is smaller y)
+    others = points[TIP_IDS[1:], 1] < points[TIP_IDS[1:] - 2, 1]
+    return np.concatenate(([thumb_is_open], others))
+
+
 def fingers_up(hand_landmarks) -> list:
     """Return a list of 5 booleans indicating if each finger is up (thumb->pinky).
 
@@ -34,74 +62,213 @@ def fingers_up(hand_landmarks) -> list:
     """
     if mp is None or hand_landmarks is None:
         return [False] * 5
+    return fingers_up_points(landmark_array(hand_landmarks)).tolist()
 
-    tips_ids = [4, 8, 12, 16, 20]
-    fingers = []
-    lm = hand_landmarks.landmark
-    # Thumb: compare x of tip and ip (depends on hand orientation)
-    thumb_is_open = lm[tips_ids[0]].x < lm[tips_ids[0] - 1].x
-    fingers.append(thumb_is_open)
 
-    # Other fingers: tip y < pip y => finger up (in mediapipe coords top is smaller y)
-    for id in tips_ids[1:]:
-        fingers.append(lm[id].y < lm[id - 2].y)
+def classify_points(points: np.ndarray) -> str:
+    """Map one hand's (21, 3) landmark array to a sample sign label using the finger heuristics."""
+    fup = fingers_up_points(points)
+    fingers = int(fup[1:].sum())
 
-    return fingers
+    # open palm (hello): many fingers up
+    if fingers >= 4:
+        return "hello"
+    # fist (no): no fingers up
+    if fingers == 0 and not fup[0]:
+        return "no"
+    # thumbs up (yes): thumb up, others down
+    if fup[0] and fingers == 0:
+        return "yes"
+    # try detect hand near chin for 'thank you' (approximate):
+    # index finger tip in the upper part of the image (landmark y is normalized to 0..1)
+    if points[8, 1] < 0.35:
+        return "thank you"
+    return "unknown"
 
 
-def detect_sign_from_frame(frame):
-    """Detects a simple sign from a BGR frame.
+def classify_hand(hand_landmarks) -> str:
+    """Map one hand's MediaPipe landmarks to a sample sign label using the finger heuristics."""
+    return classify_points(landmark_array(hand_landmarks))
+
+
+class SignRecognizer:
+    """Recognizes signs in the frames of one video stream with a single, reused Hands graph.
+
+    mode="tracking" (static_image_mode=False) runs palm detection until a hand is found and then
+    tracks its landmarks across consecutive frames, which is much cheaper per frame. Use it for a
+    camera or video stream. mode="detection" (static_image_mode=True) runs detection on every
+    frame, for unrelated images such as snapshots or shuffled frames.
+
+    The graph is created on the first frame and released by close() (or by leaving a ``with``
+    block). Call reset() when the stream changes so tracking does not carry over. A MediaPipe
+    graph must not process two frames at once, so calls are serialized with a lock.
+
+    Hands are labeled by ``classifier`` (a gestures.GestureClassifier; by default the bank from
+    gestures.default_classifier(), if one exists) and by the finger heuristics when it has no
+    close match. Pass classifier=False to use the heuristics only.
 
-    Returns (label, annotated_frame).
+    In tracking mode each frame's label also goes through a temporal.StreamTracker (pass
+    temporal=False to disable, or a configured tracker): labels are smoothed over recent frames
+    and motion signs such as "thank you" are matched on the hand's trajectory. reset() clears it.
+
+    Frames go through ``preprocessor`` (a preprocess.FramePreprocessor) before MediaPipe. The
+    default only reuses conversion buffers; FramePreprocessor(roi=True) crops to the previous hand
+    in tracking mode and retries the full frame when the hand is lost there. The crop then does
+    the tracking: MediaPipe runs in detection mode, because its own tracking keeps the previous
+    hand region in normalized image coordinates, which mean something else once the crop moves
+    or the image switches between crop and full frame.
     """
-    label = ""
-    annotated = frame.copy()
 
-    if mp is None:
-        return "mediapipe-not-installed", annotated
-
-    with mp_hands.Hands(static_image_mode=False, max_num_hands=1,
-                         min_detection_confidence=0.5,
-                         min_tracking_confidence=0.5) as hands:
-        # Convert BGR to RGB
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb)
+    TRACKING = "tracking"
+    DETECTION = "detection"
+
+    def __init__(self, mode: str = TRACKING, max_num_hands: int = 1, model_complexity: int = 1,
+                 min_detection_confidence: float = 0.5, min_tracking_confidence: float = 0.5,
+                 classifier=None, temporal=None, preprocessor: FramePreprocessor = None):
+        if mode not in (self.TRACKING, self.DETECTION):
+            raise ValueError(f"mode must be {self.TRACKING!r} or {self.DETECTION!r}, not {mode!r}")
+        self.mode = mode
+        self.max_num_hands = max_num_hands
+        self.model_complexity = model_complexity
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.classifier = default_classifier() if classifier is None else (classifier or None)
+        if temporal is None:
+            temporal = mode == self.TRACKING
+        self.tracker = (StreamTracker() if temporal is True else temporal) or None
+        self.preprocessor = preprocessor or FramePreprocessor(roi=False)
+        if mode == self.DETECTION:
+            self.preprocessor.roi = False  # unrelated images: the previous hand says nothing
+        self._hands = None
+        self._lock = threading.Lock()
+
+    def _graph(self):
+        if self._hands is None:
+            self._hands = mp_hands.Hands(
+                static_image_mode=self.mode == self.DETECTION or self.preprocessor.roi,
+                max_num_hands=self.max_num_hands,
+                model_complexity=self.model_complexity,
+                min_detection_confidence=self.min_detection_confidence,
+                min_tracking_confidence=self.min_tracking_confidence,
+            )
+        return self._hands
+
+    def process(self, frame):
+        """Run the Hands graph on a BGR frame and return the raw MediaPipe results.
+
+        Landmarks are normalized to the full frame even when only a crop of it was processed.
+        """
+        with self._lock:
+            rgb, crop = self.preprocessor.prepare(frame)
+            results = self._graph().process(rgb)
+            if crop.is_roi and not results.multi_hand_landmarks:
+                self.preprocessor.fallback()
+                rgb, crop = self.preprocessor.prepare(frame)
+                results = self._graph().process(rgb)
+            hands = results.multi_hand_landmarks or []
+            for hand_landmarks in hands:
+                crop.to_frame(hand_landmarks)
+            self.preprocessor.update(hands[0] if hands else None, frame.shape)
+            return results
+
+    def classify(self, points: np.ndarray) -> str:
+        """Label one hand's (21, 3) landmark array: the example bank first, then the heuristics."""
+        if self.classifier is not None:
+            label = self.classifier.predict(points)
+            if label is not None:
+                return label
+        return classify_points(points)
+
+    def _track(self, points, label: str) -> str:
+        return label if self.tracker is None else self.tracker.update(points, label)
+
+    def analyze(self, frame):
+        """Detect a sign in a BGR frame without drawing. Returns (label, landmarks).
+
+        landmarks is a (21, 3) float32 array of the first hand's normalized x, y, z, or None.
+        """
+        if mp is None:
+            return "mediapipe-not-installed", None
+        results = self.process(frame)
         if not results.multi_hand_landmarks:
-            return "no-hand", annotated
+            return self._track(None, "no-hand"), None
+        points = landmark_array(results.multi_hand_landmarks[0])
+        return self._track(points, self.classify(points)), points
+
+    def recognize(self, frame, annotate: bool = True):
+        """Detect a sign in a BGR frame. Returns (label, annotated_frame).
+
+        The frame is only copied when something is drawn on it: with annotate=False, or when no
+        hand was found, the input frame itself is returned.
+        """
+        if mp is None:
+            return "mediapipe-not-installed", frame
+
+        results = self.process(frame)
+        if not results.multi_hand_landmarks:
+            return self._track(None, "no-hand"), frame
 
         hand_landmarks = results.multi_hand_landmarks[0]
-        _draw_landmarks(annotated, hand_landmarks)
-
-        # Heuristic gesture detection
-        fup = fingers_up(hand_landmarks)
-
-        # open palm (hello): many fingers up
-        if sum(fup[1:]) >= 4:
-            label = "hello"
-        # fist (no): no fingers up
-        elif sum(fup) == 0:
-            label = "no"
-        # thumbs up (yes): thumb up, others down
-        elif fup[0] and sum(fup[1:]) == 0:
-            label = "yes"
-        else:
-            # try detect hand near chin for 'thank you' (approximate)
-            # use landmark for wrist and index finger tip
-            lm = hand_landmarks.landmark
-            wrist = lm[0]
-            index_tip = lm[8]
-            # If hand is near upper area of image (low y value) and index near wrist x-wise
-            h, w, _ = frame.shape
-            if index_tip.y * h < h * 0.35:
-                label = "thank you"
-            else:
-                label = "unknown"
-
-        # annotate label
-        cv2.putText(annotated, f"Detected: {label}", (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-    return label, annotated
+        points = landmark_array(hand_landmarks)
+        label = self._track(points, self.classify(points))
+        annotated = frame
+        if annotate:
+            annotated = frame.copy()
+            _draw_landmarks(annotated, hand_landmarks)
+            cv2.putText(annotated, f"Detected: {label}", (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        return label, annotated
+
+    def reset(self):
+        """Drop the tracking state (and the graph); the next frame starts with a fresh detection."""
+        self.close()
+        self.preprocessor.reset()
+        if self.tracker is not None:
+            self.tracker.reset()
+
+    def close(self):
+        with self._lock:
+            if self._hands is not None:
+                self._hands.close()
+                self._hands = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_shared_recognizers = {}
+_shared_lock = threading.Lock()
+
+
+def shared_recognizer(mode: str = SignRecognizer.TRACKING) -> SignRecognizer:
+    """A process-wide recognizer per mode, for callers that do not own a stream.
+
+    It has no StreamTracker: its callers' frames are unrelated, so smoothing and motion signs
+    would carry labels from one call into the next.
+    """
+    with _shared_lock:
+        if mode not in _shared_recognizers:
+            _shared_recognizers[mode] = SignRecognizer(mode=mode, temporal=False)
+        return _shared_recognizers[mode]
+
+
+@atexit.register
+def _close_shared_recognizers():
+    for recognizer in _shared_recognizers.values():
+        recognizer.close()
+
+
+def detect_sign_from_frame(frame):
+    """Detects a simple sign from a BGR frame.
+
+    Returns (label, annotated_frame). Kept for existing callers; it reuses the shared detection
+    recognizer instead of loading a new Hands graph per call, so every call is an independent
+    detection. For tracking across the frames of a stream, own a SignRecognizer per stream.
+    """
+    return shared_recognizer(SignRecognizer.DETECTION).recognize(frame)
 
 
 if __name__ == "__main__":
@@ -110,13 +277,14 @@ if __name__ == "__main__":
     if not cap.isOpened():
         print("Cannot open camera")
     else:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            label, ann = detect_sign_from_frame(frame)
-            cv2.imshow("EmpathAI Sign Demo", ann)
-            if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
+        with SignRecognizer() as recognizer:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                label, ann = recognizer.recognize(frame)
+                cv2.imshow("EmpathAI Sign Demo", ann)
+                if cv2.waitKey(1) & 0xFF == ord("q"):
+                    break
         cap.release()
         cv2.destroyAllWindows()
@@ -0,0 +1,311 @@
+"""
+sign_service.py
+
+Sign recognition as a network service, for many kiosks/cameras at once.
+
+    python sign_service.py --port 8765 --workers 4 --max-streams 64
+
+Endpoints:
+
+- GET  /ws         WebSocket. Send each camera frame as a binary JPEG message; every processed frame
+                   is answered with a JSON text message {"frame", "label", "raw_label", "hand",
+                   "latency_ms", "dropped"} (add ?landmarks=1 for the 21 landmarks). Send the text
+                   message {"reset": true} when the camera or user changes.
+- POST /recognize  One JPEG image in the body; answers {"label", "hand", "latency_ms"}.
+- GET  /stats      Streams, queue, throughput and latency counters as JSON.
+- GET  /healthz    Liveness and worker pool state (503 while the pool is broken).
+
+Inference runs in a shared pool of worker processes, each with its own Hands graph in detection
+mode, so any worker can take the next frame of any stream. Per-connection state (label smoothing
+and motion signs, temporal.StreamTracker) stays in the server. Backpressure: at most
+``max_pending`` frames are in the pool at once; a stream has at most one frame in flight, and a
+newer frame replaces one still waiting (counted as dropped), so a slow server lowers the frame rate
+instead of adding latency. Connections beyond ``max_streams``, and /recognize calls while the pool
+is full, get 503. If a worker process dies (e.g. MediaPipe aborts on a frame), the pool is replaced
+and the frames that were in it are answered with the label "worker-error".
+
+Load-test it with bench_service.py.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+from live_pipeline import StageTimer
+from sign_recognition import SignRecognizer
+from temporal import StreamTracker
+
+try:
+    from aiohttp import WSMsgType, web
+except Exception:
+    web = None
+    WSMsgType = None
+
+
+WORKER_ERROR = "worker-error"
+
+_recognizer = None
+
+
+def _init_worker():
+    global _recognizer
+    cv2.setNumThreads(1)
+    # Frames of one stream may go to any worker, so no tracking state is kept here.
+    _recognizer = SignRecognizer(mode=SignRecognizer.DETECTION, temporal=False)
+    _recognizer.analyze(np.zeros((64, 64, 3), dtype=np.uint8))  # load the graph before the first request
+
+
+def _ping():
+    return True
+
+
+def _recognize_jpeg(data: bytes):
+    """Worker: decode one JPEG and return (label, landmarks or None)."""
+    try:
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    except cv2.error:  # e.g. an empty body
+        frame = None
+    if frame is None:
+        return "invalid-image", None
+    return _recognizer.analyze(frame)
+
+
+class SignService:
+    """The worker pool, concurrency limits and counters shared by all connections."""
+
+    def __init__(self, workers: int = None, max_streams: int = 64, max_pending: int = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_streams = max_streams
+        self.max_pending = max_pending or 2 * self.workers
+        self.pool = None
+        self.healthy = False
+        self.slots = None
+        self.streams = 0
+        self.pending = 0
+        self.counters = {"frames": 0, "dropped": 0, "rejected_streams": 0, "rejected_requests": 0,
+                         "invalid": 0, "worker_errors": 0, "pool_restarts": 0}
+        self.latency = StageTimer()
+        self.inference = StageTimer()
+        self.started = time.monotonic()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: MediaPipe graphs are not fork-safe, and it is the only method on Windows.
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker)
+
+    async def start(self):
+        self.pool = self._new_pool()
+        self.slots = asyncio.Semaphore(self.max_pending)
+        # Workers start on demand; start them (and load their graphs) before serving.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ping) for _ in range(self.workers)))
+        self.healthy = True
+
+    def _restart_pool(self, broken: ProcessPoolExecutor):
+        """Replace a pool broken by a dead worker, once however many requests saw it break."""
+        if self.pool is not broken:
+            return
+        self.healthy = False
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.counters["pool_restarts"] += 1
+        # If this fails, self.pool stays the broken one and the next request tries again.
+        self.pool = self._new_pool()
+        self.healthy = True
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def recognize(self, data: bytes):
+        """(label, landmarks, inference_ms) for one JPEG, waiting for a free pool slot."""
+        async with self.slots:
+            self.pending += 1
+            started = time.perf_counter()
+            pool = self.pool
+            try:
+                label, landmarks = await asyncio.get_running_loop().run_in_executor(
+                    pool, _recognize_jpeg, data)
+            except BrokenProcessPool:
+                # A worker died; this frame (and every other one in the pool) is lost.
+                self._restart_pool(pool)
+                label, landmarks = WORKER_ERROR, None
+            finally:
+                self.pending -= 1
+        inference_ms = (time.perf_counter() - started) * 1000.0
+        self.inference.add(inference_ms)
+        self.counters["frames"] += 1
+        if label == "invalid-image":
+            self.counters["invalid"] += 1
+        elif label == WORKER_ERROR:
+            self.counters["worker_errors"] += 1
+        return label, landmarks, inference_ms
+
+    def health(self) -> dict:
+        return {"status": "ok" if self.healthy else "broken", "workers": self.workers,
+                "pool_restarts": self.counters["pool_restarts"]}
+
+    def stats(self) -> dict:
+        uptime = time.monotonic() - self.started
+        return dict(self.counters, streams=self.streams, pending=self.pending, workers=self.workers,
+                    max_streams=self.max_streams, max_pending=self.max_pending,
+                    fps=round(self.counters["frames"] / uptime, 1) if uptime else 0.0,
+                    latency=self.latency.summary(), inference=self.inference.summary())
+
+
+class Stream:
+    """One WebSocket connection: its tracker and the newest frame not yet sent to the pool."""
+
+    def __init__(self, service: SignService, ws, landmarks: bool = False):
+        self.service = service
+        self.ws = ws
+        self.landmarks = landmarks
+        self.tracker = StreamTracker()
+        self.received = 0
+        self.dropped = 0
+        self._frame = None  # (index, received_at, jpeg)
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def offer(self, data: bytes):
+        if self._frame is not None:
+            self.dropped += 1
+            self.service.counters["dropped"] += 1
+        self._frame = (self.received, time.perf_counter(), data)
+        self.received += 1
+        self._ready.set()
+
+    def close(self):
+        self._closed = True
+        self._ready.set()
+
+    async def run(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._closed:
+                return
+            index, received_at, data = self._frame
+            self._frame = None
+            raw_label, points, _ = await self.service.recognize(data)
+            if raw_label in ("invalid-image", WORKER_ERROR):
+                label = raw_label
+            else:
+                label = self.tracker.update(points, raw_label)
+            latency_ms = (time.perf_counter() - received_at) * 1000.0
+            self.service.latency.add(latency_ms)
+            reply = {"frame": index, "label": label, "raw_label": raw_label, "hand": points is not None,
+                     "latency_ms": round(latency_ms, 2), "dropped": self.dropped}
+            if self.landmarks:
+                reply["landmarks"] = None if points is None else np.round(points, 5).tolist()
+            if self._closed or self.ws.closed:
+                return
+            await self.ws.send_str(json.dumps(reply))
+
+
+SERVICE = web.AppKey("service", SignService) if web is not None else "service"
+
+
+async def websocket_handler(request):
+    service = request.app[SERVICE]
+    if service.streams >= service.max_streams:
+        service.counters["rejected_streams"] += 1
+        return web.json_response({"error": "too many streams"}, status=503, headers={"Retry-After": "1"})
+    # Count the stream before the first await, so concurrent handshakes cannot all pass the check.
+    service.streams += 1
+    stream = runner = None
+    try:
+        ws = web.WebSocketResponse(heartbeat=30, max_msg_size=8 * 1024 * 1024)
+        await ws.prepare(request)
+        stream = Stream(service, ws, landmarks=request.query.get("landmarks") == "1")
+        runner = asyncio.create_task(stream.run())
+        async for msg in ws:
+            if msg.type == WSMsgType.BINARY:
+                stream.offer(msg.data)
+            elif msg.type == WSMsgType.TEXT:
+                try:
+                    command = json.loads(msg.data)
+                except ValueError:
+                    command = {}
+                if isinstance(command, dict) and command.get("reset"):
+                    stream.tracker.reset()
+            if runner.done():
+                break  # the send loop failed (client gone)
+    finally:
+        service.streams -= 1
+        if stream is not None:
+            stream.close()
+            await asyncio.gather(runner, return_exceptions=True)
+    return ws
+
+
+async def recognize_handler(request):
+    service = request.app[SERVICE]
+    if service.slots.locked():
+        service.counters["rejected_requests"] += 1
+        return web.json_response({"error": "busy"}, status=503, headers={"Retry-After": "1"})
+    started = time.perf_counter()
+    label, points, _ = await service.recognize(await request.read())
+    if label == "invalid-image":
+        return web.json_response({"error": "body is not a decodable image"}, status=400)
+    if label == WORKER_ERROR:
+        return web.json_response({"error": "inference worker crashed"}, status=503, headers={"Retry-After": "1"})
+    return web.json_response({"label": label, "hand": points is not None,
+                              "latency_ms": round((time.perf_counter() - started) * 1000.0, 2)})
+
+
+async def stats_handler(request):
+    return web.json_response(request.app[SERVICE].stats())
+
+
+async def health_handler(request):
+    health = request.app[SERVICE].health()
+    return web.json_response(health, status=200 if health["status"] == "ok" else 503)
+
+
+def create_app(service: SignService) -> "web.Application":
+    if web is None:
+        raise RuntimeError("sign_service.py needs aiohttp (pip install aiohttp)")
+    app = web.Application(client_max_size=8 * 1024 * 1024)
+    app[SERVICE] = service
+
+    async def startup(app):
+        await service.start()
+
+    async def cleanup(app):
+        service.close()
+
+    app.on_startup.append(startup)
+    app.on_cleanup.append(cleanup)
+    app.add_routes([
+        web.get("/ws", websocket_handler),
+        web.post("/recognize", recognize_handler),
+        web.get("/stats", stats_handler),
+        web.get("/healthz", health_handler),
+    ])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="inference processes (default: CPU count)")
+    parser.add_argument("--max-streams", type=int, default=64, help="concurrent WebSocket streams")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="frames in the worker pool at once (default: 2 x workers)")
+    args = parser.parse_args()
+    if web is None:
+        raise SystemExit("sign_service.py needs aiohttp (pip install aiohttp)")
+    service = SignService(args.workers, args.max_streams, args.max_pending)
+    web.run_app(create_app(service), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
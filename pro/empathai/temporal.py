@@ -0,0 +1,189 @@
+"""
+temporal.py
+
+Per-stream temporal recognition: label smoothing and motion signs over a landmark ring buffer.
+
+Single frames flicker between labels, and motion signs cannot be seen in one frame at all.
+StreamTracker keeps the last ``window`` hands of one stream in a preallocated ring buffer
+(constant memory per stream), smooths the per-frame labels with a majority vote plus hysteresis,
+and matches the recent hand trajectory against motion templates with DTW (dynamic time warping)
+inside a fixed Sakoe-Chiba band, so the work per frame is O(window x band) per template.
+"""
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from gestures import MIDDLE_MCP, NUM_LANDMARKS, WRIST
+
+INDEX_TIP = 8
+MOTION_POINTS = [WRIST, INDEX_TIP]
+NO_HAND = "no-hand"
+
+
+class LandmarkRing:
+    """Fixed-size ring of (21, 3) landmark arrays and label ids, allocated once."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.points = np.zeros((size, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.present = np.zeros(size, dtype=bool)
+        self.label_ids = np.full(size, -1, dtype=np.int32)
+        self.count = 0  # frames pushed since the last clear
+
+    def push(self, points: Optional[np.ndarray], label_id: int):
+        slot = self.count % self.size
+        if points is None:
+            self.present[slot] = False
+        else:
+            self.points[slot] = points
+            self.present[slot] = True
+        self.label_ids[slot] = label_id
+        self.count += 1
+
+    def last(self, n: int) -> np.ndarray:
+        """Indices of the last n slots (n <= size), oldest first."""
+        n = min(n, self.count, self.size)
+        return (np.arange(self.count - n, self.count)) % self.size
+
+    def clear(self):
+        self.present[:] = False
+        self.label_ids[:] = -1
+        self.count = 0
+
+
+def motion_features(points: np.ndarray) -> np.ndarray:
+    """(T, 21, 3) landmarks -> (T, 4) wrist and index-tip x, y relative to the first wrist, in palm lengths."""
+    palm = np.linalg.norm(points[:, MIDDLE_MCP, :2] - points[:, WRIST, :2], axis=-1).mean()
+    track = points[:, MOTION_POINTS, :2] - points[0, WRIST, :2]
+    return (track / max(float(palm), 1e-6)).reshape(len(points), -1)
+
+
+def resample(sequence: np.ndarray, length: int) -> np.ndarray:
+    """Linearly resample a (T, D) sequence to (length, D)."""
+    sequence = np.asarray(sequence, dtype=np.float32)
+    src = np.linspace(0.0, 1.0, len(sequence))
+    dst = np.linspace(0.0, 1.0, length)
+    return np.stack([np.interp(dst, src, sequence[:, d]) for d in range(sequence.shape[1])], axis=1)
+
+
+def dtw_distance(a: np.ndarray, b: np.ndarray, band: int) -> float:
+    """DTW distance between equal-length (T, D) sequences, per step, within |i - j| <= band."""
+    n = len(a)
+    cost = np.linalg.norm(a[:, None, :] - b[None, :, :], axis=-1).tolist()
+    inf = float("inf")
+    # Two rows of the accumulated-cost matrix; plain floats are much faster than numpy scalars here.
+    prev = [0.0] + [inf] * n
+    for i in range(1, n + 1):
+        row = [inf] * (n + 1)
+        costs = cost[i - 1]
+        for j in range(max(1, i - band), min(n, i + band) + 1):
+            row[j] = costs[j - 1] + min(prev[j], row[j - 1], prev[j - 1])
+        prev = row
+    return prev[n] / n
+
+
+class MotionTemplate:
+    """A named hand trajectory, stored as motion features resampled to a fixed length."""
+
+    def __init__(self, label: str, features: np.ndarray):
+        self.label = label
+        self.features = np.asarray(features, dtype=np.float32)
+
+    @classmethod
+    def from_landmarks(cls, label: str, points: np.ndarray, length: int = 20) -> "MotionTemplate":
+        """Build a template from a recorded (T, 21, 3) landmark sequence of one performance."""
+        return cls(label, resample(motion_features(np.asarray(points, dtype=np.float32)), length))
+
+
+def _thank_you_template(length: int = 20) -> MotionTemplate:
+    # Approximate "thank you": an upright flat hand starts at the chin and moves down and
+    # towards the viewer, so wrist and fingertip drop about one palm length while the
+    # fingertip tilts forward. Replace with templates recorded from real signers.
+    t = np.linspace(0.0, 1.0, length)[:, None]
+    wrist = np.hstack([np.zeros_like(t), 1.0 * t])
+    tip = np.hstack([np.zeros_like(t), -1.8 + 1.6 * t])
+    return MotionTemplate("thank you", np.hstack([wrist, tip]))
+
+
+DEFAULT_TEMPLATES = [_thank_you_template()]
+
+
+class StreamTracker:
+    """Smoothed labels and motion signs for one stream; feed it every frame in order.
+
+    Per-frame labels are voted over the last ``vote_window`` frames: the shown label changes only
+    when another label wins at least ``enter_ratio`` of the votes, so a label is held through
+    brief misdetections (hysteresis). Labels that name a motion template are not trusted from a
+    single frame; they are only reported when the last ``window`` frames of hand trajectory match
+    the template within ``motion_threshold`` (mean distance per step, in palm lengths), and then
+    held for ``hold_frames``.
+    """
+
+    def __init__(self, window: int = 20, vote_window: int = 7, enter_ratio: float = 0.6,
+                 templates: Optional[Iterable[MotionTemplate]] = None, motion_threshold: float = 0.35,
+                 band: Optional[int] = None, hold_frames: int = 15):
+        self.window = window
+        self.vote_window = min(vote_window, window)
+        self.enter_ratio = enter_ratio
+        self.templates: List[MotionTemplate] = [
+            t if len(t.features) == window else MotionTemplate(t.label, resample(t.features, window))
+            for t in (DEFAULT_TEMPLATES if templates is None else templates)]
+        self.motion_labels = {t.label for t in self.templates}
+        self.motion_threshold = motion_threshold
+        self.band = band if band is not None else max(1, window // 4)
+        self.hold_frames = hold_frames
+        self.ring = LandmarkRing(window)
+        self._label_ids = {}
+        self._labels = []
+        self.label = None
+        self._motion_label = None
+        self._motion_hold = 0
+
+    def _id(self, label: str) -> int:
+        if label not in self._label_ids:
+            self._label_ids[label] = len(self._labels)
+            self._labels.append(label)
+        return self._label_ids[label]
+
+    def update(self, points: Optional[np.ndarray], label: str) -> str:
+        """Record one frame (landmarks or None, per-frame label); returns the label to show."""
+        if label in self.motion_labels:
+            label = "unknown"
+        self.ring.push(points, self._id(label))
+
+        motion = self.match_motion() if points is not None else None
+        if motion is not None:
+            self._motion_label, self._motion_hold = motion, self.hold_frames
+            self.ring.clear()  # the next match needs a fresh trajectory
+        elif self._motion_hold:
+            self._motion_hold -= 1
+        if self._motion_hold:
+            return self._motion_label
+
+        votes = np.bincount(self.ring.label_ids[self.ring.last(self.vote_window)], minlength=len(self._labels))
+        best = int(votes.argmax())
+        current = self._label_ids.get(self.label)
+        if current is None or (best != current and votes[best] >= self.enter_ratio * votes.sum()):
+            self.label = self._labels[best]
+        return self.label
+
+    def match_motion(self) -> Optional[str]:
+        """The best motion template matching the last ``window`` frames, if all of them have a hand."""
+        if not self.templates or self.ring.count < self.window:
+            return None
+        slots = self.ring.last(self.window)
+        if not self.ring.present[slots].all():
+            return None
+        features = motion_features(self.ring.points[slots])
+        best, best_distance = None, self.motion_threshold
+        for template in self.templates:
+            distance = dtw_distance(features, template.features, self.band)
+            if distance <= best_distance:
+                best, best_distance = template.label, distance
+        return best
+
+    def reset(self):
+        self.ring.clear()
+        self.label = None
+        self._motion_label = None
+        self._motion_hold = 0
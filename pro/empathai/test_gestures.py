@@ -0,0 +1,68 @@
+"""
+test_gestures.py
+
+GestureClassifier cutoff and the heuristic fallback in SignRecognizer.classify.
+
+    python -m unittest test_gestures
+"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from gestures import GestureClassifier
+from sign_recognition import SignRecognizer, classify_points
+
+
+def synthetic_hand(fingers_up: bool, palm: float = 0.1, origin=(0.5, 0.8), jitter: float = 0.0, seed: int = 0):
+    """(21, 3) image-space landmarks of an upright hand: an open palm, or a fist."""
+    points = np.zeros((21, 3), dtype=np.float32)
+    knuckles = [(-0.45, -0.35), (-0.35, -1.0), (-0.1, -1.0), (0.12, -0.95), (0.32, -0.85)]
+    for finger, (x, y) in enumerate(knuckles):
+        for joint in range(4):
+            if finger == 0:  # thumb: out to the side when open, across the palm when closed
+                dx = -0.35 * joint if fingers_up else 0.15 * joint
+                points[1 + joint] = (x + dx, y - 0.1 * joint, 0.0)
+            elif fingers_up:
+                points[1 + 4 * finger + joint] = (x, y - 0.35 * joint, 0.0)
+            else:  # curled: the tip ends below the middle joint
+                points[1 + 4 * finger + joint] = (x, y - (0.0, 0.3, 0.25, 0.1)[joint], 0.0)
+    points[:, :2] = points[:, :2] * palm + origin
+    if jitter:
+        points += np.random.default_rng(seed).normal(0.0, jitter, points.shape).astype(np.float32)
+    return points
+
+
+class GestureFallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.bank = GestureClassifier(k=3)
+        self.bank.add("hello", np.stack([synthetic_hand(True, jitter=0.002, seed=i) for i in range(20)]))
+
+    def test_recorded_sign_matches(self):
+        self.assertEqual(self.bank.predict(synthetic_hand(True, palm=0.2, jitter=0.002, seed=99)), "hello")
+
+    def test_out_of_bank_hand_is_not_matched(self):
+        self.assertIsNone(self.bank.predict(synthetic_hand(False)))
+
+    def test_out_of_bank_hand_falls_through_to_heuristics(self):
+        fist = synthetic_hand(False)
+        recognizer = SignRecognizer(classifier=self.bank, temporal=False)
+        self.assertEqual(recognizer.classify(fist), classify_points(fist))
+        self.assertEqual(recognizer.classify(fist), "no")
+
+    def test_suggested_max_distance_separates_signs(self):
+        suggested = self.bank.suggested_max_distance()
+        self.assertIsNotNone(suggested)
+        self.assertLess(suggested, self.bank.neighbours(synthetic_hand(False), k=1)[0][0])
+
+    def test_loaded_bank_without_cutoff_gets_default(self):
+        self.bank.max_distance = None
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bank.npz")
+            self.bank.save(path)
+            self.assertIsNone(GestureClassifier.load(path).predict(synthetic_hand(False)))
+
+
+if __name__ == "__main__":
+    unittest.main()